@@ -0,0 +1 @@
+default_app_config = 'app.generic.apps.GenericConfig'
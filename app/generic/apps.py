@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class GenericConfig(AppConfig):
+    name = 'app.generic'
+    label = 'generic'
+
+    def ready(self):
+        # Connect the signal handlers that clear the browse counts and update the autocomplete indexes
+        from app.generic import browse, autocomplete  # noqa: F401
@@ -0,0 +1,207 @@
+"""
+In-memory prefix indexes for the Select2 autocomplete widgets.
+
+Each AutocompleteIndex keeps a sorted list of (normalised label, id) pairs
+for a model, so a lookup is a binary search followed by a short scan
+instead of an istartswith or icontains query. With words=True every word
+of a label is indexed too, so 'home' finds 'Letters home'.
+
+Indexes are built the first time they're used. Saving or deleting a row
+updates the index of the process that made the change straight away, and
+records the change in the cache under the old version stamp before bumping
+it. Other processes follow that chain of changes from their own version to
+the current one on their next lookup. If the chain is broken (a change has
+expired, or two processes raced for the same link) the index is rebuilt
+in a background thread while the old copy keeps serving.
+"""
+import bisect
+import re
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from unidecode import unidecode
+
+INDEXES = []
+
+# How long other processes have to pick up a change, and the most changes
+# they'll apply before rebuilding instead
+CHANGE_TIMEOUT = 60 * 60 * 24
+MAX_CHANGES = 1000
+
+
+def normalise(value):
+    return ' '.join(re.findall(r'\w+', unidecode(value or '').lower()))
+
+
+class AutocompleteIndex(object):
+
+    def __init__(self, model, fields, words=False):
+        self.model = model
+        self.fields = list(fields)
+        self.words = words
+        self.version = None
+        self.entries = []
+        self.keys = {}
+        self.lock = threading.Lock()
+        self.refreshing = False
+        INDEXES.append(self)
+
+    @property
+    def version_key(self):
+        return 'autocomplete:{}:{}:{}'.format(self.model._meta.label_lower, '.'.join(self.fields), int(self.words))
+
+    def change_key(self, version):
+        return '{}:{}'.format(self.version_key, version)
+
+    def labels(self, values):
+        """Return the normalised keys for one row's field values."""
+        keys = set()
+        for value in values:
+            label = normalise(value)
+            if label:
+                keys.add(label)
+                if self.words:
+                    keys.update(label[match.end():] for match in re.finditer(r' ', label))
+        return keys
+
+    def load(self):
+        """Return new (entries, keys) for every row of the model."""
+        entries = []
+        keys = {}
+        for row in self.model._default_manager.values_list('pk', *self.fields).iterator():
+            keys[row[0]] = self.labels(row[1:])
+            entries.extend((key, row[0]) for key in keys[row[0]])
+        entries.sort()
+        return entries, keys
+
+    def apply(self, changes):
+        """Apply (pk, field values) changes to the entries; values of None for a deleted row."""
+        # Copy, so lookups in progress keep a consistent list
+        entries = list(self.entries)
+        for pk, values in changes:
+            for key in self.keys.pop(pk, ()):
+                index = bisect.bisect_left(entries, (key, pk))
+                if index < len(entries) and entries[index] == (key, pk):
+                    del entries[index]
+            if values is not None:
+                self.keys[pk] = self.labels(values)
+                for key in self.keys[pk]:
+                    bisect.insort(entries, (key, pk))
+        self.entries = entries
+
+    def changes_since(self, version, current):
+        """Return the changes that lead from version to current, or None if the chain is broken."""
+        changes = []
+        while version != current and len(changes) < MAX_CHANGES:
+            change = cache.get(self.change_key(version))
+            if change is None:
+                return None
+            version, pk, values = change
+            changes.append((pk, values))
+        return changes if version == current else None
+
+    def current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            cache.set(self.version_key, version, None)
+        return version
+
+    def rebuild(self, version):
+        """Load a new copy of the index and swap it in as version."""
+        entries, keys = self.load()
+        with self.lock:
+            self.entries, self.keys, self.version = entries, keys, version
+            self.refreshing = False
+
+    def _refresh(self, version):
+        try:
+            self.rebuild(version)
+        finally:
+            self.refreshing = False
+            connection.close()
+
+    def lookup(self, term, limit=100):
+        """Return up to limit ids whose labels start with term, in label order."""
+        version = self.current_version()
+        with self.lock:
+            if self.version is None:
+                # Nothing to serve until the first build
+                self.entries, self.keys = self.load()
+                self.version = version
+            elif version != self.version:
+                changes = self.changes_since(self.version, version)
+                if changes is not None:
+                    self.apply(changes)
+                    self.version = version
+                elif not self.refreshing:
+                    self.refreshing = True
+                    threading.Thread(target=self._refresh, args=(version,), daemon=True).start()
+            entries = self.entries
+        term = normalise(term)
+        ids = []
+        seen = set()
+        position = bisect.bisect_left(entries, (term,))
+        while position < len(entries) and len(ids) < limit:
+            key, pk = entries[position]
+            if not key.startswith(term):
+                break
+            if pk not in seen:
+                seen.add(pk)
+                ids.append(pk)
+            position += 1
+        return ids
+
+    def update(self, instance, deleted=False):
+        """Bring the entries for instance up to date, and record the change for other processes."""
+        values = None if deleted else [getattr(instance, field) for field in self.fields]
+        version = uuid.uuid4().hex
+        for _ in range(3):
+            previous = self.current_version()
+            # add() only succeeds for the first process to claim the link from previous
+            if cache.add(self.change_key(previous), (version, instance.pk, values), CHANGE_TIMEOUT):
+                cache.set(self.version_key, version, None)
+                break
+        else:
+            # Have every process rebuild rather than miss the change
+            cache.delete(self.version_key)
+            previous = None
+        with self.lock:
+            if self.version is None:
+                return
+            self.apply([(instance.pk, values)])
+            if self.version == previous:
+                self.version = version
+
+
+class AutocompleteMixin(object):
+    """
+    For django-select2 model widgets: match the search term against an
+    AutocompleteIndex rather than querying with search_fields.
+    """
+    autocomplete = None
+    autocomplete_limit = 250
+
+    def filter_queryset(self, request, term, queryset=None, **dependent_fields):
+        if queryset is None:
+            queryset = self.get_queryset()
+        ids = self.autocomplete.lookup(term, self.autocomplete_limit)
+        return queryset.filter(pk__in=ids, **dependent_fields)
+
+
+@receiver(post_save)
+def update_saved(sender, instance, **kwargs):
+    for index in INDEXES:
+        if index.model is sender:
+            index.update(instance)
+
+
+@receiver(post_delete)
+def update_deleted(sender, instance, **kwargs):
+    for index in INDEXES:
+        if index.model is sender:
+            index.update(instance, deleted=True)
@@ -0,0 +1,167 @@
+"""
+Merging many pairs of duplicate records at once.
+
+The pairs come from a CSV or JSON file of master and duplicate ids, e.g. the
+output of find_duplicates after it has been checked. They're all validated
+before anything is merged: every id has to exist, a record can only be the
+duplicate in one pair, and the pairs can't form a cycle. Chains are
+followed, so with A -> B and B -> C both A and B are merged into C.
+
+Pairs whose duplicate is already merged into the right record are skipped,
+so a batch can be run again after it was interrupted. The merges are applied
+in chunks, each in its own transaction, and a checkpoint file records the
+lines that have been done.
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+from collections import namedtuple
+
+from django.apps import apps
+from django.db import transaction
+
+from app.generic.merge import merge_records
+
+MERGE_MODELS = {
+    'person': 'people.Person',
+    'organisation': 'people.Organisation',
+    'place': 'places.Place',
+}
+
+PlannedMerge = namedtuple('PlannedMerge', ['line', 'duplicate', 'master'])
+
+
+class BatchError(ValueError):
+    pass
+
+
+def get_model(name):
+    return apps.get_model(MERGE_MODELS[name])
+
+
+def read_pairs(content, format='csv'):
+    """
+    Return (line, master, duplicate) tuples from the text of a CSV file with
+    master and duplicate columns, or a JSON list of {"master": .., "duplicate": ..}
+    objects or [master, duplicate] lists. For JSON the line is the position in
+    the list, counting from 1.
+    """
+    if format == 'json':
+        try:
+            data = json.loads(content)
+        except ValueError as e:
+            raise BatchError('Not valid JSON: {}'.format(e))
+        if not isinstance(data, list):
+            raise BatchError('Expected a list of pairs')
+        pairs = []
+        for line, pair in enumerate(data, 1):
+            if isinstance(pair, dict):
+                pairs.append((line, pair.get('master'), pair.get('duplicate')))
+            elif isinstance(pair, list) and len(pair) == 2:
+                pairs.append((line, pair[0], pair[1]))
+            else:
+                pairs.append((line, None, None))
+        return pairs
+    reader = csv.DictReader(io.StringIO(content))
+    if not reader.fieldnames or not {'master', 'duplicate'} <= set(reader.fieldnames):
+        raise BatchError('The CSV needs master and duplicate columns')
+    # Line 1 is the header
+    return [(line, row['master'], row['duplicate']) for line, row in enumerate(reader, 2)]
+
+
+def digest(pairs):
+    return hashlib.sha1(json.dumps([[str(value) for value in pair] for pair in pairs]).encode('utf-8')).hexdigest()
+
+
+def plan_merges(model, pairs):
+    """
+    Check pairs and work out what to merge. Returns (merges, skipped, errors):
+    a list of PlannedMerges, the lines already done, and (line, message) tuples.
+    Nothing should be merged if there are any errors.
+    """
+    errors = []
+    targets = {}
+    lines = {}
+    for line, master, duplicate in pairs:
+        try:
+            master, duplicate = int(master), int(duplicate)
+        except (TypeError, ValueError):
+            errors.append((line, 'Master and duplicate must both be ids'))
+            continue
+        if master == duplicate:
+            errors.append((line, 'Record {} cannot be merged into itself'.format(master)))
+        elif duplicate in targets:
+            errors.append((line, 'Record {} is already the duplicate on line {}'.format(duplicate, lines[duplicate])))
+        else:
+            targets[duplicate] = master
+            lines[duplicate] = line
+    ids = set(targets) | set(targets.values())
+    merged_into = dict(model._base_manager.filter(pk__in=ids).values_list('pk', 'merged_into_id'))
+    for duplicate, master in targets.items():
+        for pk in (duplicate, master):
+            if pk not in merged_into:
+                errors.append((lines[duplicate], 'There is no record {}'.format(pk)))
+    merges = []
+    skipped = []
+    for duplicate, master in sorted(targets.items(), key=lambda item: lines[item[0]]):
+        line = lines[duplicate]
+        # Follow chains to the record everything ends up in
+        chain = [duplicate, master]
+        while chain[-1] in targets and chain[-1] not in chain[:-1]:
+            chain.append(targets[chain[-1]])
+        if chain[-1] in chain[:-1]:
+            errors.append((line, 'The pairs form a cycle: {}'.format(' -> '.join(str(pk) for pk in chain))))
+            continue
+        final = chain[-1]
+        if duplicate not in merged_into or final not in merged_into:
+            continue
+        if merged_into[duplicate] == final:
+            skipped.append(line)
+        elif merged_into[duplicate] and merged_into.get(master):
+            errors.append((line, 'Records {} and {} have both already been merged'.format(duplicate, master)))
+        elif merged_into[duplicate]:
+            errors.append((line, 'Record {} has already been merged into {}'.format(
+                duplicate, merged_into[duplicate])))
+        elif merged_into[final]:
+            errors.append((line, 'Record {} has already been merged into {}'.format(final, merged_into[final])))
+        else:
+            merges.append(PlannedMerge(line, duplicate, final))
+    errors.sort()
+    return merges, skipped, errors
+
+
+def load_checkpoint(path, key):
+    """Return the set of lines done by an earlier run over the same pairs."""
+    if path and os.path.exists(path):
+        with open(path) as checkpoint:
+            data = json.load(checkpoint)
+        if data.get('key') == key:
+            return set(data['done'])
+    return set()
+
+
+def save_checkpoint(path, key, done):
+    # Write then rename, so an interruption can't leave half a checkpoint
+    with open(path + '.tmp', 'w') as checkpoint:
+        json.dump({'key': key, 'done': sorted(done)}, checkpoint)
+    os.replace(path + '.tmp', path)
+
+
+def apply_merges(model, merges, chunk_size=100, progress=None):
+    """
+    Merge each PlannedMerge, chunk_size to a transaction. After each chunk is
+    committed progress is called with the lines done so far.
+    """
+    done = []
+    for start in range(0, len(merges), chunk_size):
+        chunk = merges[start:start + chunk_size]
+        with transaction.atomic():
+            records = model._base_manager.in_bulk({pk for merge in chunk for pk in (merge.duplicate, merge.master)})
+            for merge in chunk:
+                merge_records(records[merge.duplicate], records[merge.master])
+        done.extend(merge.line for merge in chunk)
+        if progress is not None:
+            progress(done)
+    return done
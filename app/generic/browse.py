@@ -0,0 +1,70 @@
+"""
+Cached per-letter counts for the A-Z browse lists.
+
+The counts (and the latest date_modified) for every letter of a list come
+from one GROUP BY browse_letter query. The result is cached until a row of
+the model is saved or deleted, so paging through a letter needs no COUNT
+query. The paginator is given the count instead of working it out.
+"""
+import uuid
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+CACHE_TIMEOUT = 60 * 60
+
+
+@lru_cache(maxsize=None)
+def is_browsable(model):
+    return any(field.name == 'browse_letter' for field in model._meta.get_fields())
+
+
+def version_key(model):
+    return 'browse:version:{}'.format(model._meta.label_lower)
+
+
+def letter_stats(queryset, key):
+    """
+    Return a dict of letter -> (count, latest date_modified) for queryset.
+    key identifies the queryset, e.g. the list view it belongs to.
+    """
+    model = queryset.model
+    version = cache.get(version_key(model))
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(version_key(model), version, None)
+    cache_key = 'browse:letters:{}:{}:{}'.format(model._meta.label_lower, version, key)
+    stats = cache.get(cache_key)
+    if stats is None:
+        rows = queryset.order_by().values('browse_letter').annotate(count=Count('pk'), modified=Max('date_modified'))
+        stats = {row['browse_letter']: (row['count'], row['modified']) for row in rows}
+        cache.set(cache_key, stats, CACHE_TIMEOUT)
+    return stats
+
+
+def summarise(stats, letter=None):
+    """Return (count, latest date_modified) for one letter, or for all of them."""
+    if letter:
+        return stats.get(letter.lower(), (0, None))
+    dates = [modified for count, modified in stats.values() if modified is not None]
+    return sum(count for count, modified in stats.values()), max(dates) if dates else None
+
+
+class CountedPaginator(Paginator):
+    """A Paginator that is told the number of objects rather than counting them."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.__dict__['count'] = count
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_letters(sender, **kwargs):
+    if is_browsable(sender):
+        cache.delete(version_key(sender))
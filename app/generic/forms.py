@@ -4,6 +4,8 @@ from django.forms.widgets import SelectDateWidget
 
 from calendar import monthrange
 
+from app.generic.batch import BatchError, read_pairs
+
 YEARS = [year for year in range(1850, 2013)]
 
 
@@ -199,3 +201,16 @@ class AddEventForm(DateSelectMixin, ModelForm):
         cleaned_data['end_earliest_date'] = self.clean_date(end_earliest_date, 'start')
         cleaned_data['end_latest_date'] = self.clean_date(end_latest_date, 'end')
         return cleaned_data
+
+
+class BatchMergeForm(forms.Form):
+    model = forms.ChoiceField(choices=[('person', 'People'), ('organisation', 'Organisations'), ('place', 'Places')])
+    pairs = forms.FileField(help_text='A CSV file with master and duplicate columns, or a JSON list of pairs')
+
+    def clean_pairs(self):
+        upload = self.cleaned_data['pairs']
+        format = 'json' if upload.name.endswith('.json') else 'csv'
+        try:
+            return read_pairs(upload.read().decode('utf-8-sig'), format)
+        except (BatchError, UnicodeDecodeError) as e:
+            raise forms.ValidationError(str(e))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.generic.batch import (MERGE_MODELS, BatchError, get_model, read_pairs, digest, plan_merges,
+                               load_checkpoint, save_checkpoint, apply_merges)
+
+
+class Command(BaseCommand):
+    help = 'Merge the duplicate records listed in a CSV or JSON file of master and duplicate ids.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(MERGE_MODELS))
+        parser.add_argument('file')
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help='Format of the file (default: guessed from its extension)')
+        parser.add_argument('--chunk-size', type=int, default=100, help='Merges per transaction')
+        parser.add_argument('--checkpoint', help='File recording progress, so an interrupted run can be resumed')
+        parser.add_argument('--dry-run', action='store_true', help='Only check the pairs.')
+
+    def handle(self, *args, **options):
+        model = get_model(options['model'])
+        format = options['format'] or ('json' if options['file'].endswith('.json') else 'csv')
+        with open(options['file'], encoding='utf-8') as pairs_file:
+            content = pairs_file.read()
+        try:
+            pairs = read_pairs(content, format)
+        except BatchError as e:
+            raise CommandError(e)
+        merges, skipped, errors = plan_merges(model, pairs)
+        if errors:
+            for line, message in errors:
+                self.stderr.write('Line {}: {}'.format(line, message))
+            raise CommandError('{} problems found, nothing merged'.format(len(errors)))
+        key = '{}:{}'.format(options['model'], digest(pairs))
+        checkpoint = options['checkpoint']
+        done = load_checkpoint(checkpoint, key)
+        merges = [merge for merge in merges if merge.line not in done]
+        self.stdout.write('{} to merge, {} already merged'.format(len(merges), len(done.union(skipped))))
+        if options['dry_run'] or not merges:
+            return
+        total = len(merges)
+
+        def progress(lines):
+            if checkpoint:
+                save_checkpoint(checkpoint, key, done.union(lines))
+            self.stdout.write('Merged {} of {}'.format(len(lines), total))
+
+        apply_merges(model, merges, chunk_size=options['chunk_size'], progress=progress)
@@ -0,0 +1,136 @@
+"""
+Merging duplicate records.
+
+merge_records() moves everything that points at one record over to
+another and marks the first as merged_into the second. The relations are
+found from the model's _meta, so new relations are picked up without
+changing any merge code, including many-to-many tables and the rows of
+other records that were merged into this one earlier. Each relation is
+moved with a single UPDATE, all inside one transaction, so a merge either
+happens completely or not at all.
+
+Rows that would become duplicates are dropped rather than moved, e.g. a
+story linked to both records. So are rows of the relationship models in
+SELF_LINKS that the merge would leave linking the master record to
+itself. Other models may point at the same record twice on purpose, e.g. a
+death whose location and burial place are the same place.
+
+Because UPDATE bypasses save(), records_merged is sent afterwards so
+caches and indexes that depend on related rows can catch up.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.dispatch import Signal
+
+records_merged = Signal(providing_args=['merged', 'master', 'report'])
+
+# Relationship models where a row linking a record to itself means nothing, with the two fields that link it
+SELF_LINKS = {
+    'people.PersonAssociatedPerson': ('person', 'associated_person'),
+}
+
+
+class MergeChange(namedtuple('MergeChange', ['model', 'field', 'moved', 'dropped'])):
+    @property
+    def label(self):
+        return '{} ({})'.format(self.model._meta.verbose_name_plural, self.field.replace('_', ' '))
+
+
+def relations(model):
+    """Return the (related model, foreign key) pairs that point at model, including many-to-many tables."""
+    found = []
+    for field in model._meta.get_fields(include_hidden=True):
+        if (field.one_to_many or field.one_to_one) and field.auto_created and not field.concrete:
+            found.append((field.related_model, field.field))
+    return found
+
+
+def unique_partners(related_model, field):
+    """Return the lists of other fields that have to be unique together with field."""
+    partners = []
+    for fields in related_model._meta.unique_together:
+        if field.name in fields:
+            partners.append([name for name in fields if name != field.name])
+    return partners
+
+
+def duplicate_ids(related_model, field, merged, master):
+    """Ids of merged's rows that duplicate one of master's under a unique constraint, or a one-to-one."""
+    rows = related_model._base_manager.filter(**{field.name: merged})
+    ids = set()
+    if field.unique:
+        if related_model._base_manager.filter(**{field.name: master}).exists():
+            ids.update(rows.values_list('pk', flat=True))
+        return ids
+    for partners in unique_partners(related_model, field):
+        duplicates = related_model._base_manager.filter(**{field.name: master}).filter(
+            **{name: OuterRef(name) for name in partners})
+        ids.update(rows.annotate(duplicate=Exists(duplicates)).filter(duplicate=True).values_list('pk', flat=True))
+    return ids
+
+
+def self_link_field(related_model, field):
+    """The other field of a SELF_LINKS model that field pairs with, or None."""
+    fields = SELF_LINKS.get(related_model._meta.label)
+    if fields is None or field.name not in fields:
+        return None
+    return fields[1] if field.name == fields[0] else fields[0]
+
+
+def self_links(related_model, field, rows, merged, master, other_done):
+    """
+    Ids of rows that moving field from merged to master would leave linking
+    master to itself. Rows linking merged to itself are caught by whichever
+    field of the pair is moved first.
+    """
+    other = self_link_field(related_model, field)
+    if other is None:
+        return set()
+    targets = [master.pk] if other_done else [master.pk, merged.pk]
+    return set(rows.filter(**{other + '__in': targets}).values_list('pk', flat=True))
+
+
+def merge_records(merged, master, dry_run=False):
+    """
+    Move everything that points at merged over to master, and set
+    merged.merged_into. Returns a list of MergeChanges for the relations
+    that had rows. With dry_run nothing is changed.
+    """
+    if merged.pk == master.pk:
+        raise ValueError('Cannot merge a record into itself')
+    model = type(master)
+    report = []
+    done = set()
+    with transaction.atomic():
+        for related_model, field in relations(model):
+            rows = related_model._base_manager.filter(**{field.name: merged})
+            if related_model is model:
+                # Records merged into this one earlier, but never master itself
+                rows = rows.exclude(pk=master.pk)
+            other = self_link_field(related_model, field)
+            other_done = (related_model, other) in done
+            if dry_run and other_done:
+                # These were counted as self-links already
+                rows = rows.exclude(**{other: merged})
+            dropped = duplicate_ids(related_model, field, merged, master)
+            # Only rows this merge moves can become self-links
+            links = self_links(related_model, field, rows.exclude(pk__in=dropped), merged, master, other_done)
+            if dry_run:
+                moved = rows.exclude(pk__in=dropped | links).count()
+            else:
+                if dropped or links:
+                    related_model._base_manager.filter(pk__in=dropped | links).delete()
+                moved = rows.update(**{field.name: master})
+            dropped |= links
+            done.add((related_model, field.name))
+            if moved or dropped:
+                report.append(MergeChange(related_model, field.name, moved, len(dropped)))
+        if not dry_run:
+            merged.merged_into = master
+            merged.save()
+            master.save()
+    if not dry_run:
+        records_merged.send(sender=model, merged=merged, master=master, report=report)
+    return report
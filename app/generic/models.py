@@ -2,6 +2,15 @@ import calendar
 
 from django.db import models
 from django.contrib.auth.models import User
+from unidecode import unidecode
+
+
+def first_letter(value):
+    """Return the lower-case first letter of value (ignoring accents), or '' if it doesn't start with one."""
+    value = unidecode(value or '').strip().lower()
+    if value and 'a' <= value[0] <= 'z':
+        return value[0]
+    return ''
 
 
 class StandardMetadata(models.Model):
@@ -16,6 +25,25 @@ class StandardMetadata(models.Model):
         abstract = True
 
 
+class BrowseLetterMixin(models.Model):
+    """
+    Keeps browse_letter set to the first letter of browse_field, so the
+    A-Z lists can use an indexed equality lookup instead of istartswith.
+    """
+    browse_field = None
+    browse_letter = models.CharField(max_length=1, blank=True, default='', editable=False)
+
+    def save(self, *args, **kwargs):
+        self.browse_letter = first_letter(getattr(self, self.browse_field))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.browse_field in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['browse_letter']
+        super().save(*args, **kwargs)
+
+    class Meta:
+        abstract = True
+
+
 class ShortDateMixin(models.Model):
     start_earliest_date = models.DateField(null=True, blank=True)
     start_earliest_month = models.BooleanField(default=False)
@@ -5,8 +5,26 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
+from app.generic.autocomplete import AutocompleteIndex, INDEXES
+from app.generic.batch import read_pairs, plan_merges
+
+from app.people.models import Person
+from app.sources.models import Source
+from app.sources.forms import PERSON_NAMES, SourcesMultiChoice
+
 
 class SimpleTest(TestCase):
     def test_basic_addition(self):
@@ -14,3 +32,125 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='test')
+        cache.clear()
+        # Start from unbuilt indexes, rather than ones left over from other tests
+        for index in INDEXES:
+            index.version = None
+
+    def titles(self, widget, term):
+        return sorted(source.title for source in widget.filter_queryset(None, term))
+
+    def test_lookup_and_updates(self):
+        Source.objects.create(title='Letters home', added_by=self.user)
+        source = Source.objects.create(title='Letter from Gallipoli', added_by=self.user)
+        widget = SourcesMultiChoice()
+        self.assertEqual(self.titles(widget, 'lett'), ['Letter from Gallipoli', 'Letters home'])
+        self.assertEqual(self.titles(widget, 'HOME'), ['Letters home'])
+        source.title = 'Diary from Gallipoli'
+        source.save()
+        self.assertEqual(self.titles(widget, 'lett'), ['Letters home'])
+        self.assertEqual(self.titles(widget, 'gall'), ['Diary from Gallipoli'])
+        source.delete()
+        self.assertEqual(self.titles(widget, 'gall'), [])
+
+    def test_other_process_changes(self):
+        Person.objects.create(family_name='Smith', added_by=self.user)
+        self.assertEqual(len(PERSON_NAMES.lookup('sm')), 1)
+        # Another process's index, which sees its own save
+        other = AutocompleteIndex(Person, ['family_name'])
+        self.addCleanup(INDEXES.remove, other)
+        Person.objects.bulk_create([Person(family_name='Smythe', added_by=self.user)])
+        person = Person.objects.get(family_name='Smythe')
+        other.update(person)
+        # The change is applied from the cache, without reloading
+        with self.assertNumQueries(0):
+            self.assertEqual(len(PERSON_NAMES.lookup('sm')), 2)
+        other.update(person, deleted=True)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(PERSON_NAMES.lookup('sm')), 1)
+
+    def test_broken_chain_rebuilds_in_background(self):
+        Person.objects.create(family_name='Smith', added_by=self.user)
+        self.assertEqual(len(PERSON_NAMES.lookup('sm')), 1)
+        Person.objects.bulk_create([Person(family_name='Smythe', added_by=self.user)])
+        cache.delete(PERSON_NAMES.version_key)
+        with mock.patch('app.generic.autocomplete.threading.Thread') as thread:
+            with self.assertNumQueries(0):
+                # The old copy keeps serving
+                self.assertEqual(len(PERSON_NAMES.lookup('sm')), 1)
+                PERSON_NAMES.lookup('sm')
+        thread.assert_called_once()
+        PERSON_NAMES.rebuild(*thread.call_args[1]['args'])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(PERSON_NAMES.lookup('sm')), 2)
+
+
+class BatchMergeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='test', is_staff=True)
+        self.people = [Person.objects.create(family_name='Smith {}'.format(i), added_by=self.user) for i in range(5)]
+
+    def pairs(self, *pairs):
+        return [(line, self.people[master].id, self.people[duplicate].id)
+                for line, (master, duplicate) in enumerate(pairs, 1)]
+
+    def test_read_pairs(self):
+        self.assertEqual(read_pairs('master,duplicate\n1,2\n3,4\n'), [(2, '1', '2'), (3, '3', '4')])
+        self.assertEqual(read_pairs('[[1, 2], {"master": 3, "duplicate": 4}]', 'json'), [(1, 1, 2), (2, 3, 4)])
+
+    def test_plan_follows_chains(self):
+        merges, skipped, errors = plan_merges(Person, self.pairs((1, 0), (2, 1)))
+        self.assertEqual(errors, [])
+        self.assertEqual([(merge.duplicate, merge.master) for merge in merges],
+                         [(self.people[0].id, self.people[2].id), (self.people[1].id, self.people[2].id)])
+
+    def test_plan_errors(self):
+        Person.objects.filter(id__in=[self.people[3].id, self.people[4].id]).update(merged_into=self.people[0])
+        pairs = self.pairs((1, 0), (0, 1), (2, 2), (4, 3)) + [(5, 'x', 1), (6, self.people[0].id, 0)]
+        merges, skipped, errors = plan_merges(Person, pairs)
+        self.assertEqual(merges, [])
+        self.assertEqual(sorted({line for line, message in errors}), [1, 2, 3, 4, 5, 6])
+        self.assertIn('cycle', errors[0][1])
+        self.assertIn('both already been merged', errors[3][1])
+
+    def test_command_resumes(self):
+        Person.objects.filter(id=self.people[1].id).update(merged_into=self.people[0])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pairs.json')
+            checkpoint = os.path.join(directory, 'checkpoint.json')
+            with open(path, 'w') as pairs_file:
+                json.dump([[self.people[0].id, person.id] for person in self.people[1:]], pairs_file)
+            output = io.StringIO()
+            call_command('batch_merge', 'person', path, '--chunk-size', '2', '--checkpoint', checkpoint,
+                         stdout=output)
+            self.assertIn('3 to merge, 1 already merged', output.getvalue())
+            self.assertEqual(Person.objects.filter(merged_into=self.people[0]).count(), 4)
+            with open(checkpoint) as data:
+                self.assertEqual(json.load(data)['done'], [2, 3, 4])
+            output = io.StringIO()
+            call_command('batch_merge', 'person', path, '--checkpoint', checkpoint, stdout=output)
+            self.assertEqual(output.getvalue(), '0 to merge, 4 already merged\n')
+
+    def test_command_refuses_invalid_pairs(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as pairs_file:
+            pairs_file.write('master,duplicate\n{0},{0}\n'.format(self.people[0].id))
+            pairs_file.flush()
+            with self.assertRaises(CommandError):
+                call_command('batch_merge', 'person', pairs_file.name, stderr=io.StringIO())
+
+    def test_view(self):
+        self.assertEqual(self.client.get('/merge/').status_code, 302)
+        self.client.force_login(self.user)
+        content = 'master,duplicate\n{},{}\n'.format(self.people[0].id, self.people[1].id).encode('utf-8')
+        response = self.client.post('/merge/', {'model': 'person', 'preview': 'Preview',
+                                                'pairs': SimpleUploadedFile('pairs.csv', content)})
+        self.assertContains(response, '1 record to merge')
+        self.assertIsNone(Person.objects.get(id=self.people[1].id).merged_into)
+        response = self.client.post('/merge/', {'model': 'person', 'pairs': SimpleUploadedFile('pairs.csv', content)})
+        self.assertContains(response, 'Merged 1 record.')
+        self.assertEqual(Person.objects.get(id=self.people[1].id).merged_into, self.people[0])
@@ -0,0 +1,32 @@
+from functools import wraps
+
+
+def is_prefetched(instance, accessor):
+    """True if the related rows for accessor were loaded with prefetch_related."""
+    manager = getattr(instance, accessor)
+    # Many-to-many managers name their cache; reverse foreign key managers use the accessor name
+    cache_name = getattr(manager, 'prefetch_cache_name', accessor)
+    return cache_name in getattr(instance, '_prefetched_objects_cache', {})
+
+
+def related_rows(instance, accessor, *select_related):
+    """
+    Return the related rows for accessor as a list. Prefetched rows are used
+    if there are any, otherwise they're fetched with select_related.
+    """
+    manager = getattr(instance, accessor)
+    if is_prefetched(instance, accessor):
+        return list(manager.all())
+    return list(manager.select_related(*select_related))
+
+
+def memoize(method):
+    """Cache the result of a method that takes no arguments on the instance."""
+    name = '_memo_{}'.format(method.__name__)
+
+    @wraps(method)
+    def wrapper(self):
+        if name not in self.__dict__:
+            self.__dict__[name] = method(self)
+        return self.__dict__[name]
+    return wrapper
@@ -1 +1,59 @@
-# Create your views here.
+from django.contrib.admin.views.decorators import staff_member_required
+from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.views.generic.edit import FormView
+
+from app.generic.batch import get_model, plan_merges, apply_merges
+from app.generic.forms import BatchMergeForm
+from app.generic.merge import merge_records
+
+
+class MergeView(FormView):
+    """
+    Merge the form's merge_record into its master_record. Submitting with
+    preview shows how many rows would be moved without changing anything.
+    """
+    success_url_name = None
+
+    def get_initial(self):
+        id = self.kwargs.get('id', None)
+        initial = {'merge_record': id}
+        return initial
+
+    def form_valid(self, form):
+        merge_record = form.cleaned_data['merge_record']
+        master_record = form.cleaned_data['master_record']
+        if merge_record == master_record:
+            form.add_error('master_record', 'A record cannot be merged into itself.')
+            return self.form_invalid(form)
+        if 'preview' in self.request.POST:
+            report = merge_records(merge_record, master_record, dry_run=True)
+            return self.render_to_response(self.get_context_data(form=form, report=report))
+        merge_records(merge_record, master_record)
+        self.redirect = master_record
+        return super(MergeView, self).form_valid(form)
+
+    def get_success_url(self):
+        return reverse_lazy(self.success_url_name, args=[self.redirect.id])
+
+
+class BatchMergeView(FormView):
+    """
+    Staff upload of a file of master and duplicate ids. Every pair is checked
+    first; with preview, or if there are problems, the plan is shown and
+    nothing is merged.
+    """
+    template_name = 'generic/batch_merge_form.html'
+    form_class = BatchMergeForm
+
+    @method_decorator(staff_member_required)
+    def dispatch(self, *args, **kwargs):
+        return super(BatchMergeView, self).dispatch(*args, **kwargs)
+
+    def form_valid(self, form):
+        model = get_model(form.cleaned_data['model'])
+        merges, skipped, errors = plan_merges(model, form.cleaned_data['pairs'])
+        context = self.get_context_data(form=form, merges=merges, skipped=skipped, errors=errors)
+        if not errors and 'preview' not in self.request.POST:
+            context['merged'] = len(apply_merges(model, merges))
+        return self.render_to_response(context)
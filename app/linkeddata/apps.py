@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class LinkedDataConfig(AppConfig):
+    name = 'app.linkeddata'
+    label = 'linkeddata'
+
+    def ready(self):
+        # Connect the signal handlers that keep the registry and cache current
+        from app.linkeddata import registry, cache, merged  # noqa: F401
@@ -0,0 +1,162 @@
+"""
+Cache of serialized linked-data responses.
+
+Rendered bodies are cached under a key made from the mapping, the entity id,
+the format and two version stamps: one for the entity and one for the whole
+site. Invalidation never has to find the cached bodies; it just deletes the
+entity's (or the site's) version stamp, so old bodies are never read again
+and expire on their own.
+
+An entity is invalidated when it is saved or deleted, and when any row its
+graph reads is saved or deleted. Those rows are worked out from the
+Related/Associated entries of the RDF mappings, so a MemorialName change
+invalidates both its Memorial and its Person. Many-to-many changes invalidate
+both sides.
+
+Other processes only see an invalidation if they use the same cache, so
+the site needs a shared cache backend; check_shared_cache() warns if the
+default cache is local to each process.
+"""
+import threading
+import uuid
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core import checks
+from django.core.cache import cache
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils.module_loading import autodiscover_modules
+
+from app.generic.merge import records_merged
+from app.linkeddata.models import RDFSchema
+from app.linkeddata.mapping import MAPPINGS
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+_lock = threading.Lock()
+_registry = {}
+
+
+def get_registry():
+    """
+    Return a dict with the set of mapped 'subjects' models and the 'dependencies'
+    of each model: model -> [(subject model, lookup)], built from all the RDF mappings.
+    """
+    if not _registry:
+        with _lock:
+            if not _registry:
+                autodiscover_modules('rdf')
+                dependencies = {}
+                for mapping in MAPPINGS:
+                    for model, lookup in mapping.dependencies():
+                        dependencies.setdefault(model, set()).add((mapping.model, lookup))
+                _registry['subjects'] = {mapping.model for mapping in MAPPINGS}
+                _registry['dependencies'] = dependencies
+    return _registry
+
+
+def version_key(model, pk):
+    return 'linkeddata:version:{}:{}'.format(model._meta.label_lower, pk)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version, None)
+    return version
+
+
+def body_key(mapping, pk, format):
+    return 'linkeddata:body:{}:{}:{}:{}:{}'.format(
+        mapping.model._meta.label_lower, mapping.url_name, pk, format,
+        '{}.{}'.format(get_version('linkeddata:site'), get_version(version_key(mapping.model, pk)))
+    )
+
+
+def get_cached(mapping, pk, format):
+    """Return a (content_type, body, etag, last_modified) tuple, or None."""
+    return cache.get(body_key(mapping, pk, format))
+
+
+def set_cached(mapping, pk, format, content_type, body, etag=None, last_modified=None):
+    cache.set(body_key(mapping, pk, format), (content_type, body, etag, last_modified), CACHE_TIMEOUT)
+
+
+def invalidate(model, pks):
+    cache.delete_many([version_key(model, pk) for pk in pks])
+
+
+def invalidate_site():
+    cache.delete('linkeddata:site')
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend.endswith('.LocMemCache'):
+        return [checks.Warning(
+            'The default cache is local to each process, so cached pages and indexes '
+            'will go stale when the site runs in more than one process.',
+            hint='Set CACHES to a shared backend such as memcached or a file cache.',
+            id='linkeddata.W001',
+        )]
+    return []
+
+
+def dependents(instance):
+    """Return (model, ids) pairs for the entities whose graphs read instance."""
+    found = []
+    for subject_model, lookup in get_registry()['dependencies'].get(instance.__class__, ()):
+        ids = subject_model.objects.filter(**{lookup: instance.pk}).values_list('pk', flat=True)
+        found.append((subject_model, list(ids)))
+    return found
+
+
+@receiver(pre_save)
+@receiver(pre_delete)
+def collect_dependents(sender, instance, **kwargs):
+    # Rows can move between entities on save, so remember who used them before
+    if instance.pk is not None and sender in get_registry()['dependencies']:
+        instance._linkeddata_dependents = dependents(instance)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_instance(sender, instance, **kwargs):
+    registry = get_registry()
+    if sender in registry['subjects']:
+        invalidate(sender, [instance.pk])
+    if sender in registry['dependencies']:
+        found = getattr(instance, '_linkeddata_dependents', [])
+        if kwargs.get('signal') is post_save:
+            found = found + dependents(instance)
+        for model, ids in found:
+            invalidate(model, ids)
+
+
+@receiver(m2m_changed)
+def invalidate_m2m(sender, instance, action, model, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # The related ids are only known before the rows are cleared
+        through = [field for field in sender._meta.get_fields() if getattr(field, 'related_model', None) is model]
+        if through:
+            source = [field for field in sender._meta.get_fields()
+                      if getattr(field, 'related_model', None) is instance.__class__ and field is not through[0]]
+            if source:
+                pk_set = sender.objects.filter(**{source[0].name: instance.pk}).values_list(
+                    '{}_id'.format(through[0].name), flat=True)
+    if action in ('post_add', 'post_remove', 'pre_clear'):
+        invalidate(instance.__class__, [instance.pk])
+        invalidate(model, pk_set or [])
+
+
+@receiver(post_save, sender=RDFSchema)
+@receiver(post_delete, sender=RDFSchema)
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+@receiver(records_merged)
+def invalidate_all(sender, **kwargs):
+    # A merge moves related rows with UPDATE, so their dependents aren't known
+    invalidate_site()
@@ -0,0 +1,95 @@
+"""
+Validators (ETag and Last-Modified) for conditional GETs.
+
+They are computed from date_modified values alone, so a request that ends in
+a 304 never builds a graph or renders a template. For a single entity, the
+validators cover the entity and the rows of every model related to it that
+has a date_modified. One UNION query returns the latest date_modified and a
+row count for each relation; the count means deleting a related row also
+changes the ETag. For a list page, the validators cover the filtered queryset.
+HTML pages also depend on who is logged in, so their ETag includes the user.
+"""
+import hashlib
+import calendar
+from functools import lru_cache
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def has_modified(model):
+    return any(field.name == 'date_modified' for field in model._meta.get_fields())
+
+
+@lru_cache(maxsize=None)
+def related_lookups(model):
+    """Return (related model, lookup back to model) pairs for relations whose rows have a date_modified."""
+    lookups = []
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None or not has_modified(field.related_model):
+            continue
+        if field.auto_created and not field.concrete:
+            lookup = field.field.name
+        else:
+            lookup = field.related_query_name()
+        if not lookup.endswith('+'):
+            lookups.append((field.related_model, lookup))
+    return lookups
+
+
+def modified_and_count(queryset, group_by):
+    return queryset.order_by().values(group_by).annotate(
+        modified=Max('date_modified'), count=Count('pk')).values_list('modified', 'count')
+
+
+def make_validators(key, rows):
+    """Return an (etag, last_modified) tuple from (date_modified, count) rows."""
+    dates = [modified for modified, count in rows if modified is not None]
+    if not dates:
+        return None, None
+    last_modified = max(dates)
+    total = sum(count for modified, count in rows)
+    etag = hashlib.md5('{}:{}:{}'.format(key, last_modified.isoformat(), total).encode('utf-8')).hexdigest()
+    return quote_etag(etag), calendar.timegm(last_modified.utctimetuple())
+
+
+def detail_validators(model, pk, format):
+    """Return (etag, last_modified) for an entity and its related rows, or (None, None)."""
+    if not has_modified(model):
+        return None, None
+    querysets = [modified_and_count(model._default_manager.filter(pk=pk), 'pk')]
+    for related, lookup in related_lookups(model):
+        querysets.append(modified_and_count(related._default_manager.filter(**{lookup: pk}), lookup))
+    rows = list(querysets[0].union(*querysets[1:], all=True))
+    return make_validators('{}:{}:{}'.format(model._meta.label_lower, pk, format), rows)
+
+
+def list_validators(queryset, key):
+    """Return (etag, last_modified) for a list of entities, or (None, None)."""
+    if not has_modified(queryset.model):
+        return None, None
+    row = queryset.order_by().aggregate(modified=Max('date_modified'), count=Count('pk'))
+    return make_validators(key, [(row['modified'], row['count'])])
+
+
+def user_etag(etag, user):
+    """Return etag made specific to user (or to anonymous users), or None."""
+    if etag is None:
+        return None
+    key = user.pk if user.is_authenticated else 'anon'
+    return quote_etag(hashlib.md5('{}:{}'.format(etag, key).encode('utf-8')).hexdigest())
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 (or 412) response if the request's conditions say so, otherwise None."""
+    if etag is None:
+        return None
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    if etag is not None and response.status_code in (200, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    return response
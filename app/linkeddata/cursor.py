@@ -0,0 +1,132 @@
+"""
+Keyset (cursor) pagination for the list views.
+
+Instead of a page number a request carries an opaque after= token holding
+the ordering values of the last row it saw, and the next page is the rows
+that sort after it. Each page costs the same however far into the list it
+is, and rows added or removed while a client walks the list don't shift
+the rows it hasn't seen yet from one page to another.
+
+The ordering always ends with the primary key, so it's total and every row
+is returned exactly once.
+"""
+import base64
+import json
+
+from django.core.exceptions import SuspiciousOperation, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import CharField, F, Q, TextField, Value
+from django.db.models.functions import Coalesce
+
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursor(SuspiciousOperation):
+    pass
+
+
+def encode_cursor(values):
+    data = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Return the list of ordering values in token, raising InvalidCursor if it isn't one."""
+    try:
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(data.decode('utf-8'))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor('Invalid cursor')
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def total_ordering(model, ordering):
+    """Return ordering with the primary key added to the end, if it's not already there."""
+    ordering = [field for field in ordering if isinstance(field, str) and field.lstrip('-') != '?']
+    if not any(field.lstrip('-') in ('pk', 'id', model._meta.pk.name) for field in ordering):
+        ordering.append('pk')
+    return ordering
+
+
+def is_nullable_text(model, path):
+    """
+    True if the value at path (e.g. person__family_name) is text that can be
+    NULL, either itself or through a join.
+    """
+    nullable = False
+    for name in path.split('__'):
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        nullable = nullable or field.null
+        model = field.related_model
+    return nullable and isinstance(field, (CharField, TextField))
+
+
+def after(keys, values):
+    """Return a Q for rows whose keys sort after values, given (name, descending) keys."""
+    query = None
+    for i in reversed(range(len(keys))):
+        name, descending = keys[i]
+        beyond = Q(**{'{}__{}'.format(name, 'lt' if descending else 'gt'): values[i]})
+        query = beyond if query is None else beyond | (Q(**{name: values[i]}) & query)
+    return query
+
+
+class CursorPage(object):
+    def __init__(self, paginator, object_list, next_cursor):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return False
+
+
+class CursorPaginator(object):
+    """
+    Pages through queryset in the order given by ordering, a list of field
+    names as passed to order_by(). Nullable text fields sort as ''; other
+    nullable fields can't be used in the ordering.
+    """
+
+    def __init__(self, queryset, ordering, per_page, max_page_size=MAX_PAGE_SIZE):
+        self.ordering = total_ordering(queryset.model, ordering)
+        self.per_page = min(max(int(per_page), 1), max_page_size)
+        annotations = {}
+        self.keys = []
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            expression = F(name)
+            if is_nullable_text(queryset.model, name):
+                expression = Coalesce(name, Value(''))
+            annotations['_cursor_{}'.format(i)] = expression
+            self.keys.append(('_cursor_{}'.format(i), field.startswith('-')))
+        self.queryset = queryset.annotate(**annotations).order_by(
+            *['-{}'.format(name) if descending else name for name, descending in self.keys])
+
+    def page(self, token=None):
+        queryset = self.queryset
+        if token:
+            try:
+                queryset = queryset.filter(after(self.keys, decode_cursor(token, len(self.keys))))
+            except (ValueError, TypeError, ValidationError):
+                # The values don't suit the fields, e.g. text for an id
+                raise InvalidCursor('Invalid cursor')
+        object_list = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[:self.per_page]
+            next_cursor = encode_cursor([getattr(object_list[-1], name) for name, descending in self.keys])
+        return CursorPage(self, object_list, next_cursor)
@@ -0,0 +1,124 @@
+"""
+Full-dataset RDF dumps.
+
+Each dataset (people, places, ...) is split into shards by fixed id ranges,
+so a shard keeps the same ids when rows are added or deleted elsewhere.
+Every shard is written to its own gzipped file. A manifest records a
+signature of the ids and date_modified values in each shard, and of the
+related rows (memorial names, stories, associations) each entity's graph
+includes, so a re-run only writes the shards whose graphs changed.
+"""
+import os
+import gzip
+import json
+import hashlib
+from collections import OrderedDict, defaultdict
+
+from django.db.models import Count, Max
+
+from app.linkeddata.conditional import has_modified
+from app.linkeddata.streaming import chunked, write_ntriples, write_turtle
+
+FORMATS = {
+    'nt': write_ntriples,
+    'ttl': write_turtle,
+}
+
+MANIFEST = 'manifest.json'
+
+
+def get_datasets():
+    """Return an OrderedDict of name -> (mapping, queryset) for the public entities."""
+    from app.people.models import Person, Organisation
+    from app.people.rdf import PERSON, ORGANISATION
+    from app.places.models import Place
+    from app.places.rdf import PLACE
+    from app.memorials.models import Memorial
+    from app.memorials.rdf import MEMORIAL
+    from app.sources.models import Source, Story
+    from app.sources.rdf import SOURCE, STORY
+    return OrderedDict([
+        ('people', (PERSON, Person.objects.filter(status='confirmed', merged_into__isnull=True))),
+        ('organisations', (ORGANISATION, Organisation.objects.filter(merged_into__isnull=True))),
+        ('places', (PLACE, Place.objects.filter(merged_into__isnull=True))),
+        ('memorials', (MEMORIAL, Memorial.objects.all())),
+        ('sources', (SOURCE, Source.objects.all())),
+        ('stories', (STORY, Story.objects.all())),
+    ])
+
+
+def shard_filename(name, shard, format):
+    return '{}-{:04d}.{}.gz'.format(name, shard, format)
+
+
+def format_modified(modified):
+    return modified.isoformat() if modified else ''
+
+
+def related_signatures(queryset, mapping):
+    """
+    Return a dict of id -> [count and latest date_modified of each kind of
+    related row] for the rows in queryset, from one GROUP BY query per kind.
+    """
+    related = defaultdict(list)
+    for model, lookup in sorted(set(mapping.dependencies()), key=lambda dependency: dependency[1]):
+        annotations = {'count': Count(lookup)}
+        if has_modified(model):
+            annotations['modified'] = Max('{}__date_modified'.format(lookup))
+        rows = queryset.order_by().values('id').annotate(**annotations)
+        for row in rows.iterator():
+            related[row['id']].append('{}={}@{}'.format(lookup, row['count'], format_modified(row.get('modified'))))
+    return related
+
+
+def plan_shards(queryset, shard_size, mapping=None):
+    """
+    Return a dict of shard number -> signature for the rows in queryset.
+    With mapping, the signature also covers the related rows in each graph.
+    """
+    related = related_signatures(queryset, mapping) if mapping else {}
+    hashes = {}
+    rows = queryset.order_by('id').values_list('id', 'date_modified')
+    for pk, modified in rows.iterator():
+        shard = pk // shard_size
+        if shard not in hashes:
+            hashes[shard] = hashlib.sha1()
+        hashes[shard].update('{}:{}:{};'.format(pk, format_modified(modified),
+                                                ','.join(related.get(pk, []))).encode('utf-8'))
+    return {shard: sha.hexdigest() for shard, sha in hashes.items()}
+
+
+def write_shard(name, shard, shard_size, format, path):
+    """Write one shard to a gzipped file at path."""
+    mapping, queryset = get_datasets()[name]
+    queryset = queryset.filter(id__gte=shard * shard_size, id__lt=(shard + 1) * shard_size)
+    queryset = mapping.prepare(queryset.order_by('id'))
+    temp_path = '{}.tmp'.format(path)
+    try:
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as dump:
+            for chunk in FORMATS[format](mapping, chunked(queryset), summary=False):
+                dump.write(chunk)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    return path
+
+
+def load_manifest(directory, format, shard_size):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (IOError, ValueError):
+        manifest = {}
+    # A change of format or shard size invalidates every shard
+    if manifest.get('format') != format or manifest.get('shard_size') != shard_size:
+        manifest = {'format': format, 'shard_size': shard_size, 'shards': {}}
+    return manifest
+
+
+def save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open('{}.tmp'.format(path), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.replace('{}.tmp'.format(path), path)
@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from app.linkeddata.dump import (FORMATS, get_datasets, plan_shards, shard_filename, write_shard,
+                                 load_manifest, save_manifest)
+
+
+def init_worker():
+    # Forked workers must not share the parent's database connections
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Write gzipped RDF dumps of all public entities, rebuilding only the shards that changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='nt')
+        parser.add_argument('--processes', type=int, default=os.cpu_count())
+        parser.add_argument('--shard-size', type=int, default=1000)
+        parser.add_argument('--dataset', action='append', dest='datasets',
+                            help='Only dump this dataset (can be repeated).')
+        parser.add_argument('--force', action='store_true', help='Rebuild every shard.')
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        format = options['format']
+        shard_size = options['shard_size']
+        datasets = get_datasets()
+        names = options['datasets'] or list(datasets)
+        for name in names:
+            if name not in datasets:
+                raise CommandError('Unknown dataset: {}'.format(name))
+        os.makedirs(directory, exist_ok=True)
+        manifest = load_manifest(directory, format, shard_size)
+        shards = manifest['shards']
+        jobs = []
+        for name in names:
+            mapping, queryset = datasets[name]
+            current = {}
+            for shard, signature in plan_shards(queryset, shard_size, mapping).items():
+                filename = shard_filename(name, shard, format)
+                current[filename] = signature
+                path = os.path.join(directory, filename)
+                if options['force'] or shards.get(filename) != signature or not os.path.exists(path):
+                    jobs.append((name, shard, filename, signature))
+            # Remove shards whose entities have all gone
+            for filename in [f for f in shards if f.startswith('{}-'.format(name)) and f not in current]:
+                path = os.path.join(directory, filename)
+                if os.path.exists(path):
+                    os.remove(path)
+                del shards[filename]
+        try:
+            if options['processes'] > 1 and len(jobs) > 1:
+                self.run_pool(jobs, directory, shard_size, format, manifest, options['processes'])
+            else:
+                for name, shard, filename, signature in jobs:
+                    write_shard(name, shard, shard_size, format, os.path.join(directory, filename))
+                    shards[filename] = signature
+        finally:
+            save_manifest(directory, manifest)
+        self.stdout.write('Wrote {} of {} shards'.format(len(jobs), len(shards)))
+
+    def run_pool(self, jobs, directory, shard_size, format, manifest, processes):
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker) as pool:
+            futures = {}
+            for name, shard, filename, signature in jobs:
+                future = pool.submit(write_shard, name, shard, shard_size, format, os.path.join(directory, filename))
+                futures[future] = (filename, signature)
+            for future in as_completed(futures):
+                filename, signature = futures[future]
+                future.result()
+                manifest['shards'][filename] = signature
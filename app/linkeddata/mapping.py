@@ -0,0 +1,311 @@
+"""
+Declarative RDF mappings.
+
+An RDFMapping describes how instances of a model become triples: the
+rdf:type(s), literal fields and links to related entities. Each entry
+knows which select_related/prefetch_related lookups it needs, so a
+queryset prepared by the mapping fetches everything for a page of
+entities in a fixed number of queries.
+
+Prefixed names such as 'foaf:Person' are resolved against the namespace
+registry when a graph is built. Links to other entities are built from
+URL templates that are reversed once, the first time the mapping is used.
+"""
+from django.db.models import Prefetch
+from django.urls import reverse
+
+from rdflib import Literal, URIRef
+
+from app.linkeddata.models import RDFClass, RDFProperty
+from app.linkeddata.registry import new_graph
+
+# Placeholder id used to reverse a url name into a template
+PLACEHOLDER = 987654321
+
+# Every mapping that has been defined, used to work out cache dependencies
+MAPPINGS = []
+
+
+def url_template(url_name):
+    """Reverse url_name once, returning a format string that takes an id."""
+    url = reverse(url_name, args=[PLACEHOLDER])
+    return url.replace(str(PLACEHOLDER), '{}')
+
+
+def resolve(namespaces, name):
+    prefix, term = name.split(':', 1)
+    return namespaces[prefix][term]
+
+
+def walk(obj, path):
+    """Follow a Django-style lookup path (a__b__c), yielding the objects at the end."""
+    objs = [obj]
+    for part in path.split('__'):
+        next_objs = []
+        for obj in objs:
+            value = getattr(obj, part)
+            if hasattr(value, 'all'):
+                next_objs.extend(value.all())
+            elif value is not None:
+                next_objs.append(value)
+        objs = next_objs
+    return objs
+
+
+def related_fields(model, path):
+    """Return the fields along a lookup path, which may use reverse accessor names."""
+    fields = []
+    for part in path.split('__'):
+        for field in model._meta.get_fields():
+            if field.is_relation and not field.concrete and field.auto_created:
+                name = field.get_accessor_name()
+            else:
+                name = field.name
+            if name == part:
+                fields.append(field)
+                model = field.related_model
+                break
+    return fields
+
+
+def related_model(model, path):
+    """Return the model at the end of a lookup path."""
+    fields = related_fields(model, path)
+    return fields[-1].related_model if fields else model
+
+
+class Field(object):
+    """
+    A literal taken from the instance.
+    attr is either a lookup path (e.g. 'added_by__username') or a callable
+    that takes the instance. Empty values are skipped.
+    """
+
+    def __init__(self, predicate, attr):
+        self.predicate = predicate
+        self.attr = attr
+
+    def select_related(self, model):
+        if callable(self.attr) or '__' not in self.attr:
+            return []
+        return [self.attr.rsplit('__', 1)[0]]
+
+    def prefetch_related(self, model):
+        return []
+
+    def compile(self):
+        pass
+
+    def values(self, instance, namespaces, host):
+        if callable(self.attr):
+            values = [self.attr(instance)]
+        else:
+            values = walk(instance, self.attr)
+        for value in values:
+            if value not in (None, ''):
+                yield resolve(namespaces, self.predicate), Literal(value)
+
+
+class Link(object):
+    """A link to a single related entity, built from a foreign key id without fetching the row."""
+
+    def __init__(self, predicate, field, url_name):
+        self.predicate = predicate
+        self.field = field
+        self.url_name = url_name
+
+    def select_related(self, model):
+        return []
+
+    def prefetch_related(self, model):
+        return []
+
+    def compile(self):
+        self.template = url_template(self.url_name)
+
+    def values(self, instance, namespaces, host):
+        related_id = getattr(instance, '{}_id'.format(self.field))
+        if related_id is not None:
+            yield resolve(namespaces, self.predicate), URIRef(host + self.template.format(related_id))
+
+
+class Related(object):
+    """
+    Values for each row reached through a reverse foreign key or many-to-many path.
+    With url_name, each row (or the row's target foreign key) is linked by URI.
+    With value, a literal is taken from each row instead.
+    """
+
+    def __init__(self, predicate, path, url_name=None, target=None, value=None):
+        self.predicate = predicate
+        self.path = path
+        self.url_name = url_name
+        self.target = target
+        self.value = value
+
+    def select_related(self, model):
+        return []
+
+    def prefetch_related(self, model):
+        return [self.path]
+
+    def dependencies(self, model):
+        """
+        Return (model, lookup) pairs for the rows this entry reads: instances
+        of model whose related rows match lookup have to be rebuilt when a row changes.
+        """
+        fields = related_fields(model, self.path)
+        return [(fields[-1].related_model, '__'.join(field.name for field in fields))]
+
+    def compile(self):
+        if self.url_name:
+            self.template = url_template(self.url_name)
+
+    def row_values(self, row, host):
+        if self.url_name:
+            related_id = getattr(row, '{}_id'.format(self.target)) if self.target else row.pk
+            if related_id is not None:
+                yield URIRef(host + self.template.format(related_id))
+        else:
+            value = getattr(row, self.value)
+            if value not in (None, ''):
+                yield Literal(value)
+
+    def values(self, instance, namespaces, host):
+        predicate = resolve(namespaces, self.predicate)
+        for row in walk(instance, self.path):
+            for value in self.row_values(row, host):
+                yield predicate, value
+
+
+class Associated(Related):
+    """
+    Links through an association model (an RDFRelationship subclass),
+    using the rdf_property set on each row's association as the predicate.
+    """
+
+    def __init__(self, path, target, url_name):
+        super().__init__(None, path, url_name=url_name, target=target)
+
+    def prefetch_related(self, model):
+        rows = related_model(model, self.path)
+        return [
+            Prefetch(self.path, queryset=rows.objects.select_related('association')),
+            Prefetch('{}__association__rdf_property'.format(self.path),
+                     queryset=RDFProperty.objects.select_related('schema')),
+        ]
+
+    def values(self, instance, namespaces, host):
+        for row in walk(instance, self.path):
+            if row.association is None:
+                continue
+            for rdf in row.association.rdf_property.all():
+                predicate = namespaces[rdf.schema.prefix][rdf.rdf_property]
+                for value in self.row_values(row, host):
+                    yield predicate, value
+
+
+class Types(object):
+    """rdf:type values taken from the RDFClass rows of an RDFType, e.g. a Source's source_type."""
+
+    def __init__(self, path, default=None):
+        self.path = path
+        self.default = default
+
+    def select_related(self, model):
+        return []
+
+    def prefetch_related(self, model):
+        return [Prefetch(self.path, queryset=RDFClass.objects.select_related('schema'))]
+
+    def compile(self):
+        pass
+
+    def values(self, instance, namespaces, host):
+        rdf_type = resolve(namespaces, 'rdf:type')
+        classes = walk(instance, self.path)
+        for rdf in classes:
+            yield rdf_type, namespaces[rdf.schema.prefix][rdf.rdf_class]
+        if not classes and self.default:
+            yield rdf_type, resolve(namespaces, self.default)
+
+
+class RDFMapping(object):
+    """
+    How instances of model are described in RDF.
+
+    url_name names the url pattern of the subject; subject is the instance's
+    foreign key used as the subject id, if the subject isn't the instance itself.
+    rdf_type is a prefixed name or a Types entry. select_related lists the
+    relations needed by the model's __str__, which is used for rdfs:label.
+    properties are emitted only for detail graphs, not for list summaries.
+    """
+
+    def __init__(self, model, url_name, rdf_type=None, properties=(), subject=None, select_related=(), label=True):
+        self.model = model
+        self.url_name = url_name
+        self.rdf_type = rdf_type
+        self.properties = list(properties)
+        self.subject = subject
+        self.select = list(select_related)
+        self.label = label
+        self.compiled = False
+        MAPPINGS.append(self)
+
+    def compile(self):
+        if not self.compiled:
+            self.template = url_template(self.url_name)
+            for entry in self.entries():
+                entry.compile()
+            self.compiled = True
+
+    def entries(self, summary=False):
+        entries = [self.rdf_type] if isinstance(self.rdf_type, Types) else []
+        if not summary:
+            entries.extend(self.properties)
+        return entries
+
+    def dependencies(self):
+        """Return (model, lookup) pairs for the related rows the full graph depends on."""
+        dependencies = []
+        for entry in self.properties:
+            if hasattr(entry, 'dependencies'):
+                dependencies.extend(entry.dependencies(self.model))
+        return dependencies
+
+    def prepare(self, queryset, summary=False):
+        """Add the select_related and prefetch_related lookups the graph needs."""
+        select = list(self.select)
+        prefetch = []
+        for entry in self.entries(summary):
+            select.extend(entry.select_related(self.model))
+            prefetch.extend(entry.prefetch_related(self.model))
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def uri(self, instance, host):
+        self.compile()
+        subject_id = getattr(instance, '{}_id'.format(self.subject)) if self.subject else instance.pk
+        return URIRef(host + self.template.format(subject_id))
+
+    def triples(self, instance, namespaces, host, summary=False):
+        self.compile()
+        subject = self.uri(instance, host)
+        if self.rdf_type and not isinstance(self.rdf_type, Types):
+            yield subject, resolve(namespaces, 'rdf:type'), resolve(namespaces, self.rdf_type)
+        if self.label:
+            yield subject, resolve(namespaces, 'rdfs:label'), Literal(str(instance))
+        for entry in self.entries(summary):
+            for predicate, value in entry.values(instance, namespaces, host):
+                yield subject, predicate, value
+
+    def graph(self, instances, summary=False):
+        graph, namespaces, host_ns = new_graph()
+        host = str(host_ns)
+        for instance in instances:
+            for triple in self.triples(instance, namespaces, host, summary):
+                graph.add(triple)
+        return graph
@@ -0,0 +1,82 @@
+"""
+Index of merged records.
+
+Person, Organisation and Place records that have been merged point to the
+record they were merged into through merged_into, and that record may itself
+have been merged later. The index maps every merged id straight to the final
+record's id, so a request for a merged record needs no queries and redirects
+in one hop.
+
+The index for a model is built with one query the first time it's needed and
+kept in the cache for a day. Saving or deleting a merged record clears it.
+So does un-merging one. The timeout catches changes that bypass save(),
+such as a queryset update().
+"""
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@lru_cache(maxsize=None)
+def is_mergeable(model):
+    return any(field.name == 'merged_into' for field in model._meta.get_fields())
+
+
+def index_key(model):
+    return 'linkeddata:merged:{}'.format(model._meta.label_lower)
+
+
+def compress(merged):
+    """
+    Take a dict of id -> merged_into id and return id -> final id.
+    A cycle is broken at the first id that's revisited.
+    """
+    index = {}
+    for start in merged:
+        path = []
+        seen = set()
+        current = start
+        while current in merged and current not in seen and current not in index:
+            seen.add(current)
+            path.append(current)
+            current = merged[current]
+        final = index.get(current, current)
+        for pk in path:
+            index[pk] = final
+    return {pk: final for pk, final in index.items() if pk != final}
+
+
+def get_index(model):
+    index = cache.get(index_key(model))
+    if index is None:
+        merged = dict(model._default_manager.filter(merged_into__isnull=False).values_list('id', 'merged_into_id'))
+        index = compress(merged)
+        cache.set(index_key(model), index, CACHE_TIMEOUT)
+    return index
+
+
+def canonical_id(model, pk):
+    """Return the id of the record pk was (eventually) merged into, or pk if it hasn't been merged."""
+    pk = int(pk)
+    if not is_mergeable(model):
+        return pk
+    return get_index(model).get(pk, pk)
+
+
+def clear_index(model):
+    cache.delete(index_key(model))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def update_index(sender, instance, **kwargs):
+    if is_mergeable(sender):
+        index = cache.get(index_key(sender))
+        if index is None:
+            return
+        if instance.merged_into_id is not None or instance.pk in index or instance.pk in index.values():
+            clear_index(sender)
@@ -0,0 +1,100 @@
+"""
+Process-wide registry of RDF namespaces and the site's host namespace.
+
+The namespaces are loaded from RDFSchema and the host from the current Site
+the first time a graph is requested, and are then reused by every
+make_graph() in the process. Each registry is stored with the version
+stamp that was in the cache when it was loaded. Saving or deleting an
+RDFSchema or Site row deletes the stamp, so every process that shares the
+cache reloads its registry on its next request.
+"""
+import threading
+import uuid
+
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rdflib import Graph, Namespace
+
+from app.linkeddata.models import RDFSchema
+
+_lock = threading.Lock()
+_registry = {}
+
+VERSION_KEY = 'linkeddata:registry'
+
+
+def _load():
+    graph = Graph()
+    # Start with rdflib's own bindings (rdf, rdfs, xsd, xml) so they are
+    # always available, then let the database override them.
+    namespaces = {prefix: Namespace(uri) for prefix, uri in graph.namespaces()}
+    bindings = []
+    for schema in RDFSchema.objects.all():
+        namespace = Namespace(schema.uri)
+        namespaces[schema.prefix] = namespace
+        bindings.append((schema.prefix, namespace))
+    host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
+    return {
+        'namespaces': namespaces,
+        'bindings': tuple(bindings),
+        'host_ns': host_ns,
+    }
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def get_registry():
+    version = current_version()
+    registry = _registry.get('current')
+    if registry is None or _registry.get('version') != version:
+        with _lock:
+            registry = _registry.get('current')
+            if registry is None or _registry.get('version') != version:
+                registry = _registry['current'] = _load()
+                _registry['version'] = version
+    return registry
+
+
+def get_namespaces():
+    """Return a dict of prefix -> Namespace for all known schemas."""
+    return get_registry()['namespaces']
+
+
+def get_host_namespace():
+    """Return a Namespace for the current site's domain."""
+    return get_registry()['host_ns']
+
+
+def new_graph():
+    """
+    Return a (graph, namespaces, host_ns) tuple.
+    The graph is empty, with all schema prefixes already bound.
+    """
+    registry = get_registry()
+    graph = Graph()
+    for prefix, namespace in registry['bindings']:
+        graph.bind(prefix, namespace)
+    return graph, registry['namespaces'], registry['host_ns']
+
+
+def clear_registry():
+    with _lock:
+        _registry.clear()
+
+
+@receiver(post_save, sender=RDFSchema)
+@receiver(post_delete, sender=RDFSchema)
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def invalidate_registry(sender, **kwargs):
+    cache.delete(VERSION_KEY)
+    clear_registry()
@@ -0,0 +1,109 @@
+"""
+Incremental serializers for large lists of entities.
+
+Rather than building an rdflib Graph for a whole page and serializing it
+in one go, entities are read from the database in chunks and written out
+one entity at a time, so memory use depends on the chunk size, not the
+page size. The output is N-Triples, Turtle (one block per subject) or
+JSON-LD (a @graph of node objects).
+"""
+import re
+import json
+
+from rdflib import URIRef
+from rdflib.namespace import RDF
+
+from app.linkeddata.registry import new_graph
+
+CHUNK_SIZE = 100
+
+LOCAL_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_\-]*$')
+
+
+def chunked(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Yield the objects in queryset, fetching chunk_size rows at a time.
+    Unlike QuerySet.iterator() this keeps any prefetch_related lookups.
+    """
+    offset = 0
+    while True:
+        chunk = list(queryset[offset:offset + chunk_size])
+        for obj in chunk:
+            yield obj
+        if len(chunk) < chunk_size:
+            break
+        offset += chunk_size
+
+
+def grouped_triples(mapping, entities, namespaces, host_ns, summary):
+    """Yield a list of triples for each entity; all triples in a list share one subject."""
+    host = str(host_ns)
+    for entity in entities:
+        triples = list(mapping.triples(entity, namespaces, host, summary))
+        if triples:
+            yield triples
+
+
+def write_ntriples(mapping, entities, summary=True):
+    graph, namespaces, host_ns = new_graph()
+    for triples in grouped_triples(mapping, entities, namespaces, host_ns, summary):
+        yield ''.join('{} {} {} .\n'.format(s.n3(), p.n3(), o.n3()) for s, p, o in triples)
+
+
+def qname(term, prefixes):
+    """Return prefix:name for a URIRef in one of the bound namespaces, or None."""
+    for prefix, uri in prefixes:
+        if term.startswith(uri) and LOCAL_NAME.match(term[len(uri):]):
+            return '{}:{}'.format(prefix, term[len(uri):])
+    return None
+
+
+def turtle_term(term, prefixes):
+    if isinstance(term, URIRef):
+        return qname(term, prefixes) or term.n3()
+    return term.n3()
+
+
+def write_turtle(mapping, entities, summary=True):
+    graph, namespaces, host_ns = new_graph()
+    prefixes = list(graph.namespaces())
+    yield ''.join('@prefix {}: <{}> .\n'.format(prefix, uri) for prefix, uri in prefixes)
+    for triples in grouped_triples(mapping, entities, namespaces, host_ns, summary):
+        lines = []
+        for s, p, o in triples:
+            predicate = 'a' if p == RDF.type else turtle_term(p, prefixes)
+            lines.append('    {} {}'.format(predicate, turtle_term(o, prefixes)))
+        yield '\n{}\n{} .\n'.format(turtle_term(triples[0][0], prefixes), ' ;\n'.join(lines))
+
+
+def jsonld_key(term, prefixes):
+    return qname(term, prefixes) or str(term)
+
+
+def jsonld_value(term, prefixes):
+    if isinstance(term, URIRef):
+        return {'@id': str(term)}
+    value = {'@value': str(term)}
+    if term.language:
+        value['@language'] = term.language
+    elif term.datatype:
+        value['@type'] = jsonld_key(term.datatype, prefixes)
+    return value
+
+
+def write_jsonld(mapping, entities, summary=True):
+    graph, namespaces, host_ns = new_graph()
+    prefixes = list(graph.namespaces())
+    context = {prefix: str(uri) for prefix, uri in prefixes}
+    yield '{{"@context": {}, "@graph": ['.format(json.dumps(context))
+    separator = '\n'
+    for triples in grouped_triples(mapping, entities, namespaces, host_ns, summary):
+        node = {'@id': str(triples[0][0])}
+        for s, p, o in triples:
+            if p == RDF.type:
+                node.setdefault('@type', []).append(jsonld_key(o, prefixes))
+            else:
+                node.setdefault(jsonld_key(p, prefixes), []).append(jsonld_value(o, prefixes))
+        yield separator + json.dumps(node)
+        separator = ',\n'
+    yield '\n]}\n'
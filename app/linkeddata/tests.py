@@ -5,7 +5,26 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
-from django.test import TestCase
+import os
+import gzip
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.contrib.sites.models import Site
+from django.contrib.auth.models import User
+
+from rdflib import Graph, Literal, URIRef
+
+from app.linkeddata.models import RDFSchema
+from app.linkeddata.registry import new_graph, clear_registry
+from app.linkeddata.cache import check_shared_cache
+from app.linkeddata.merged import compress
+from app.people.models import Person
+from app.memorials.models import Memorial, MemorialName
 
 
 class SimpleTest(TestCase):
@@ -14,3 +33,104 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class RegistryTest(TestCase):
+    def setUp(self):
+        clear_registry()
+        RDFSchema.objects.create(prefix='foaf', uri='http://xmlns.com/foaf/0.1/')
+
+    def test_graph_is_prebound(self):
+        graph, namespaces, host_ns = new_graph()
+        self.assertIn(('foaf', URIRef('http://xmlns.com/foaf/0.1/')), list(graph.namespaces()))
+        self.assertEqual(str(namespaces['rdf']['type']), 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type')
+        self.assertEqual(str(host_ns), 'http://%s' % Site.objects.get_current().domain)
+
+    def test_no_queries_once_loaded(self):
+        new_graph()
+        with self.assertNumQueries(0):
+            new_graph()
+
+    def test_invalidated_on_save(self):
+        new_graph()
+        RDFSchema.objects.create(prefix='bio', uri='http://purl.org/vocab/bio/0.1/')
+        site = Site.objects.get_current()
+        site.domain = 'example.net'
+        site.save()
+        graph, namespaces, host_ns = new_graph()
+        self.assertIn('bio', namespaces)
+        self.assertEqual(str(host_ns), 'http://example.net')
+
+    def test_invalidated_by_other_process(self):
+        new_graph()
+        # Another process saves a schema: its signal only reaches the shared cache
+        with mock.patch('app.linkeddata.registry.clear_registry'):
+            RDFSchema.objects.create(prefix='bio', uri='http://purl.org/vocab/bio/0.1/')
+        graph, namespaces, host_ns = new_graph()
+        self.assertIn('bio', namespaces)
+
+
+class DumpTest(TestCase):
+    def setUp(self):
+        clear_registry()
+        for prefix, uri in [('rdfs', 'http://www.w3.org/2000/01/rdf-schema#'),
+                            ('foaf', 'http://xmlns.com/foaf/0.1/'),
+                            ('graves', 'http://rdf.muninn-project.org/ontologies/graves#')]:
+            RDFSchema.objects.create(prefix=prefix, uri=uri)
+        self.user = User.objects.create(username='test')
+        self.people = [Person.objects.create(family_name='Smith', other_names=str(i), status='confirmed',
+                                             added_by=self.user) for i in range(3)]
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def dump(self):
+        out = StringIO()
+        call_command('dump_rdf', self.directory, dataset=['people'], shard_size=1, processes=1, stdout=out)
+        return out.getvalue()
+
+    def test_only_changed_shards_rebuilt(self):
+        self.assertIn('Wrote 3 of 3 shards', self.dump())
+        self.assertIn('Wrote 0 of 3 shards', self.dump())
+        self.people[1].other_names = 'Changed'
+        self.people[1].save()
+        self.assertIn('Wrote 1 of 3 shards', self.dump())
+        path = os.path.join(self.directory, 'people-{:04d}.nt.gz'.format(self.people[1].id))
+        with gzip.open(path, 'rt') as dump:
+            graph = Graph().parse(data=dump.read(), format='nt')
+        self.assertIn(Literal('Changed'), list(graph.objects()))
+
+    def test_related_rows_rebuild_shard(self):
+        self.dump()
+        memorial = Memorial.objects.create(name='Roll of Honour', added_by=self.user)
+        name = MemorialName.objects.create(memorial=memorial, name='J. Smith', person=self.people[2],
+                                           added_by=self.user)
+        self.assertIn('Wrote 1 of 3 shards', self.dump())
+        path = os.path.join(self.directory, 'people-{:04d}.nt.gz'.format(self.people[2].id))
+        with gzip.open(path, 'rt') as dump:
+            self.assertIn('/memorials/{}/'.format(memorial.id), dump.read())
+        name.delete()
+        self.assertIn('Wrote 1 of 3 shards', self.dump())
+
+    def test_deleted_shards_removed(self):
+        self.dump()
+        path = os.path.join(self.directory, 'people-{:04d}.nt.gz'.format(self.people[0].id))
+        self.people[0].delete()
+        self.assertIn('Wrote 0 of 2 shards', self.dump())
+        self.assertFalse(os.path.exists(path))
+
+
+class SharedCacheCheckTest(TestCase):
+    def test_warns_about_local_memory_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['linkeddata.W001'])
+
+
+class MergedIndexTest(TestCase):
+    def test_compress(self):
+        self.assertEqual(compress({1: 2, 2: 3, 4: 3, 5: 1}), {1: 3, 2: 3, 4: 3, 5: 3})
+
+    def test_compress_breaks_cycles(self):
+        index = compress({1: 2, 2: 1, 3: 1})
+        self.assertEqual(len(set(index.values())), 1)
+        self.assertNotIn(list(index.values())[0], index)
@@ -1,17 +1,25 @@
 import itertools
 import http.client as httplib
 
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, redirect
 from django.contrib.sites.models import Site
 from django.utils.cache import patch_vary_headers
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.core.paginator import EmptyPage, PageNotAnInteger
 
 from rdflib.plugin import register, Parser, Serializer
 
 from django_conneg.views import ContentNegotiatedView
 from django_conneg.decorators import renderer
 
+from app.generic.browse import CountedPaginator, letter_stats, summarise
+from app.linkeddata.streaming import chunked, write_ntriples, write_turtle, write_jsonld
+from app.linkeddata.cache import get_cached, set_cached
+from app.linkeddata.merged import canonical_id
+from app.linkeddata.cursor import MAX_PAGE_SIZE, CursorPage, CursorPaginator, InvalidCursor
+from app.linkeddata.conditional import (detail_validators, list_validators, make_validators, not_modified,
+                                        set_validators, user_etag)
+
 register('json-ld', Parser, 'rdflib_jsonld.parser', 'JsonLDParser')
 register('json-ld', Serializer, 'rdflib_jsonld.serializer', 'JsonLDSerializer')
 
@@ -31,10 +39,16 @@ class LinkedDataView(ContentNegotiatedView):
     model = None
     path = ''
     template_name = ''
+    rdf_mapping = None
+    # Fetches the entity with everything its HTML page needs
+    detail_loader = None
+    # Keep serialized RDF in the cache
+    cache_rdf = True
+    # Validators for conditional GETs, set by get()
+    etag = None
+    last_modified = None
 
     def get(self, request, id=None, format=None):
-        # Check for merged records and redirect if necessary
-        instance = self.model.objects.get(id=id)
         if format is None:
             format = 'html'
             full_url = request.get_full_path()
@@ -44,24 +58,59 @@ class LinkedDataView(ContentNegotiatedView):
                 format = 'json'
             elif '.rdf' in full_url:
                 format = 'rdf'
-        try:
-            redirect_to = instance.merged_into
-        except AttributeError:
-            pass
-        else:
-            if redirect_to:
-                return redirect(self.model.objects.get(id=redirect_to.id), permanent=True)
+            elif '.nt' in full_url:
+                format = 'nt'
+        # Check for merged records and redirect if necessary
+        canonical = canonical_id(self.model, id)
+        if canonical != int(id):
+            return redirect(self.model(id=canonical), permanent=True)
         # End redirect check
+        if format != 'html' and self.cache_rdf and self.rdf_mapping:
+            cached = get_cached(self.rdf_mapping, id, format)
+            if cached:
+                content_type, body, etag, last_modified = cached
+                response = not_modified(request, etag, last_modified)
+                if response is None:
+                    response = HttpResponse(body, content_type=content_type)
+                patch_vary_headers(response, ('Accept',))
+                return set_validators(response, etag, last_modified)
         context = {}
         if format:
-            context['content'] = self.model.objects.select_related().get(id=id)
-            return self.render_to_format(request, context, self.template_name, format)
+            return self.conditional_render(request, context, format, *detail_validators(self.model, id, format),
+                                           content=lambda: self.get_object(id, format))
         else:
             context['status_code'] = 303
             context['additional_headers'] = {'location': self.path % id}
             context['content'] = None
             return self.render(request, context, self.template_name)
 
+    def conditional_render(self, request, context, format, etag, last_modified, content):
+        """
+        Return a 304 if the request's validators still match, otherwise
+        render context['content'] = content() and add the validators.
+        """
+        if format == 'html':
+            etag = user_etag(etag, request.user)
+        self.etag, self.last_modified = etag, last_modified
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            context['content'] = content()
+            response = self.render_to_format(request, context, self.template_name, format)
+        patch_vary_headers(response, ('Accept',))
+        return set_validators(response, etag, last_modified)
+
+    def get_object(self, id, format):
+        if format == 'html' and self.detail_loader:
+            return self.detail_loader.load(id)
+        if format != 'html' and self.rdf_mapping:
+            queryset = self.rdf_mapping.prepare(self.model.objects.all())
+        else:
+            queryset = self.model.objects.select_related()
+        return queryset.get(id=id)
+
+    def make_graph(self, entity):
+        return self.rdf_mapping.graph([entity])
+
     def render(self, request, context, template_name):
         """
         Returns a HttpResponse of the right media type as specified by the
@@ -119,34 +168,44 @@ class LinkedDataView(ContentNegotiatedView):
         else:
             return HttpResponse(content='')
 
-    @renderer(format='json', mimetypes=('application/json',), name='JSON')
-    def render_json(self, request, context, template_name):
+    def render_graph(self, context, format, rdf_format, content_type, **kwargs):
         if context['content']:
-            graph = self.make_graph(context['content'])
-            return HttpResponse(graph.serialize(format='json-ld', indent=4), content_type='application/json')
+            entity = context['content']
+            body = self.make_graph(entity).serialize(format=rdf_format, **kwargs)
+            if self.cache_rdf and self.rdf_mapping:
+                set_cached(self.rdf_mapping, entity.pk, format, content_type, body, self.etag, self.last_modified)
+            return HttpResponse(body, content_type=content_type)
         else:
             return HttpResponse(content='')
 
+    @renderer(format='json', mimetypes=('application/json',), name='JSON')
+    def render_json(self, request, context, template_name):
+        return self.render_graph(context, 'json', 'json-ld', 'application/json', indent=4)
+
     @renderer(format='rdf', mimetypes=('application/rdf+xml',), name='RDF')
     def render_rdf(self, request, context, template_name):
-        if context['content']:
-            graph = self.make_graph(context['content'])
-            return HttpResponse(graph.serialize(format='pretty-xml'), content_type='application/rdf+xml')
-        else:
-            return HttpResponse(content='')
+        return self.render_graph(context, 'rdf', 'pretty-xml', 'application/rdf+xml')
 
     @renderer(format='ttl', mimetypes=('text/turtle',), name='TURTLE')
     def render_ttl(self, request, context, template_name):
-        if context['content']:
-            graph = self.make_graph(context['content'])
-            return HttpResponse(graph.serialize(format='turtle'), content_type='text/turtle')
-        else:
-            return HttpResponse(content='')
+        return self.render_graph(context, 'ttl', 'turtle', 'text/turtle')
+
+    @renderer(format='nt', mimetypes=('application/n-triples',), name='N-Triples')
+    def render_nt(self, request, context, template_name):
+        return self.render_graph(context, 'nt', 'nt', 'application/n-triples')
 
 
 class LinkedDataListView(LinkedDataView):
     browse_field = None
     queryset = None
+    cache_rdf = False
+    # Only type and label for each entity, unless False
+    rdf_summary = True
+    # Pages bigger than this are streamed rather than serialized from a graph
+    stream_threshold = 100
+    # Field names for cursor (?after=) pagination; defaults to the list's ordering
+    cursor_ordering = None
+    max_page_size = MAX_PAGE_SIZE
 
     def get(self, request, letter=None, format=None):
         context = {}
@@ -164,32 +223,37 @@ class LinkedDataListView(LinkedDataView):
                 format = 'json'
             elif '.rdf' in full_url:
                 format = 'rdf'
+            elif '.nt' in full_url:
+                format = 'nt'
         if format:
-            if self.queryset:
-                results = self.queryset
-                if letter and self.browse_field:
-                    filter = '{}__istartswith'.format(self.browse_field)
-                    results = results.filter(**{filter: letter})
+            if self.queryset is not None:
+                all_results = self.queryset.all()
             else:
-                if letter and self.browse_field:
-                    filter = '{}__istartswith'.format(self.browse_field)
-                    results = self.model.objects.select_related().filter(**{filter: letter})
+                all_results = self.model.objects.select_related().all()
+            stats = None
+            if self.browse_field and self.browse_field == getattr(all_results.model, 'browse_field', None):
+                stats = letter_stats(all_results, '{}.{}'.format(self.__module__, type(self).__name__))
+                context['letter_counts'] = stats
+            results = all_results
+            if letter and self.browse_field:
+                if stats is not None:
+                    results = results.filter(browse_letter=letter.lower())
                 else:
-                    results = self.model.objects.select_related().all()
+                    filter = '{}__istartswith'.format(self.browse_field)
+                    results = results.filter(**{filter: letter})
             if self.browse_field:
                 results = results.order_by(self.browse_field)
-            count = request.GET.get('count', '25')
-            paginator = Paginator(results, count)
-            page = request.GET.get('page', '1')
-            try:
-                content = paginator.page(page)
-            except PageNotAnInteger:
-                content = paginator.page(1)
-            except EmptyPage:
-                content = paginator.page(paginator.num_pages)
-            context['content'] = content
+            if format != 'html' and self.rdf_mapping:
+                results = self.rdf_mapping.prepare(results, summary=True)
             context['letter'] = letter
-            return self.render_to_format(request, context, self.template_name, format)
+            if stats is not None:
+                count, last_modified = summarise(stats, letter)
+                validators = make_validators(request.get_full_path(), [(last_modified, count)])
+            else:
+                count = None
+                validators = self.list_validators(request, results)
+            return self.conditional_render(request, context, format, *validators,
+                                           content=lambda: self.paginate(request, results, count=count))
         else:
             context['queries'] = request.GET.urlencode()
             context['status_code'] = 303
@@ -197,6 +261,67 @@ class LinkedDataListView(LinkedDataView):
             context['content'] = None
             return self.render(request, context, self.template_name)
 
+    def conditional_render(self, request, context, format, etag, last_modified, content):
+        # RDF/XML can't be streamed, so a big page would build the whole graph in memory
+        if format == 'rdf' and self.rdf_mapping and self.get_page_size(request) > self.stream_threshold:
+            return HttpResponseBadRequest(
+                'RDF/XML pages are limited to {} entities. Use Turtle, N-Triples or JSON-LD for bigger '
+                'pages.'.format(self.stream_threshold), content_type='text/plain')
+        response = super().conditional_render(request, context, format, etag, last_modified, content)
+        page = context.get('content')
+        if isinstance(page, CursorPage) and page.has_next():
+            queries = request.GET.copy()
+            queries['after'] = page.next_cursor
+            response['Link'] = '<{}?{}>; rel="next"'.format(request.build_absolute_uri(request.path),
+                                                            queries.urlencode())
+        return response
+
+    def get_cursor_ordering(self, results):
+        """The ordering for cursor pagination: the list's own ordering, made total by the primary key."""
+        if self.cursor_ordering:
+            return list(self.cursor_ordering)
+        return list(results.query.order_by or results.model._meta.ordering)
+
+    def get_page_size(self, request):
+        try:
+            return min(max(int(request.GET.get('count', '25')), 1), self.max_page_size)
+        except ValueError:
+            return 25
+
+    def paginate(self, request, results, count=None):
+        per_page = self.get_page_size(request)
+        if 'after' in request.GET:
+            paginator = CursorPaginator(results, self.get_cursor_ordering(results), per_page,
+                                        max_page_size=self.max_page_size)
+            return paginator.page(request.GET['after'])
+        paginator = CountedPaginator(results, per_page, count=count)
+        page = request.GET.get('page', '1')
+        try:
+            content = paginator.page(page)
+        except PageNotAnInteger:
+            content = paginator.page(1)
+        except EmptyPage:
+            content = paginator.page(paginator.num_pages)
+        return content
+
+    def list_validators(self, request, results):
+        return list_validators(results, request.get_full_path())
+
+    def make_graph(self, entities):
+        return self.rdf_mapping.graph(entities, summary=self.rdf_summary)
+
+    def use_stream(self, request, context):
+        content = context['content']
+        if content is None or self.rdf_mapping is None:
+            return False
+        return content.paginator.per_page > self.stream_threshold or 'stream' in request.GET
+
+    def stream(self, writer, content, content_type):
+        """Serialize a page of entities incrementally, reading them from the database in chunks."""
+        entities = chunked(content.object_list)
+        return StreamingHttpResponse(writer(self.rdf_mapping, entities, summary=self.rdf_summary),
+                                     content_type=content_type)
+
     @renderer(format='html', mimetypes=('text/html', 'application/xhtml+xml'), name='HTML', priority=1)
     def render_html(self, request, context, template_name):
         if context['content'] is not None:
@@ -207,3 +332,21 @@ class LinkedDataListView(LinkedDataView):
             return render(request, template_name, context)
         else:
             return HttpResponse(content='')
+
+    @renderer(format='json', mimetypes=('application/json',), name='JSON')
+    def render_json(self, request, context, template_name):
+        if self.use_stream(request, context):
+            return self.stream(write_jsonld, context['content'], 'application/json')
+        return super().render_json(request, context, template_name)
+
+    @renderer(format='ttl', mimetypes=('text/turtle',), name='TURTLE')
+    def render_ttl(self, request, context, template_name):
+        if self.use_stream(request, context):
+            return self.stream(write_turtle, context['content'], 'text/turtle')
+        return super().render_ttl(request, context, template_name)
+
+    @renderer(format='nt', mimetypes=('application/n-triples',), name='N-Triples')
+    def render_nt(self, request, context, template_name):
+        if context['content'] is not None and self.rdf_mapping:
+            return self.stream(write_ntriples, context['content'], 'application/n-triples')
+        return super().render_nt(request, context, template_name)
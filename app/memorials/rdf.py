@@ -0,0 +1,24 @@
+from app.memorials.models import *
+from app.linkeddata.mapping import RDFMapping, Field, Link, Related, Associated
+
+MEMORIAL = RDFMapping(
+    Memorial, 'memorial-view',
+    properties=[
+        Field('graves:monument_title', 'name'),
+        Link('geo:location', 'location', 'place-view'),
+        Related('graves:monument_name', 'memorialname_set', value='name'),
+        Related('graves:commemorates', 'memorialname_set', url_name='person-view', target='person'),
+        Associated('memorialassociatedsource_set', target='source', url_name='source-view'),
+    ]
+)
+
+# A name on a memorial is described as part of the memorial
+MEMORIAL_NAME = RDFMapping(
+    MemorialName, 'memorial-view',
+    subject='memorial',
+    label=False,
+    properties=[
+        Field('graves:monument_name', 'name'),
+        Link('graves:commemorates', 'person', 'person-view'),
+    ]
+)
@@ -0,0 +1,223 @@
+"""
+Finding people who have been entered more than once.
+
+Comparing every person with every other one doesn't scale, so candidates
+are found by blocking: people are grouped by cheap keys (the Soundex code of
+a family name with the first initial, a service number, an uncommon
+trigram of a family name) and only people sharing a block are compared.
+Alternative names count as well as the main name. A popular surname makes a
+Soundex block too big to compare in full, so its people are sorted by name
+and each is compared with the ones next to it instead.
+
+Each candidate pair is then scored on how alike their names are (trigram
+overlap of the full names), whether their service numbers agree, how far
+apart their birth years are, and whether they served in the same units.
+All the data is read up front in a fixed number of queries and each
+person's features are worked out once, so a pair costs a few set
+operations.
+"""
+import re
+from collections import defaultdict, namedtuple
+
+from unidecode import unidecode
+
+from app.people.models import Person, AlternativePersonName, ServiceNumber, Birth, PersonAssociatedOrganisation
+
+SOUNDEX_CODES = dict(
+    [(letter, '1') for letter in 'bfpv'] + [(letter, '2') for letter in 'cgjkqsxz'] +
+    [(letter, '3') for letter in 'dt'] + [('l', '4')] + [(letter, '5') for letter in 'mn'] + [('r', '6')]
+)
+
+Candidate = namedtuple('Candidate', ['score', 'person', 'other', 'reasons'])
+
+
+def normalise(name):
+    """Lower-case ascii letters and single spaces only."""
+    return ' '.join(re.findall(r'[a-z]+', unidecode(name or '').lower().replace("'", '')))
+
+
+def soundex(name):
+    letters = normalise(name).replace(' ', '')
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0])
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter)
+        if digit and digit != previous:
+            code += digit
+        # h and w don't separate letters with the same code, vowels do
+        if letter not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def trigrams(name):
+    name = normalise(name)
+    if not name:
+        return set()
+    padded = '  {} '.format(name)
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class PersonRecord(object):
+    """The features of one person used for blocking and scoring."""
+
+    def __init__(self, person_id):
+        self.id = person_id
+        self.label = ''
+        self.names = []
+        self.service_numbers = set()
+        self.birth_years = set()
+        self.units = set()
+
+    def add_name(self, family_name, other_names):
+        family_name = normalise(family_name)
+        other_names = normalise(other_names)
+        if family_name or other_names:
+            self.names.append((family_name, other_names, trigrams('{} {}'.format(other_names, family_name))))
+
+    def blocking_keys(self):
+        keys = set()
+        for family_name, other_names, grams in self.names:
+            if family_name:
+                keys.add(('soundex', soundex(family_name), other_names[:1]))
+                keys.update(('trigram', gram) for gram in trigrams(family_name))
+        keys.update(('service', number) for number in self.service_numbers)
+        return keys
+
+
+def load_records(queryset=None):
+    """Return {id: PersonRecord} for the people in queryset, reading each kind of data in one query."""
+    if queryset is None:
+        queryset = Person.objects.filter(merged_into__isnull=True)
+    records = {}
+    for person_id, family_name, other_names, display_name in queryset.values_list(
+            'id', 'family_name', 'other_names', 'display_name'):
+        record = records[person_id] = PersonRecord(person_id)
+        record.label = '{} {}'.format(other_names, family_name).strip() or display_name or ''
+        record.add_name(family_name, other_names)
+    ids = queryset.values('id')
+    for person_id, family_name, other_names, display_name in AlternativePersonName.objects.filter(
+            person__in=ids).values_list('person_id', 'family_name', 'other_names', 'display_name'):
+        if family_name or other_names:
+            records[person_id].add_name(family_name, other_names)
+        elif display_name:
+            # Take the last word of a display-only name as the family name
+            words = display_name.rsplit(' ', 1)
+            records[person_id].add_name(words[-1], words[0] if len(words) > 1 else '')
+    for person_id, number in ServiceNumber.objects.filter(person__in=ids).values_list('person_id', 'service_number'):
+        number = re.sub(r'\W', '', number).upper()
+        if number:
+            records[person_id].service_numbers.add(number)
+    for person_id, earliest, latest in Birth.objects.filter(person__in=ids).values_list(
+            'person_id', 'start_earliest_date', 'start_latest_date'):
+        for date in (earliest, latest):
+            if date:
+                records[person_id].birth_years.add(date.year)
+    for person_id, unit in PersonAssociatedOrganisation.objects.filter(person__in=ids).values_list(
+            'person_id', 'organisation_id'):
+        records[person_id].units.add(unit)
+    return records
+
+
+def sorted_neighbours(ids, records, key, window):
+    """
+    Return pairs of the people in a Soundex block who are within window of
+    each other when sorted by the names that put them in the block.
+    """
+    def sort_key(person_id):
+        names = [(other_names, family_name) for family_name, other_names, grams in records[person_id].names
+                 if family_name and soundex(family_name) == key[1] and other_names[:1] == key[2]]
+        return min(names or [('', '')]), person_id
+
+    ids = sorted(ids, key=sort_key)
+    pairs = set()
+    for i, first in enumerate(ids):
+        for second in ids[i + 1:i + 1 + window]:
+            pairs.add((min(first, second), max(first, second)))
+    return pairs
+
+
+def candidate_pairs(records, max_block=50, min_trigrams=2, skipped=None):
+    """
+    Return the set of (id, id) pairs that share a Soundex or service number
+    block, or at least min_trigrams family name trigrams. In a Soundex block
+    bigger than max_block (a popular surname) each person is only compared
+    with the max_block people nearest them by name. Trigrams shared by more
+    than max_block people are too common to tell anyone apart and are
+    ignored. The keys of those blocks and their sizes are added to skipped.
+    """
+    blocks = defaultdict(set)
+    for record in records.values():
+        for key in record.blocking_keys():
+            blocks[key].add(record.id)
+    pairs = set()
+    shared_trigrams = defaultdict(int)
+    for key, ids in blocks.items():
+        if len(ids) < 2:
+            continue
+        if len(ids) > max_block and key[0] != 'service':
+            if skipped is not None:
+                skipped.append((key, len(ids)))
+            if key[0] == 'soundex':
+                pairs.update(sorted_neighbours(ids, records, key, max_block))
+            continue
+        ids = sorted(ids)
+        for i, first in enumerate(ids):
+            for second in ids[i + 1:]:
+                if key[0] == 'trigram':
+                    shared_trigrams[(first, second)] += 1
+                else:
+                    pairs.add((first, second))
+    pairs.update(pair for pair, count in shared_trigrams.items() if count >= min_trigrams)
+    return pairs
+
+
+def score(first, second):
+    """Return a score between 0 and 1 for how likely first and second are the same person, with the reasons."""
+    reasons = []
+    name_score = max([jaccard(grams, other_grams) for *names, grams in first.names
+                      for *other_names, other_grams in second.names] or [0.0])
+    total = 0.6 * name_score
+    reasons.append('names {:.0%} alike'.format(name_score))
+    if first.service_numbers and second.service_numbers:
+        if first.service_numbers & second.service_numbers:
+            total += 0.4
+            reasons.append('same service number')
+        else:
+            total -= 0.4
+            reasons.append('different service numbers')
+    if first.birth_years and second.birth_years:
+        gap = min(abs(year - other) for year in first.birth_years for other in second.birth_years)
+        if gap <= 1:
+            total += 0.2
+            reasons.append('born within a year of each other')
+        elif gap > 3:
+            total -= 0.3
+            reasons.append('born {} years apart'.format(gap))
+    if first.units & second.units:
+        total += 0.15
+        reasons.append('served in the same unit')
+    return max(0.0, min(1.0, total)), reasons
+
+
+def find_duplicates(queryset=None, min_score=0.5, max_block=50, skipped=None):
+    """
+    Return Candidates, pairs of PersonRecords scoring at least min_score, best
+    first. The blocks too big to compare in full are added to skipped.
+    """
+    records = load_records(queryset)
+    candidates = []
+    for first_id, second_id in candidate_pairs(records, max_block, skipped=skipped):
+        value, reasons = score(records[first_id], records[second_id])
+        if value >= min_score:
+            candidates.append(Candidate(value, records[first_id], records[second_id], reasons))
+    candidates.sort(key=lambda candidate: (-candidate.score, candidate.person.id, candidate.other.id))
+    return candidates
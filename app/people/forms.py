@@ -10,6 +10,9 @@ from app.people.models import *
 from app.places.models import *
 from app.sources.models import *
 from app.generic.forms import AddEventForm, DateSelectMixin, ShortDateForm, NewSelectDateWidget
+from app.generic.autocomplete import AutocompleteIndex, AutocompleteMixin
+from app.places.forms import PLACE_NAMES
+from app.sources.forms import PERSON_NAMES, SOURCE_TITLES
 
 
 def get_range_upper_year():
@@ -20,9 +23,13 @@ def get_range_upper_year():
 YEARS = [year for year in range(1850, get_range_upper_year())]
 
 
-class PeopleMultiChoice(ModelSelect2MultipleWidget):
+ORGANISATION_NAMES = AutocompleteIndex(Organisation, ['display_name', 'name'])
+EVENT_LOCATION_LABELS = AutocompleteIndex(EventLocation, ['label'], words=True)
+
+
+class PeopleMultiChoice(AutocompleteMixin, ModelSelect2MultipleWidget):
     queryset = Person.objects
-    search_fields = ['family_name__istartswith', ]
+    autocomplete = PERSON_NAMES
 
     def clean(self):
         cleaned_data = super(AddPersonForm, self).clean()
@@ -45,33 +52,33 @@ class PeopleMultiChoice(ModelSelect2MultipleWidget):
         return cleaned_data
 
 
-class PersonChoice(ModelSelect2Widget):
+class PersonChoice(AutocompleteMixin, ModelSelect2Widget):
     queryset = Person.objects
-    search_fields = ['family_name__istartswith', ]
+    autocomplete = PERSON_NAMES
 
 
-class PlaceChoice(ModelSelect2Widget):
+class PlaceChoice(AutocompleteMixin, ModelSelect2Widget):
     queryset = Place.objects
-    search_fields = ['display_name__istartswith', 'place_name__istartswith']
+    autocomplete = PLACE_NAMES
 
 
-class OrganisationChoice(ModelSelect2Widget):
+class OrganisationChoice(AutocompleteMixin, ModelSelect2Widget):
     queryset = Organisation.objects
-    search_fields = ['display_name__istartswith', 'name__istartswith']
+    autocomplete = ORGANISATION_NAMES
 
 
 class LifeEventChoice(ModelSelect2Widget):
     queryset = LifeEvent.objects
 
 
-class SourcesMultiChoice(ModelSelect2MultipleWidget):
+class SourcesMultiChoice(AutocompleteMixin, ModelSelect2MultipleWidget):
     queryset = Source.objects
-    search_fields = ['title__icontains', ]
+    autocomplete = SOURCE_TITLES
 
 
-class EventLocationsMultiChoice(ModelSelect2MultipleWidget):
+class EventLocationsMultiChoice(AutocompleteMixin, ModelSelect2MultipleWidget):
     queryset = EventLocation.objects
-    search_fields = ['label__icontains', ]
+    autocomplete = EVENT_LOCATION_LABELS
 
 
 class AddPersonForm(DateSelectMixin, ModelForm):
@@ -0,0 +1,40 @@
+"""
+Loaders fetch an entity together with everything its HTML page shows,
+using one query per relation no matter how many related rows there are.
+"""
+from django.db.models import Prefetch
+
+from app.people.models import *
+from app.places.models import Address
+from app.memorials.models import MemorialName
+
+
+class PersonDetailLoader(object):
+    """Everything people/person.html needs for one person."""
+
+    def prefetches(self):
+        relationships = PersonAssociatedPerson.objects.select_related('person', 'associated_person', 'association')
+        return [
+            'alternativepersonname_set',
+            'servicenumber_set',
+            'rank_set',
+            Prefetch('birth_set', queryset=Birth.objects.select_related('location')),
+            Prefetch('death_set', queryset=Death.objects.select_related('location', 'burial_place')),
+            'lifeevent_set',
+            Prefetch('addresses', queryset=Address.objects.select_related('mosman_street', 'place')),
+            Prefetch('personassociatedperson_set', queryset=relationships),
+            Prefetch('related_person', queryset=relationships),
+            Prefetch('personassociatedorganisation_set',
+                     queryset=PersonAssociatedOrganisation.objects.select_related('organisation', 'association')),
+            Prefetch('personassociatedsource_set',
+                     queryset=PersonAssociatedSource.objects.select_related(
+                         'association', 'source__source_type').prefetch_related('source__sourceimage_set')),
+            'stories',
+            Prefetch('memorialname_set', queryset=MemorialName.objects.select_related('memorial', 'memorial_part')),
+        ]
+
+    def queryset(self):
+        return Person.objects.prefetch_related(*self.prefetches())
+
+    def load(self, pk):
+        return self.queryset().get(pk=pk)
@@ -0,0 +1,39 @@
+import csv
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from app.people.duplicates import find_duplicates
+
+
+class Command(BaseCommand):
+    help = 'Write a CSV of people who are probably duplicates of each other, most likely first.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write to (default: standard output)')
+        parser.add_argument('--min-score', type=float, default=0.5)
+        parser.add_argument('--max-block', type=int, default=50,
+                            help='Only compare people with their nearest neighbours by name in blocks '
+                                 'bigger than this, and ignore family name trigrams shared by more people')
+
+    def handle(self, *args, **options):
+        skipped = []
+        candidates = find_duplicates(min_score=options['min_score'], max_block=options['max_block'],
+                                     skipped=skipped)
+        for kind in ('soundex', 'trigram'):
+            blocks = [(key, size) for key, size in skipped if key[0] == kind]
+            if blocks:
+                self.stderr.write('{} {} blocks were too big to compare in full (largest: {} with {} people)'.format(
+                    len(blocks), kind, ' '.join(max(blocks, key=lambda block: block[1])[0][1:]),
+                    max(size for key, size in blocks)))
+        output = open(options['output'], 'w', newline='') if options['output'] else self.stdout
+        try:
+            writer = csv.writer(output)
+            writer.writerow(['score', 'person_id', 'person', 'other_id', 'other', 'reasons', 'merge'])
+            for candidate in candidates:
+                writer.writerow(['{:.2f}'.format(candidate.score), candidate.person.id, candidate.person.label,
+                                 candidate.other.id, candidate.other.label, '; '.join(candidate.reasons),
+                                 reverse('person-merge', args=[candidate.other.id])])
+        finally:
+            if options['output']:
+                output.close()
@@ -0,0 +1,49 @@
+# Generated by Django 2.2.23 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+from app.generic.models import first_letter
+
+BROWSE_FIELDS = [
+    ('Person', 'family_name'),
+    ('Organisation', 'name'),
+]
+
+
+def set_browse_letters(apps, schema_editor):
+    for model_name, browse_field in BROWSE_FIELDS:
+        model = apps.get_model('people', model_name)
+        rows = []
+        for row in model.objects.only('id', browse_field).iterator():
+            row.browse_letter = first_letter(getattr(row, browse_field))
+            rows.append(row)
+        model.objects.bulk_update(rows, ['browse_letter'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ('people', '0006_auto_20210624_2341'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organisation',
+            name='browse_letter',
+            field=models.CharField(blank=True, default='', editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='browse_letter',
+            field=models.CharField(blank=True, default='', editable=False, max_length=1),
+        ),
+        migrations.AddIndex(
+            model_name='organisation',
+            index=models.Index(fields=['browse_letter', 'name'], name='people_orga_browse__c1a8af_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['browse_letter', 'family_name'], name='people_pers_browse__2e685f_idx'),
+        ),
+        migrations.RunPython(set_browse_letters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.23 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0007_browse_letter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['family_name', 'other_names', 'id'], name='people_pers_family__80c54e_idx'),
+        ),
+    ]
@@ -5,10 +5,13 @@ from django.urls import reverse
 from django.contrib.auth.models import User
 
 from app.linkeddata.models import RDFRelationship, RDFType
-from app.generic.models import StandardMetadata, Event, Period, Person as GenericPerson, Group, ShortDateMixin
+from app.generic.utils import related_rows, memoize
+from app.generic.models import (StandardMetadata, Event, Period, Person as GenericPerson, Group, ShortDateMixin,
+                                BrowseLetterMixin)
 
 
-class Person(GenericPerson):
+class Person(GenericPerson, BrowseLetterMixin):
+    browse_field = 'family_name'
     family_name = models.CharField(max_length=100)
     other_names = models.CharField(max_length=100, blank=True)
     name_suffix = models.CharField(max_length=15, blank=True, default='')
@@ -56,25 +59,28 @@ class Person(GenericPerson):
     def alpha_name(self):
         return '%s, %s' % (self.family_name, self.other_names)
 
+    def source_relations(self, label):
+        relations = related_rows(self, 'personassociatedsource_set', 'association', 'source__source_type')
+        return [relation for relation in relations if relation.association.label == label]
+
+    @memoize
     def main_sources(self):
-        relations = (self.personassociatedsource_set
-                     .filter(association__label='primary topic of'))
-        return [relation.source for relation in relations]
+        return [relation.source for relation in self.source_relations('primary topic of')]
 
+    @memoize
     def other_sources(self):
-        relations = (self.personassociatedsource_set
-                     .filter(association__label='topic of'))
-        return [relation.source for relation in relations]
+        return [relation.source for relation in self.source_relations('topic of')]
 
+    @memoize
     def photos(self):
-        photos = (self.personassociatedsource_set
-                  .filter(association__label='primary topic of')
-                  .filter(source__source_type__label='photograph'))
-        return [photo.source for photo in photos]
+        return [source for source in self.main_sources()
+                if source.source_type and source.source_type.label == 'photograph']
 
+    @memoize
     def relationships(self):
-        forward_relations = self.personassociatedperson_set.all()
-        reverse_relations = self.related_person.all()
+        select = ('person', 'associated_person', 'association')
+        forward_relations = related_rows(self, 'personassociatedperson_set', *select)
+        reverse_relations = related_rows(self, 'related_person', *select)
         relations = list(chain(forward_relations, reverse_relations))
         return relations
 
@@ -112,6 +118,10 @@ class Person(GenericPerson):
 
     class Meta:
         ordering = ['family_name', 'other_names']
+        indexes = [
+            models.Index(fields=['browse_letter', 'family_name']),
+            models.Index(fields=['family_name', 'other_names', 'id']),
+        ]
         permissions = (('approve_person', 'Approve person'), ('merge_person', 'Merge person'))
 
     def get_absolute_url(self):
@@ -393,7 +403,8 @@ class Family(models.Model):
     family_name = models.CharField(max_length=100)
 
 
-class Organisation(Group):
+class Organisation(Group, BrowseLetterMixin):
+    browse_field = 'name'
     name = models.CharField(max_length=250)
     short_name = models.CharField(max_length=100, null=True, blank=True)
     public = models.BooleanField(default=False)  # Display on website
@@ -420,6 +431,7 @@ class Organisation(Group):
 
     class Meta:
         ordering = ['name']
+        indexes = [models.Index(fields=['browse_letter', 'name'])]
         permissions = [('merge_organisation', 'Merge organisation')]
 
 
@@ -0,0 +1,132 @@
+from app.people.models import *
+from app.linkeddata.mapping import RDFMapping, Field, Link, Related, Associated
+
+PERSON = RDFMapping(
+    Person, 'person-view',
+    rdf_type='foaf:Person',
+    properties=[
+        Field('foaf:name', str),
+        Field('foaf:familyName', 'family_name'),
+        Field('foaf:givenName', 'other_names'),
+        Related('graves:commemorated_by', 'memorialname_set', url_name='memorial-view', target='memorial'),
+        Related('foaf:page', 'stories', url_name='story-view'),
+        Associated('personassociatedperson_set', target='associated_person', url_name='person-view'),
+        Associated('personassociatedorganisation_set', target='organisation', url_name='organisation-view'),
+        Associated('personassociatedsource_set', target='source', url_name='source-view'),
+    ]
+)
+
+ORGANISATION = RDFMapping(
+    Organisation, 'organisation-view',
+    rdf_type='foaf:Organization',
+    properties=[
+        Field('foaf:name', 'name'),
+        Related('foaf:member', 'personassociatedorganisation_set', url_name='person-view', target='person'),
+        Related('foaf:page', 'stories', url_name='story-view'),
+        Associated('organisationassociatedsource_set', target='source', url_name='source-view'),
+    ]
+)
+
+ALT_NAME = RDFMapping(
+    AlternativePersonName, 'altname-view',
+    select_related=['person'],
+    properties=[
+        Field('foaf:name', AlternativePersonName.summary),
+        Link('dc:subject', 'person', 'person-view'),
+    ]
+)
+
+BIRTH = RDFMapping(
+    Birth, 'birth-view',
+    rdf_type='bio:Birth',
+    select_related=['person', 'location'],
+    properties=[
+        Link('bio:principal', 'person', 'person-view'),
+        Link('bio:place', 'location', 'place-view'),
+    ]
+)
+
+DEATH = RDFMapping(
+    Death, 'death-view',
+    rdf_type='bio:Death',
+    select_related=['person', 'location'],
+    properties=[
+        Link('bio:principal', 'person', 'person-view'),
+        Link('bio:place', 'location', 'place-view'),
+    ]
+)
+
+LIFE_EVENT = RDFMapping(
+    LifeEvent, 'lifeevent-view',
+    rdf_type='bio:IndividualEvent',
+    select_related=['person'],
+    properties=[
+        Link('bio:principal', 'person', 'person-view'),
+        Related('bio:place', 'eventlocation_set', url_name='place-view', target='location'),
+    ]
+)
+
+RANK = RDFMapping(
+    Rank, 'rank-view',
+    select_related=['person'],
+    properties=[
+        Link('dc:subject', 'person', 'person-view'),
+    ]
+)
+
+# Service numbers are described as identifiers of the person
+SERVICE_NUMBER = RDFMapping(
+    ServiceNumber, 'person-view',
+    subject='person',
+    rdf_type='foaf:Person',
+    label=False,
+    properties=[
+        Field('dc:identifier', 'service_number'),
+    ]
+)
+
+PERSON_ADDRESS = RDFMapping(
+    PersonAddress, 'personaddress-view',
+    select_related=['person', 'address__mosman_street', 'address__place'],
+    properties=[
+        Link('dc:subject', 'person', 'person-view'),
+        Link('dc:spatial', 'address', 'address-view'),
+    ]
+)
+
+PERSON_RELATIONSHIP = RDFMapping(
+    PersonAssociatedPerson, 'person-relationship-view',
+    select_related=['person', 'associated_person', 'association'],
+    properties=[
+        Link('dc:subject', 'person', 'person-view'),
+        Link('dc:subject', 'associated_person', 'person-view'),
+    ]
+)
+
+PERSON_MEMBERSHIP = RDFMapping(
+    PersonAssociatedOrganisation, 'person-membership-view',
+    select_related=['person', 'organisation', 'association'],
+    properties=[
+        Link('dc:subject', 'person', 'person-view'),
+        Link('dc:subject', 'organisation', 'organisation-view'),
+    ]
+)
+
+PEOPLE_STORY = RDFMapping(
+    PeopleStory, 'view_story',
+    rdf_type='bibo:Note',
+    properties=[
+        Field('dc:title', 'title'),
+        Field('rdf:value', 'text'),
+        Field('dc:creator', 'added_by__username'),
+    ]
+)
+
+PEOPLE_IMAGE = RDFMapping(
+    PeopleImage, 'view_image',
+    rdf_type='foaf:Image',
+    properties=[
+        Field('dc:title', 'title'),
+        Related('foaf:depicts', 'person_set', url_name='person-view'),
+    ]
+)
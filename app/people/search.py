@@ -0,0 +1,28 @@
+from app.people.models import Person, AlternativePersonName, ServiceNumber, Rank
+from app.search.index import SearchIndex, register
+
+
+class PersonIndex(SearchIndex):
+    model = Person
+    dependencies = {
+        AlternativePersonName: 'person_id',
+        ServiceNumber: 'person_id',
+        Rank: 'person_id',
+    }
+
+    def queryset(self):
+        return Person.objects.filter(status='confirmed', merged_into__isnull=True).prefetch_related(
+            'alternativepersonname_set', 'servicenumber_set', 'rank_set')
+
+    def names(self, person):
+        names = [person.other_names, person.family_name, person.display_name]
+        for name in person.alternativepersonname_set.all():
+            names.extend([name.other_names, name.family_name, name.display_name, name.nickname])
+        names.extend(number.service_number for number in person.servicenumber_set.all())
+        return names
+
+    def text(self, person):
+        return [rank.rank for rank in person.rank_set.all()]
+
+
+register(PersonIndex())
@@ -5,7 +5,31 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
+import datetime
+from unittest import mock
+
+from django.db import connection
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.sites.models import Site
+from django.contrib.auth.models import User
+
+from rdflib import Graph, URIRef
+from rdflib.compare import isomorphic
+
+from app.people.models import *
+from app.people.rdf import PERSON
+from app.people.views import PersonListView
+from app.people.duplicates import soundex, find_duplicates
+from app.places.models import Place, Address
+from app.sources.models import Source, SourceType, Story
+from app.memorials.models import Memorial, MemorialName, MemorialAssociatedPerson, MemorialAssociation
+from app.generic.merge import merge_records
+from app.linkeddata.cursor import encode_cursor
+from app.linkeddata.models import RDFSchema
+from app.linkeddata.registry import clear_registry
+from app.linkeddata.streaming import chunked, write_ntriples, write_turtle, write_jsonld
 
 
 class SimpleTest(TestCase):
@@ -14,3 +38,381 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class PersonTestCase(TestCase):
+    def setUp(self):
+        clear_registry()
+        for prefix, uri in [('rdfs', 'http://www.w3.org/2000/01/rdf-schema#'),
+                            ('foaf', 'http://xmlns.com/foaf/0.1/'),
+                            ('graves', 'http://rdf.muninn-project.org/ontologies/graves#')]:
+            RDFSchema.objects.create(prefix=prefix, uri=uri)
+        self.user = User.objects.create(username='test')
+        self.person = Person.objects.create(family_name='Smith', other_names='John', status='confirmed',
+                                            added_by=self.user)
+
+    def add_memorial(self):
+        memorial = Memorial.objects.create(name='Roll of Honour', added_by=self.user)
+        MemorialName.objects.create(memorial=memorial, name='J. Smith', person=self.person, added_by=self.user)
+        return memorial
+
+
+class PersonMappingTest(PersonTestCase):
+    def make_graph(self):
+        person = PERSON.prepare(Person.objects.all()).get(id=self.person.id)
+        return PERSON.graph([person])
+
+    def test_types_and_links(self):
+        memorial = self.add_memorial()
+        graph = self.make_graph()
+        host = 'http://{}'.format(Site.objects.get_current().domain)
+        subject = URIRef('{}/people/{}/'.format(host, self.person.id))
+        self.assertIn((subject, URIRef('http://www.w3.org/1999/02/22-rdf-syntax-ns#type'),
+                       URIRef('http://xmlns.com/foaf/0.1/Person')), graph)
+        self.assertIn((subject, URIRef('http://rdf.muninn-project.org/ontologies/graves#commemorated_by'),
+                       URIRef('{}/memorials/{}/'.format(host, memorial.id))), graph)
+
+    def test_fixed_query_count(self):
+        self.add_memorial()
+        self.make_graph()
+        with CaptureQueriesContext(connection) as queries:
+            self.make_graph()
+        for i in range(5):
+            self.add_memorial()
+        with self.assertNumQueries(len(queries)):
+            self.make_graph()
+
+    def test_streamed_matches_graph(self):
+        for i in range(3):
+            Person.objects.create(family_name='Jones', other_names=str(i), status='confirmed', added_by=self.user)
+        people = PERSON.prepare(Person.objects.order_by('id'), summary=True)
+        expected = PERSON.graph(people, summary=True)
+        for writer, format in [(write_ntriples, 'nt'), (write_turtle, 'turtle'), (write_jsonld, 'json-ld')]:
+            content = ''.join(writer(PERSON, chunked(people, chunk_size=2)))
+            self.assertTrue(isomorphic(Graph().parse(data=content, format=format), expected))
+
+
+class CachedRDFTest(PersonTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = '/people/{}.ttl/'.format(self.person.id)
+
+    def test_repeat_hits_use_cache(self):
+        body = self.client.get(self.url).content
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.content, body)
+        self.assertEqual(response['Content-Type'], 'text/turtle')
+
+    def test_invalidated_by_related_rows(self):
+        self.client.get(self.url)
+        memorial = self.add_memorial()
+        self.assertIn('/memorials/{}/'.format(memorial.id).encode(), self.client.get(self.url).content)
+        self.person.memorialname_set.all().delete()
+        self.assertNotIn('/memorials/{}/'.format(memorial.id).encode(), self.client.get(self.url).content)
+
+
+class ConditionalGetTest(PersonTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def assertNotModified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        return response['ETag']
+
+    def test_detail(self):
+        for format in ['html', 'ttl', 'json', 'rdf']:
+            url = '/people/{}.{}/'.format(self.person.id, format)
+            etag = self.assertNotModified(url)
+            self.add_memorial()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_html_depends_on_user(self):
+        url = '/people/{}.html/'.format(self.person.id)
+        etag = self.assertNotModified(url)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertNotModified(url)
+
+    def test_list(self):
+        url = '/people/results.ttl/?page=1'
+        etag = self.assertNotModified(url)
+        self.person.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class MergedRedirectTest(PersonTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.first = Person.objects.create(family_name='Smith', status='confirmed', added_by=self.user)
+        self.second = Person.objects.create(family_name='Smith', status='confirmed', added_by=self.user)
+
+    def merge(self, record, into):
+        record.merged_into = into
+        record.save()
+
+    def test_chain_redirects_to_final_record(self):
+        self.merge(self.first, self.second)
+        self.client.get('/people/{}/'.format(self.first.id))
+        self.merge(self.second, self.person)
+        with self.assertNumQueries(1):
+            response = self.client.get('/people/{}/'.format(self.first.id))
+        self.assertRedirects(response, '/people/{}/'.format(self.person.id), status_code=301,
+                             fetch_redirect_response=False)
+        with self.assertNumQueries(0):
+            self.client.get('/people/{}/'.format(self.second.id))
+
+
+class PersonDetailQueryTest(PersonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.place = Place.objects.create(place_name='Mosman', added_by=self.user)
+        self.relation = PersonAssociation.objects.create(label='brother of', inverse_label='brother of')
+        self.membership = PersonOrgAssociation.objects.create(label='member of')
+        self.primary = SourceAssociation.objects.create(label='primary topic of')
+        self.photograph = SourceType.objects.create(label='photograph')
+        self.organisation = Organisation.objects.create(name='1st Battalion', added_by=self.user)
+
+    def add_relations(self):
+        AlternativePersonName.objects.create(person=self.person, display_name='Jack Smith', added_by=self.user)
+        ServiceNumber.objects.create(person=self.person, service_number='1234', added_by=self.user)
+        Rank.objects.create(person=self.person, rank='Private', added_by=self.user)
+        Birth.objects.create(person=self.person, location=self.place, added_by=self.user)
+        Death.objects.create(person=self.person, location=self.place, burial_place=self.place, added_by=self.user)
+        LifeEvent.objects.create(person=self.person, label='Enlisted', added_by=self.user)
+        address = Address.objects.create(street_name='Military Road', place=self.place, added_by=self.user)
+        PersonAddress.objects.create(person=self.person, address=address, added_by=self.user)
+        other = Person.objects.create(family_name='Smith', other_names='Fred', status='confirmed', added_by=self.user)
+        PersonAssociatedPerson.objects.create(person=self.person, associated_person=other,
+                                              association=self.relation, added_by=self.user)
+        PersonAssociatedPerson.objects.create(person=other, associated_person=self.person,
+                                              association=self.relation, added_by=self.user)
+        PersonAssociatedOrganisation.objects.create(person=self.person, organisation=self.organisation,
+                                                    association=self.membership, added_by=self.user)
+        for source_type in [None, self.photograph]:
+            source = Source.objects.create(title='Service record', source_type=source_type, added_by=self.user)
+            PersonAssociatedSource.objects.create(person=self.person, source=source, association=self.primary,
+                                                  added_by=self.user)
+        self.person.stories.add(Story.objects.create(title='A story', text='Text', added_by=self.user))
+        self.add_memorial()
+
+    def test_fixed_query_count(self):
+        url = '/people/{}/'.format(self.person.id)
+        self.add_relations()
+        cache.clear()
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        for i in range(3):
+            self.add_relations()
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['content'].relationships()), 8)
+
+
+class BrowseLetterTest(PersonTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for family_name in ['Smyth', 'Éclair', 'Evans', "'t Hooft"]:
+            Person.objects.create(family_name=family_name, status='confirmed', added_by=self.user)
+
+    def test_browse_letter_set_on_save(self):
+        letters = dict(Person.objects.values_list('family_name', 'browse_letter'))
+        self.assertEqual(letters['Smith'], 's')
+        self.assertEqual(letters['Éclair'], 'e')
+        self.assertEqual(letters["'t Hooft"], '')
+        self.person.family_name = 'Jones'
+        self.person.save(update_fields=['family_name'])
+        self.assertEqual(Person.objects.get(id=self.person.id).browse_letter, 'j')
+
+    def test_counts_cached(self):
+        response = self.client.get('/people/e/')
+        self.assertEqual(response.context['content'].paginator.count, 2)
+        self.assertIn(('s', 2), response.context['letters'])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/people/s/')
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+        Person.objects.create(family_name='Edwards', status='confirmed', added_by=self.user)
+        self.assertEqual(self.client.get('/people/e/').context['content'].paginator.count, 3)
+
+
+class CursorPaginationTest(PersonTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for i in range(7):
+            Person.objects.create(family_name='Smith', other_names='P{}'.format(i % 3), status='confirmed',
+                                  added_by=self.user)
+            Person.objects.create(family_name='Brown', status='confirmed', added_by=self.user)
+
+    def walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(person.id for person in response.context['content'])
+            url = response['Link'][1:response['Link'].index('>')] if response.has_header('Link') else None
+        return seen
+
+    def test_walk_returns_every_row_once_in_order(self):
+        expected = list(PersonListView.queryset.order_by(*PersonListView.cursor_ordering).values_list('id', flat=True))
+        self.assertEqual(self.walk('/people/results.html/?after=&count=4'), expected)
+        self.assertEqual(self.walk('/people/s/?after=&count=3'), expected[7:])
+
+    def test_rows_added_behind_the_cursor(self):
+        expected = list(PersonListView.queryset.order_by(*PersonListView.cursor_ordering).values_list('id', flat=True))
+        response = self.client.get('/people/results.html/?after=&count=8')
+        Person.objects.create(family_name='Adams', status='confirmed', added_by=self.user)
+        url = response['Link'][1:response['Link'].index('>')]
+        self.assertEqual([person.id for person in self.client.get(url).context['content']], expected[8:])
+
+    def test_rdf_and_limits(self):
+        response = self.client.get('/people/results.ttl/?after=&count=5000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(Graph().parse(data=b''.join(response.streaming_content), format='turtle')), 15 * 2)
+        response = self.client.get('/people/results.html/?after=&count=5000')
+        self.assertEqual(response.context['content'].paginator.per_page, 1000)
+        self.assertEqual(self.client.get('/people/results.ttl/?after=nonsense').status_code, 400)
+
+    def test_page_size_limits(self):
+        response = self.client.get('/people/results.html/?count=5000')
+        self.assertEqual(response.context['content'].paginator.per_page, 1000)
+        for count in ['0', 'abc']:
+            self.assertEqual(self.client.get('/people/results.html/?count={}'.format(count)).status_code, 200)
+        self.assertEqual(self.client.get('/people/results.rdf/?count=5000').status_code, 400)
+        self.assertEqual(self.client.get('/people/results.rdf/?count=20').status_code, 200)
+
+    def test_tampered_cursor(self):
+        for values in [['a', 'b', 'zz'], ['a', 'b', {'x': 1}], [['a'], 'b', 1]]:
+            url = '/people/results.html/?after={}'.format(encode_cursor(values))
+            self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class DuplicatesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='test')
+
+    def add_person(self, family_name, other_names, service_number=None, born=None):
+        person = Person.objects.create(family_name=family_name, other_names=other_names, added_by=self.user)
+        if service_number:
+            ServiceNumber.objects.create(person=person, service_number=service_number, added_by=self.user)
+        if born:
+            Birth.objects.create(person=person, start_earliest_date=datetime.date(born, 1, 1), added_by=self.user)
+        return person
+
+    def test_soundex(self):
+        self.assertEqual([soundex(name) for name in ['Robert', 'Rupert', 'Ashcraft', 'Tymczak', "O'Hara", '']],
+                         ['R163', 'R163', 'A261', 'T522', 'O600', ''])
+
+    def test_find_duplicates(self):
+        smith = self.add_person('Smith', 'John William', '1234', 1890)
+        smyth = self.add_person('Smyth', 'John William', '1234')
+        self.add_person('Smith', 'John William', '5678', 1880)
+        self.add_person('Jones', 'Mary')
+        alias = self.add_person('Brown', 'Fred')
+        AlternativePersonName.objects.create(person=alias, family_name='Smith', other_names='John William',
+                                             display_name='John William Smith', added_by=self.user)
+        with self.assertNumQueries(5):
+            candidates = find_duplicates()
+        pairs = [(candidate.person.id, candidate.other.id) for candidate in candidates]
+        self.assertEqual(pairs[0], (smith.id, smyth.id))
+        self.assertIn('same service number', candidates[0].reasons)
+        self.assertIn((smith.id, alias.id), pairs)
+        self.assertEqual(len(pairs), 3)
+
+    def test_oversized_block(self):
+        people = [self.add_person('Smith', 'J{}{}'.format(first, second))
+                  for first in 'abcdef' for second in 'abcdefghij']
+        copy = self.add_person('Smith', people[23].other_names)
+        skipped = []
+        candidates = find_duplicates(max_block=50, skipped=skipped)
+        pairs = [(candidate.person.id, candidate.other.id) for candidate in candidates]
+        self.assertIn((people[23].id, copy.id), pairs)
+        self.assertIn((('soundex', 'S530', 'j'), 61), skipped)
+
+
+class MergeTest(PersonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.duplicate = Person.objects.create(family_name='Smyth', other_names='John', status='confirmed',
+                                               added_by=self.user)
+        self.earlier = Person.objects.create(family_name='Smithe', merged_into=self.duplicate, added_by=self.user)
+        AlternativePersonName.objects.create(person=self.duplicate, display_name='Jack Smyth', added_by=self.user)
+        ServiceNumber.objects.create(person=self.duplicate, service_number='123', added_by=self.user)
+        shared = Story.objects.create(title='Shared', text='Text', added_by=self.user)
+        self.person.stories.add(shared)
+        self.duplicate.stories.add(shared, Story.objects.create(title='Own', text='Text', added_by=self.user))
+        relation = PersonAssociation.objects.create(label='same as')
+        PersonAssociatedPerson.objects.create(person=self.duplicate, associated_person=self.person,
+                                              association=relation, added_by=self.user)
+        memorial = Memorial.objects.create(name='Roll of Honour', added_by=self.user)
+        MemorialAssociatedPerson.objects.create(memorial=memorial, person=self.duplicate,
+                                                association=MemorialAssociation.objects.create(label='listed on'))
+
+    def changes(self, report):
+        return {(change.model.__name__, change.field): (change.moved, change.dropped) for change in report}
+
+    def test_dry_run(self):
+        report = self.changes(merge_records(self.duplicate, self.person, dry_run=True))
+        self.assertEqual(report[('Person_stories', 'person')], (1, 1))
+        self.assertEqual(report[('Person', 'merged_into')], (1, 0))
+        self.assertEqual(report[('MemorialAssociatedPerson', 'person')], (1, 0))
+        self.assertEqual(self.duplicate.alternativepersonname_set.count(), 1)
+        self.assertIsNone(Person.objects.get(id=self.duplicate.id).merged_into)
+
+    def test_merge(self):
+        report = self.changes(merge_records(self.duplicate, self.person))
+        self.assertEqual(report[('PersonAssociatedPerson', 'person')], (0, 1))
+        self.assertEqual(Person.objects.get(id=self.duplicate.id).merged_into, self.person)
+        self.assertEqual(Person.objects.get(id=self.earlier.id).merged_into, self.person)
+        self.assertEqual(sorted(story.title for story in self.person.stories.all()), ['Own', 'Shared'])
+        self.assertEqual(self.person.alternativepersonname_set.count(), 1)
+        self.assertEqual(self.person.servicenumber_set.count(), 1)
+        self.assertEqual(MemorialAssociatedPerson.objects.get().person, self.person)
+        self.assertFalse(PersonAssociatedPerson.objects.exists())
+
+    def test_merge_self_link_to_duplicate(self):
+        relation = PersonAssociation.objects.get(label='same as')
+        PersonAssociatedPerson.objects.create(person=self.duplicate, associated_person=self.duplicate,
+                                              association=relation, added_by=self.user)
+        dry_run = merge_records(self.duplicate, self.person, dry_run=True)
+        report = merge_records(self.duplicate, self.person)
+        self.assertEqual(self.changes(dry_run), self.changes(report))
+        self.assertFalse(PersonAssociatedPerson.objects.exists())
+        self.assertTrue(all(change.moved >= 0 for change in report))
+
+    def test_merge_places_keeps_deaths(self):
+        master = Place.objects.create(place_name='Mosman', added_by=self.user)
+        duplicate = Place.objects.create(place_name='Mossman', added_by=self.user)
+        both = Death.objects.create(person=self.person, location=master, burial_place=master, added_by=self.user)
+        moved = Death.objects.create(person=self.duplicate, location=duplicate, burial_place=master,
+                                     added_by=self.user)
+        report = self.changes(merge_records(duplicate, master))
+        self.assertEqual(report[('Death', 'location')], (1, 0))
+        self.assertEqual(Death.objects.get(id=both.id).location, master)
+        self.assertEqual(Death.objects.get(id=moved.id).location, master)
+        self.assertEqual(Death.objects.get(id=moved.id).burial_place, master)
+
+    def test_merge_is_atomic(self):
+        with mock.patch.object(self.duplicate, 'save', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                merge_records(self.duplicate, self.person)
+        self.assertEqual(self.duplicate.alternativepersonname_set.count(), 1)
+        self.assertEqual(self.duplicate.stories.count(), 2)
+
+    def test_preview_and_merge_view(self):
+        url = '/people/{}/merge/'.format(self.duplicate.id)
+        data = {'merge_record': self.duplicate.id, 'master_record': self.person.id}
+        response = self.client.post(url, dict(data, preview='Preview'))
+        self.assertContains(response, 'To be moved')
+        self.assertIsNone(Person.objects.get(id=self.duplicate.id).merged_into)
+        response = self.client.post(url, data)
+        self.assertRedirects(response, '/people/{}/'.format(self.person.id), fetch_redirect_response=False)
+        self.assertEqual(Person.objects.get(id=self.duplicate.id).merged_into, self.person)
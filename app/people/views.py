@@ -1,106 +1,48 @@
 from django.urls import reverse_lazy
 from django.views.generic import ListView
 from django.http import HttpResponseRedirect
-from django.contrib.sites.models import Site
 from django.views.generic.base import TemplateView
 from django.utils.decorators import method_decorator
-from django.views.generic.edit import CreateView, UpdateView, DeleteView, FormView
+from django.views.generic.edit import CreateView, UpdateView, DeleteView
 
 from guardian.shortcuts import assign_perm
 from guardian.decorators import permission_required
 from guardian.mixins import PermissionRequiredMixin
 
-from rdflib import Graph
-from rdflib import Namespace, Literal, URIRef
-
 from app.people.forms import *
 from app.memorials.models import *
-from app.linkeddata.models import RDFSchema
+from app.people.rdf import (PERSON, ALT_NAME, BIRTH, DEATH, LIFE_EVENT, PEOPLE_STORY, PEOPLE_IMAGE, ORGANISATION, RANK,
+                            PERSON_ADDRESS, SERVICE_NUMBER, PERSON_RELATIONSHIP, PERSON_MEMBERSHIP)
+from app.people.loaders import PersonDetailLoader
 from app.linkeddata.views import LinkedDataView, LinkedDataListView
+from app.generic.views import MergeView
 
 
 class PersonView(LinkedDataView):
     model = Person
     path = '/people/%s'
     template_name = 'people/person'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        graph.add((this_person, namespaces['foaf']['name'], Literal(str(entity))))
-        graph.add((this_person, namespaces['foaf']['familyName'], Literal(entity.family_name)))
-        if entity.other_names:
-            graph.add((this_person, namespaces['foaf']['givenName'], Literal(entity.other_names)))
-        if entity.memorialname_set.all():
-            for memorialname in entity.memorialname_set.all():
-                graph.add((this_person, namespaces['graves']['commemorated_by'],
-                           URIRef(host_ns[memorialname.memorial.get_absolute_url()])))
-        for story in entity.stories.all():
-            graph.add((this_person, namespaces['foaf']['page'], URIRef(host_ns[story.get_absolute_url()])))
-        return graph
+    rdf_mapping = PERSON
+    detail_loader = PersonDetailLoader()
 
 
 class PersonPhotosView(LinkedDataView):
     model = Person
     path = '/people/%s/photos'
     template_name = 'people/person_photos'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        graph.add((this_person, namespaces['foaf']['name'], Literal(str(entity))))
-        graph.add((this_person, namespaces['foaf']['familyName'], Literal(entity.family_name)))
-        if entity.other_names:
-            graph.add((this_person, namespaces['foaf']['givenName'], Literal(entity.other_names)))
-        if entity.memorialname_set.all():
-            for memorialname in entity.memorialname_set.all():
-                graph.add((this_person, namespaces['graves']['commemorated_by'],
-                           URIRef(host_ns[memorialname.memorial.get_absolute_url()])))
-        for story in entity.stories.all():
-            graph.add((this_person, namespaces['foaf']['page'], URIRef(host_ns[story.get_absolute_url()])))
-        return graph
+    rdf_mapping = PERSON
+    detail_loader = PersonDetailLoader()
 
 
 class PersonListView(LinkedDataListView):
     model = Person
     path = '/people/{}results'
     template_name = 'people/people'
+    rdf_mapping = PERSON
     browse_field = 'family_name'
+    cursor_ordering = ['family_name', 'other_names', 'id']
     queryset = Person.objects.filter(status='confirmed').filter(merged_into__isnull=True)
 
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_person = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-            graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
-
 
 class SuggestedPersonListView(PermissionRequiredMixin, ListView):
     model = Person
@@ -119,313 +61,107 @@ class AltNameView(LinkedDataView):
     model = AlternativePersonName
     path = '/people/names/%s'
     template_name = 'people/altname'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = ALT_NAME
 
 
 class BirthView(LinkedDataView):
     model = Birth
     path = '/people/births/%s'
     template_name = 'people/birth'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = BIRTH
 
 
 class DeathView(LinkedDataView):
     model = Death
     path = '/people/deaths/%s'
     template_name = 'people/death'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = DEATH
 
 
 class LifeEventView(LinkedDataView):
     model = LifeEvent
     path = '/people/events/%s'
     template_name = 'people/life_event'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = LIFE_EVENT
 
 
 class StoryView(LinkedDataView):
     model = PeopleStory
     path = '/stories/%s'
     template_name = 'people/story'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_entity = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_entity, namespaces['rdf']['type'], namespaces['bibo']['Note']))
-        graph.add((this_entity, namespaces['rdfs']['label'], Literal(str(entity))))
-        graph.add((this_entity, namespaces['dc']['title'], Literal(str(entity))))
-        graph.add((this_entity, namespaces['rdf']['value'], Literal(entity.text)))
-        graph.add((this_entity, namespaces['dc']['creator'], Literal(entity.created_by.username)))
-        for person in entity.person_set.all():
-            graph.add((this_entity, namespaces['foaf']['topic'], URIRef(host_ns[person.get_absolute_url()])))
-        return graph
+    rdf_mapping = PEOPLE_STORY
 
 
 class StoryListView(LinkedDataListView):
     model = PeopleStory
     path = '/stories/results'
     template_name = 'people/stories'
-
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_entity = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_entity, namespaces['rdf']['type'], namespaces['bibo']['Note']))
-            graph.add((this_entity, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = PEOPLE_STORY
 
 
 class ImageView(LinkedDataView):
     model = PeopleImage
     path = '/images/%s'
     template_name = 'people/image'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_entity = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_entity, namespaces['rdf']['type'], namespaces['foaf']['Image']))
-        graph.add((this_entity, namespaces['rdfs']['label'], Literal(str(entity))))
-        graph.add((this_entity, namespaces['dc']['title'], Literal(str(entity))))
-        for person in entity.person_set.all():
-            graph.add((this_entity, namespaces['foaf']['depicts'], URIRef(host_ns[person.get_absolute_url()])))
-        return graph
+    rdf_mapping = PEOPLE_IMAGE
 
 
 class ImageListView(LinkedDataListView):
     model = PeopleImage
     path = '/images/results'
     template_name = 'people/images'
-
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_entity = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_entity, namespaces['rdf']['type'], namespaces['foaf']['Image']))
-            graph.add((this_entity, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = PEOPLE_IMAGE
 
 
 class OrganisationView(LinkedDataView):
     model = Organisation
     path = '/organisations/%s'
     template_name = 'people/organisation'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = ORGANISATION
 
 
 class OrganisationListView(LinkedDataListView):
     model = Organisation
     path = '/organisations/results'
     template_name = 'people/organisations'
+    rdf_mapping = ORGANISATION
     browse_field = 'name'
     queryset = Organisation.objects.filter(merged_into__isnull=True)
 
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_person = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-            graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
-
 
 class RankView(LinkedDataView):
     model = Rank
     path = '/people/ranks/%s'
     template_name = 'people/rank'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = RANK
 
 
 class PersonAddressView(LinkedDataView):
     model = PersonAddress
     path = '/people/addresses/%s'
     template_name = 'people/personaddress'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = PERSON_ADDRESS
 
 
 class ServiceNumberView(LinkedDataView):
     model = ServiceNumber
     path = '/people/servicenumbers/%s'
     template_name = 'people/servicenumber'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.person.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['dc']['identifier'], Literal(str(entity.service_number))))
-        return graph
+    rdf_mapping = SERVICE_NUMBER
 
 
 class PersonRelationshipView(LinkedDataView):
     model = PersonAssociatedPerson
     path = '/people/relationships/%s'
     template_name = 'people/relationship'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = PERSON_RELATIONSHIP
 
 
 class PersonMembershipView(LinkedDataView):
     model = PersonAssociatedOrganisation
     path = '/people/memberships/%s'
     template_name = 'people/membership'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = PERSON_MEMBERSHIP
 
 
 class SuggestPerson(CreateView):
@@ -1381,113 +1117,13 @@ class DeleteServiceNumber(PermissionRequiredMixin, DeleteView):
         return reverse_lazy('person-update', args=[self.person_pk])
 
 
-class PersonMergeView(FormView):
+class PersonMergeView(MergeView):
     template_name = 'people/person_merge_form.html'
     form_class = PersonMergeForm
-
-    def get_initial(self):
-        id = self.kwargs.get('id', None)
-        initial = {'merge_record': id}
-        return initial
-
-    def form_valid(self, form):
-        merge_record = form.cleaned_data['merge_record']
-        master_record = form.cleaned_data['master_record']
-        # Find all properties of merged record and update
-        for address in PersonAddress.objects.filter(person=merge_record):
-            address.person = master_record
-            address.save()
-        for relation in PersonAssociatedPerson.objects.filter(person=merge_record):
-            relation.person = master_record
-            relation.save()
-        for relation in PersonAssociatedPerson.objects.filter(associated_person=merge_record):
-            relation.associated_person = master_record
-            relation.save()
-        for organisation in PersonAssociatedOrganisation.objects.filter(person=merge_record):
-            organisation.person = master_record
-            organisation.save()
-        for source in PersonAssociatedSource.objects.filter(person=merge_record):
-            source.person = master_record
-            source.save()
-        for place in PersonAssociatedPlace.objects.filter(person=merge_record):
-            place.person = master_record
-            place.save()
-        for event in PersonAssociatedEvent.objects.filter(person=merge_record):
-            event.person = master_record
-            event.save()
-        for obj in PersonAssociatedObject.objects.filter(person=merge_record):
-            obj.person = master_record
-            obj.save()
-        for story in merge_record.stories.all():
-            master_record.stories.add(story)
-            master_record.save()
-        merge_record.stories.clear()
-        for rank in Rank.objects.filter(person=merge_record):
-            rank.person = master_record
-            rank.save()
-        for num in ServiceNumber.objects.filter(person=merge_record):
-            num.person = master_record
-            num.save()
-        for name in AlternativePersonName.objects.filter(person=merge_record):
-            name.person = master_record
-            name.save()
-        for lifeevent in LifeEvent.objects.filter(person=merge_record):
-            lifeevent.person = master_record
-            lifeevent.save()
-        for birth in Birth.objects.filter(person=merge_record):
-            birth.person = master_record
-            birth.save()
-        for death in Death.objects.filter(person=merge_record):
-            death.person = master_record
-            death.save()
-        for mem_name in MemorialName.objects.filter(person=merge_record):
-            mem_name.person = master_record
-            mem_name.save()
-        for creator in SourcePerson.objects.filter(person=merge_record):
-            creator.person = master_record
-            creator.save()
-        for memorial in MemorialAssociatedPerson.objects.filter(person=merge_record):
-            memorial.organisation = master_record
-            memorial.save()
-        merge_record.merged_into = master_record
-        merge_record.save()
-        self.redirect = master_record
-        return super(PersonMergeView, self).form_valid(form)
-
-    def get_success_url(self):
-        return reverse_lazy('person-view', args=[self.redirect.id])
+    success_url_name = 'person-view'
 
 
-class OrganisationMergeView(FormView):
+class OrganisationMergeView(MergeView):
     template_name = 'people/organisation_merge_form.html'
     form_class = OrganisationMergeForm
-
-    def get_initial(self):
-        id = self.kwargs.get('id', None)
-        initial = {'merge_record': id}
-        return initial
-
-    def form_valid(self, form):
-        merge_record = form.cleaned_data['merge_record']
-        master_record = form.cleaned_data['master_record']
-        # Find all properties of merged record and update
-        for source in OrganisationAssociatedSource.objects.filter(organisation=merge_record):
-            source.organisation = master_record
-            source.save()
-        for person in PersonAssociatedOrganisation.objects.filter(organisation=merge_record):
-            person.organisation = master_record
-            person.save()
-        for memorial in MemorialAssociatedOrganisation.objects.filter(organisation=merge_record):
-            memorial.organisation = master_record
-            memorial.save()
-        for story in merge_record.stories.all():
-            master_record.stories.add(story)
-            master_record.save()
-        merge_record.stories.clear()
-        merge_record.merged_into = master_record
-        merge_record.save()
-        self.redirect = master_record
-        return super(OrganisationMergeView, self).form_valid(form)
-
-    def get_success_url(self):
-        return reverse_lazy('organisation-view', args=[self.redirect.id])
+    success_url_name = 'organisation-view'
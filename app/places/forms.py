@@ -5,6 +5,7 @@ from django_select2.forms import (
 )
 from app.people.models import *
 from app.places.models import *
+from app.generic.autocomplete import AutocompleteIndex, AutocompleteMixin
 
 
 class BirthChoice(ModelSelect2Widget):
@@ -19,9 +20,12 @@ class EventChoice(ModelSelect2Widget):
     queryset = EventLocation.objects
 
 
-class PlaceChoice(ModelSelect2Widget):
+PLACE_NAMES = AutocompleteIndex(Place, ['display_name', 'place_name'])
+
+
+class PlaceChoice(AutocompleteMixin, ModelSelect2Widget):
     queryset = Place.objects.all()
-    search_fields = ['display_name__istartswith', 'place_name__istartswith']
+    autocomplete = PLACE_NAMES
 
 
 class AddPlaceForm(forms.ModelForm):
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.23 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+from app.generic.models import first_letter
+
+BROWSE_FIELDS = [
+    ('Place', 'place_name'),
+]
+
+
+def set_browse_letters(apps, schema_editor):
+    for model_name, browse_field in BROWSE_FIELDS:
+        model = apps.get_model('places', model_name)
+        rows = []
+        for row in model.objects.only('id', browse_field).iterator():
+            row.browse_letter = first_letter(getattr(row, browse_field))
+            rows.append(row)
+        model.objects.bulk_update(rows, ['browse_letter'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ('places', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='browse_letter',
+            field=models.CharField(blank=True, default='', editable=False, max_length=1),
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['browse_letter', 'place_name'], name='places_plac_browse__6679d7_idx'),
+        ),
+        migrations.RunPython(set_browse_letters, migrations.RunPython.noop),
+    ]
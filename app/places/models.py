@@ -1,10 +1,11 @@
 from django.db import models
 from django.urls import reverse
 
-from app.generic.models import Place as GenericPlace, StandardMetadata
+from app.generic.models import Place as GenericPlace, StandardMetadata, BrowseLetterMixin
 
 
-class Place(GenericPlace):
+class Place(GenericPlace, BrowseLetterMixin):
+    browse_field = 'place_name'
     place_name = models.CharField(max_length=100, blank=True)
     state = models.CharField(max_length=50, blank=True)
     country = models.CharField(max_length=50, blank=True)
@@ -43,6 +44,7 @@ class Place(GenericPlace):
 
     class Meta:
         ordering = ['place_name']
+        indexes = [models.Index(fields=['browse_letter', 'place_name'])]
         permissions = [('merge_place', 'Merge place')]
 
 
@@ -0,0 +1,30 @@
+from app.places.models import *
+from app.linkeddata.mapping import RDFMapping, Field, Link, Related
+
+PLACE = RDFMapping(
+    Place, 'place-view',
+    rdf_type='geo:SpatialThing',
+    properties=[
+        Field('geo:lat', 'lat'),
+        Field('geo:long', 'lon'),
+        Related('rdfs:seeAlso', 'sources', url_name='source-view'),
+    ]
+)
+
+ADDRESS = RDFMapping(
+    Address, 'address-view',
+    rdf_type='geo:SpatialThing',
+    select_related=['mosman_street', 'place'],
+    properties=[
+        Link('dc:isPartOf', 'mosman_street', 'mosmanstreet-view'),
+        Link('dc:isPartOf', 'place', 'place-view'),
+    ]
+)
+
+MOSMAN_STREET = RDFMapping(
+    MosmanStreet, 'mosmanstreet-view',
+    rdf_type='geo:SpatialThing',
+    properties=[
+        Related('dc:hasPart', 'address_set', url_name='address-view'),
+    ]
+)
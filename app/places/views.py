@@ -1,60 +1,30 @@
 from django.urls import reverse_lazy
 from django.http import HttpResponseRedirect
-from django.contrib.sites.models import Site
-from django.views.generic.edit import CreateView, UpdateView, DeleteView, FormView
-
-from rdflib import Graph
-from rdflib import Namespace, Literal, URIRef
+from django.views.generic.edit import CreateView, UpdateView, DeleteView
 
 from app.places.forms import *
 from app.people.models import *
 from app.memorials.models import *
-from app.linkeddata.models import RDFSchema
+from app.places.rdf import PLACE, ADDRESS, MOSMAN_STREET
 from app.linkeddata.views import LinkedDataView, LinkedDataListView
+from app.generic.views import MergeView
 
 
 class PlaceView(LinkedDataView):
     model = Place
     path = '/places/%s'
     template_name = 'places/place'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = PLACE
 
 
 class PlaceListView(LinkedDataListView):
     model = Place
     path = '/places/{}results'
     template_name = 'places/places'
+    rdf_mapping = PLACE
     browse_field = 'place_name'
     queryset = Place.objects.filter(merged_into__isnull=True).exclude(display_name='')
 
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_person = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-            graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
-
 
 class AddPlace(CreateView):
     template_name = 'places/add_place.html'
@@ -135,41 +105,14 @@ class AddressView(LinkedDataView):
     model = Address
     path = '/addresses/%s'
     template_name = 'places/address'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = ADDRESS
 
 
 class AddressListView(LinkedDataListView):
     model = Address
     path = '/addresses/results'
     template_name = 'places/addresses'
-
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_person = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-            graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = ADDRESS
 
 
 class AddAddress(CreateView):
@@ -238,85 +181,17 @@ class MosmanStreetView(LinkedDataView):
     model = MosmanStreet
     path = '/mosmanstreets/%s'
     template_name = 'places/mosmanstreet'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_person = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-        graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
+    rdf_mapping = MOSMAN_STREET
 
 
 class MosmanStreetListView(LinkedDataListView):
     model = MosmanStreet
     path = '/mosmanstreets/results'
     template_name = 'places/mosmanstreets'
+    rdf_mapping = MOSMAN_STREET
+
 
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_person = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_person, namespaces['rdf']['type'], namespaces['foaf']['Person']))
-            graph.add((this_person, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
-
-
-class PlaceMergeView(FormView):
+class PlaceMergeView(MergeView):
     template_name = 'places/place_merge_form.html'
     form_class = PlaceMergeForm
-
-    def get_initial(self):
-        id = self.kwargs.get('id', None)
-        initial = {'merge_record': id}
-        return initial
-
-    def form_valid(self, form):
-        merge_record = form.cleaned_data['merge_record']
-        master_record = form.cleaned_data['master_record']
-        # Find all properties of merged record and update
-        for address in Address.objects.filter(place=merge_record):
-            address.place = master_record
-            address.save()
-        for burial in Death.objects.filter(burial_place=merge_record):
-            burial.burial_place = master_record
-            burial.save()
-        for birth in Birth.objects.filter(location=merge_record):
-            birth.location = master_record
-            birth.save()
-        for death in Death.objects.filter(location=merge_record):
-            death.location = master_record
-            death.save()
-        for event in EventLocation.objects.filter(location=merge_record):
-            event.location = master_record
-            event.save()
-        for memorial in MemorialAssociatedPlace.objects.filter(place=merge_record):
-            memorial.place = master_record
-            memorial.save()
-        for memorial in Memorial.objects.filter(location=merge_record):
-            memorial.location = master_record
-            memorial.save()
-        for source in merge_record.sources.all():
-            master_record.sources.add(source)
-            master_record.save()
-        merge_record.sources.clear()
-        merge_record.merged_into = master_record
-        merge_record.save()
-        self.redirect = master_record
-        return super(PlaceMergeView, self).form_valid(form)
-
-    def get_success_url(self):
-        return reverse_lazy('place-view', args=[self.redirect.id])
+    success_url_name = 'place-view'
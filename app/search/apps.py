@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    name = 'app.search'
+    label = 'search'
+
+    def ready(self):
+        # Load the document definitions and connect the handlers that keep the index current
+        from app.search import index
+        index.autodiscover()
+        index.connect()
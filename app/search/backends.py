@@ -0,0 +1,128 @@
+"""
+Full-text index backends.
+
+SQLite uses an FTS5 table whose rowids are SearchDocument ids, PostgreSQL a
+weighted tsvector column on the SearchDocument table with a GIN index. Any
+other database falls back to unindexed LIKE queries. Names are weighted
+above the rest of the text when results are ranked.
+"""
+import re
+
+from django.db.models import Q
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def terms(query):
+    """Split a user's query into the words to search for."""
+    return TERM_RE.findall(query.lower())
+
+
+class SQLiteBackend(object):
+    table = 'search_fts'
+
+    def create(self, cursor):
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5(names, text, prefix='2 3')".format(self.table))
+
+    def drop(self, cursor):
+        cursor.execute('DROP TABLE IF EXISTS {}'.format(self.table))
+
+    def delete(self, cursor, ids):
+        if ids:
+            cursor.execute('DELETE FROM {} WHERE rowid IN ({})'.format(self.table, ', '.join(['%s'] * len(ids))),
+                           list(ids))
+
+    def update(self, cursor, documents):
+        self.delete(cursor, [document.id for document in documents])
+        cursor.executemany('INSERT INTO {} (rowid, names, text) VALUES (%s, %s, %s)'.format(self.table),
+                           [(document.id, document.names, document.text) for document in documents])
+
+    def match(self, words):
+        # Every word has to match; the last one may be incomplete
+        return ' '.join('"{}"'.format(word) for word in words) + '*'
+
+    def search(self, cursor, words, offset, limit):
+        cursor.execute('SELECT rowid FROM {0} WHERE {0} MATCH %s ORDER BY bm25({0}, 5.0, 1.0) '
+                       'LIMIT %s OFFSET %s'.format(self.table), [self.match(words), limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+    def count(self, cursor, words):
+        cursor.execute('SELECT COUNT(*) FROM {0} WHERE {0} MATCH %s'.format(self.table), [self.match(words)])
+        return cursor.fetchone()[0]
+
+
+class PostgreSQLBackend(object):
+    table = 'search_searchdocument'
+    vector = ("setweight(to_tsvector('simple', names), 'A') || "
+              "setweight(to_tsvector('simple', text), 'B')")
+
+    def create(self, cursor):
+        cursor.execute('ALTER TABLE {} ADD COLUMN IF NOT EXISTS search_vector tsvector'.format(self.table))
+        cursor.execute('CREATE INDEX IF NOT EXISTS search_vector_idx ON {} USING gin(search_vector)'.format(
+            self.table))
+
+    def drop(self, cursor):
+        cursor.execute('DROP INDEX IF EXISTS search_vector_idx')
+        cursor.execute('ALTER TABLE {} DROP COLUMN IF EXISTS search_vector'.format(self.table))
+
+    def delete(self, cursor, ids):
+        # The vector goes with the row
+        pass
+
+    def update(self, cursor, documents):
+        if documents:
+            cursor.execute('UPDATE {} SET search_vector = {} WHERE id = ANY(%s)'.format(self.table, self.vector),
+                           [[document.id for document in documents]])
+
+    def match(self, words):
+        return ' & '.join(words) + ':*'
+
+    def search(self, cursor, words, offset, limit):
+        cursor.execute("SELECT id FROM {} WHERE search_vector @@ to_tsquery('simple', %s) "
+                       "ORDER BY ts_rank(search_vector, to_tsquery('simple', %s)) DESC, id "
+                       "LIMIT %s OFFSET %s".format(self.table), [self.match(words), self.match(words), limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+    def count(self, cursor, words):
+        cursor.execute("SELECT COUNT(*) FROM {} WHERE search_vector @@ to_tsquery('simple', %s)".format(self.table),
+                       [self.match(words)])
+        return cursor.fetchone()[0]
+
+
+class FallbackBackend(object):
+    """Unindexed matching for databases with no full-text support we use."""
+
+    def create(self, cursor):
+        pass
+
+    def drop(self, cursor):
+        pass
+
+    def delete(self, cursor, ids):
+        pass
+
+    def update(self, cursor, documents):
+        pass
+
+    def queryset(self, words):
+        from app.search.models import SearchDocument
+        query = Q()
+        for word in words:
+            query &= Q(names__icontains=word) | Q(text__icontains=word)
+        return SearchDocument.objects.filter(query)
+
+    def search(self, cursor, words, offset, limit):
+        return list(self.queryset(words).order_by('title', 'id').values_list('id', flat=True)[offset:offset + limit])
+
+    def count(self, cursor, words):
+        return self.queryset(words).count()
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgreSQLBackend,
+}
+
+
+def get_backend(connection):
+    return BACKENDS.get(connection.vendor, FallbackBackend)()
@@ -0,0 +1,181 @@
+"""
+Keeps the search index up to date.
+
+Each app lists what it wants searchable in a search.py module, as
+SearchIndex subclasses registered with register(). An index turns one
+entity (a person, a source) into a SearchDocument, pulling in the text of
+related rows such as alternative names or image transcripts. Saving or
+deleting the entity or one of those related rows re-indexes just that
+entity, so the index is always current without a periodic rebuild.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils.html import strip_tags
+from django.utils.module_loading import autodiscover_modules
+
+from app.generic.merge import records_merged
+from app.search.backends import get_backend, terms
+from app.search.models import SearchDocument
+
+INDEXES = []
+
+
+class SearchIndex(object):
+    """
+    How to make the SearchDocument for one kind of entity.
+    dependencies maps related models to the attribute that holds the id of the
+    entity they belong to, e.g. {ServiceNumber: 'person_id'}.
+    """
+    model = None
+    dependencies = {}
+
+    def queryset(self):
+        """The entities that should be searchable."""
+        return self.model.objects.all()
+
+    def title(self, instance):
+        return str(instance)
+
+    def names(self, instance):
+        return []
+
+    def text(self, instance):
+        return []
+
+    def document(self, instance):
+        return SearchDocument(
+            content_type=ContentType.objects.get_for_model(self.model),
+            object_id=instance.pk,
+            title=self.title(instance)[:250],
+            url=instance.get_absolute_url(),
+            names=join(self.names(instance)),
+            text=join(self.text(instance)),
+        )
+
+
+def join(values):
+    return '\n'.join(strip_tags(value) for value in values if value)
+
+
+def register(index):
+    INDEXES.append(index)
+    return index
+
+
+def autodiscover():
+    autodiscover_modules('search')
+
+
+def index_for(model):
+    for index in INDEXES:
+        if index.model is model:
+            return index
+
+
+def update(index, ids):
+    """Bring the documents for the entities of index with the given ids up to date."""
+    ids = set(ids)
+    content_type = ContentType.objects.get_for_model(index.model)
+    existing = dict(SearchDocument.objects.filter(content_type=content_type, object_id__in=ids).values_list(
+        'object_id', 'id'))
+    documents = []
+    for instance in index.queryset().filter(pk__in=ids):
+        document = index.document(instance)
+        document.id = existing.pop(instance.pk, None)
+        documents.append(document)
+    backend = get_backend(connection)
+    with connection.cursor() as cursor:
+        # Entities that are gone, or no longer searchable
+        backend.delete(cursor, list(existing.values()))
+        SearchDocument.objects.filter(id__in=existing.values()).delete()
+        for document in documents:
+            document.save()
+        backend.update(cursor, documents)
+
+
+@transaction.atomic
+def rebuild(batch_size=500):
+    """Index everything from scratch and return the number of documents."""
+    backend = get_backend(connection)
+    with connection.cursor() as cursor:
+        backend.drop(cursor)
+        backend.create(cursor)
+    SearchDocument.objects.all().delete()
+    total = 0
+    for index in INDEXES:
+        ids = list(index.queryset().order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            documents = [index.document(instance) for instance in index.queryset().filter(pk__in=batch)]
+            documents = SearchDocument.objects.bulk_create(documents)
+            if documents and documents[0].id is None:
+                # Not every database returns the new ids
+                content_type = ContentType.objects.get_for_model(index.model)
+                documents = list(SearchDocument.objects.filter(content_type=content_type, object_id__in=batch))
+            with connection.cursor() as cursor:
+                backend.update(cursor, documents)
+            total += len(documents)
+    return total
+
+
+class SearchResults(object):
+    """
+    Ranked SearchDocuments matching query, sliced lazily so it can be given
+    to a Paginator: only the page asked for is read, with one query for the
+    ids and one for the documents.
+    """
+
+    def __init__(self, query):
+        self.words = terms(query)
+        self.backend = get_backend(connection)
+
+    def count(self):
+        if not self.words:
+            return 0
+        if not hasattr(self, '_count'):
+            with connection.cursor() as cursor:
+                self._count = self.backend.count(cursor, self.words)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        offset = key.start or 0
+        if not self.words or key.stop is None or key.stop <= offset:
+            return []
+        with connection.cursor() as cursor:
+            ids = self.backend.search(cursor, self.words, offset, key.stop - offset)
+        documents = SearchDocument.objects.select_related('content_type').in_bulk(ids)
+        return [documents[pk] for pk in ids if pk in documents]
+
+
+def reindex_entity(sender, instance, **kwargs):
+    update(index_for(sender), [instance.pk])
+
+
+def reindex_dependency(sender, instance, **kwargs):
+    for index in INDEXES:
+        if sender in index.dependencies:
+            entity_id = getattr(instance, index.dependencies[sender])
+            if entity_id is not None:
+                update(index, [entity_id])
+
+
+def reindex_merged(sender, merged, master, **kwargs):
+    # The merged record's related rows were moved with UPDATE, which sends no signals
+    index = index_for(sender)
+    if index is not None:
+        update(index, [merged.pk, master.pk])
+
+
+def connect():
+    records_merged.connect(reindex_merged, dispatch_uid='search.merged')
+    for index in INDEXES:
+        for signal in (post_save, post_delete):
+            signal.connect(reindex_entity, sender=index.model, dispatch_uid='search.{}'.format(index.model.__name__))
+            for model in index.dependencies:
+                signal.connect(reindex_dependency, sender=model, dispatch_uid='search.{}'.format(model.__name__))
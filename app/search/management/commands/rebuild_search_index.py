@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app.search.index import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Entities indexed per batch')
+
+    def handle(self, *args, **options):
+        total = rebuild(batch_size=options['batch_size'])
+        self.stdout.write('Indexed {} documents'.format(total))
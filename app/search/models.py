@@ -0,0 +1,24 @@
+from django.db import models
+from django.contrib.contenttypes.models import ContentType
+
+
+class SearchDocument(models.Model):
+    """
+    The searchable text of one entity. The full-text index itself lives
+    outside the ORM (see app.search.backends) and is keyed on this row's id.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=250)
+    url = models.CharField(max_length=250)
+    names = models.TextField(blank=True)
+    text = models.TextField(blank=True)
+
+    def __str__(self):
+        return self.title
+
+    def get_absolute_url(self):
+        return self.url
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
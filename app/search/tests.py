@@ -0,0 +1,66 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from app.people.models import Person, AlternativePersonName, ServiceNumber
+from app.sources.models import Source, SourceImage, Story
+from app.search.index import SearchResults
+from app.search.models import SearchDocument
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='test')
+        self.person = Person.objects.create(family_name='Bean', other_names='Charles', status='confirmed',
+                                            added_by=self.user)
+
+    def titles(self, query):
+        return [document.title for document in SearchResults(query)[:10]]
+
+    def test_incremental_updates(self):
+        self.assertEqual(self.titles('bean'), [str(self.person)])
+        self.assertEqual(self.titles('char'), [str(self.person)])
+        AlternativePersonName.objects.create(person=self.person, display_name='C.E.W. Bean', nickname='Monty',
+                                             added_by=self.user)
+        number = ServiceNumber.objects.create(person=self.person, service_number='4321', added_by=self.user)
+        self.assertEqual(self.titles('monty'), [str(self.person)])
+        self.assertEqual(self.titles('4321'), [str(self.person)])
+        number.delete()
+        self.assertEqual(self.titles('4321'), [])
+        self.person.family_name = 'Smith'
+        self.person.save()
+        self.assertEqual(self.titles('bean'), [str(self.person)])
+        self.assertEqual(self.titles('charles smith'), [str(self.person)])
+        self.person.delete()
+        self.assertEqual(self.titles('charles'), [])
+        self.assertFalse(SearchDocument.objects.exists())
+
+    def test_ranking_and_sources(self):
+        source = Source.objects.create(title='Letters home', caption='Written by Bean', added_by=self.user)
+        SourceImage.objects.create(source=source, image='images/letter.jpg', transcript='Dear mother')
+        Story.objects.create(title='Gallipoli', text='<p>The landing</p>', added_by=self.user)
+        self.assertEqual(self.titles('bean'), [str(self.person), 'Letters home'])
+        self.assertEqual(self.titles('mother'), ['Letters home'])
+        self.assertEqual(self.titles('landing'), ['Gallipoli'])
+        self.assertEqual(self.titles('p'), [])
+
+    def test_rebuild(self):
+        Person.objects.create(family_name='Bean', status='pending', added_by=self.user)
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.titles('bean'), [str(self.person)])
+
+    def test_view(self):
+        for i in range(30):
+            Person.objects.create(family_name='Smith', other_names='John {}'.format(i), status='confirmed',
+                                  added_by=self.user)
+        response = self.client.get('/search/', {'q': 'smith', 'page': '2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['content']), 5)
+        response = self.client.get('/search/results.json/', {'q': 'smith john'})
+        results = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(results['total_results'], 30)
+        self.assertEqual(len(results['results']), 25)
+        self.assertEqual(results['results'][0]['type'], 'person')
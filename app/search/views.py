@@ -0,0 +1,56 @@
+import json
+
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.http import HttpResponse
+from django.shortcuts import render
+
+from django_conneg.views import ContentNegotiatedView
+from django_conneg.decorators import renderer
+
+from app.search.index import SearchResults
+
+
+class SearchView(ContentNegotiatedView):
+    _default_format = 'html'
+    template_name = 'search/search'
+    max_page_size = 100
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        queries = request.GET.copy()
+        if 'page' in queries:
+            del queries['page']
+        try:
+            per_page = min(max(int(request.GET.get('count', '25')), 1), self.max_page_size)
+        except ValueError:
+            per_page = 25
+        paginator = Paginator(SearchResults(query), per_page)
+        try:
+            content = paginator.page(request.GET.get('page', '1'))
+        except PageNotAnInteger:
+            content = paginator.page(1)
+        except EmptyPage:
+            content = paginator.page(paginator.num_pages)
+        context = {'q': query, 'queries': queries, 'content': content}
+        return self.render(request, context, self.template_name)
+
+    @renderer(format='html', mimetypes=('text/html', 'application/xhtml+xml'), name='HTML', priority=1)
+    def render_html(self, request, context, template_name):
+        return render(request, self.join_template_name(template_name, 'html'), context)
+
+    @renderer(format='json', mimetypes=('application/json',), name='JSON')
+    def render_json(self, request, context, template_name):
+        page = context['content']
+        results = {
+            'query': context['q'],
+            'total_results': page.paginator.count,
+            'page': page.number,
+            'pages': page.paginator.num_pages,
+            'results': [{
+                'type': document.content_type.model,
+                'id': document.object_id,
+                'title': document.title,
+                'url': request.build_absolute_uri(document.url),
+            } for document in page],
+        }
+        return HttpResponse(json.dumps(results, indent=4), content_type='application/json')
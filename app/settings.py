@@ -87,6 +87,17 @@ MIDDLEWARE = (
     # 'django.middleware.clickjacking.XFrameOptionsMiddleware',
 )
 
+# The linked-data responses, merged record index, browse counts and
+# autocomplete versions are cleared by deleting cache keys, so every process
+# serving the site must share one cache. A file cache does for one server;
+# use memcached in settings_prod when there are several.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(os.path.dirname(PROJECT_PATH), 'cache'),
+    }
+}
+
 ROOT_URLCONF = 'app.urls'
 
 # Python dotted path to the WSGI application used by Django's runserver.
@@ -15,6 +15,7 @@ from ckeditor.widgets import CKEditorWidget
 from app.sources.models import *
 from app.people.models import *
 from app.generic.forms import DateSelectMixin, ShortDateForm, NewSelectDateWidget
+from app.generic.autocomplete import AutocompleteIndex, AutocompleteMixin
 
 from cwgctools.client import CWGCClient
 from rstools.client import RSItemClient, RSSeriesClient
@@ -31,33 +32,38 @@ def get_range_upper_year():
 YEARS = [year for year in range(1850, get_range_upper_year())]
 
 
-class PeopleMultiChoices(ModelSelect2MultipleWidget):
+PERSON_NAMES = AutocompleteIndex(Person, ['family_name'])
+SOURCE_TITLES = AutocompleteIndex(Source, ['title'], words=True)
+REPOSITORY_NAMES = AutocompleteIndex(Repository, ['display_name'], words=True)
+
+
+class PeopleMultiChoices(AutocompleteMixin, ModelSelect2MultipleWidget):
     queryset = Person.objects
-    search_fields = ['family_name__istartswith', ]
+    autocomplete = PERSON_NAMES
 
 
 class SourceChoice(ModelSelect2Widget):
     queryset = Source.objects
 
 
-class CollectionChoice(ModelSelect2Widget):
+class CollectionChoice(AutocompleteMixin, ModelSelect2Widget):
     queryset = Source.objects
-    search_fields = ['title__icontains']
+    autocomplete = SOURCE_TITLES
 
 
-class RepositoryChoice(ModelSelect2Widget):
+class RepositoryChoice(AutocompleteMixin, ModelSelect2Widget):
     queryset = Repository.objects
-    search_fields = ['display_name__icontains']
+    autocomplete = REPOSITORY_NAMES
 
 
-class AuthorMultiChoices(ModelSelect2MultipleWidget):
+class AuthorMultiChoices(AutocompleteMixin, ModelSelect2MultipleWidget):
     queryset = Person.objects
-    search_fields = ['family_name__istartswith']
+    autocomplete = PERSON_NAMES
 
 
-class SourcesMultiChoice(ModelSelect2MultipleWidget):
+class SourcesMultiChoice(AutocompleteMixin, ModelSelect2MultipleWidget):
     queryset = Source.objects
-    search_fields = ['title__icontains', ]
+    autocomplete = SOURCE_TITLES
 
 
 class SourceImageForm(ModelForm):
@@ -0,0 +1,140 @@
+"""
+Adding AWM, CWGC and Mapping Our Anzacs pages as sources for many people
+at once.
+
+Each job is a person and the url of a page about them. The pages are
+fetched, parsed and saved by fetchtools.harvest.Harvester. Saving a page
+does the same as adding it through AddSourceView: the webpage is added to
+its site's collection and linked to the person as a primary topic. Pages
+that are already sources are linked again rather than duplicated.
+
+Parsing happens in worker processes, so the parse functions here only use
+the scraper clients. The models are imported when a batch is written.
+"""
+import csv
+import io
+import re
+from collections import namedtuple
+
+from awmtools.client import RollClient, EmbarkationClient, RedCrossClient, HonoursClient
+from cwgctools.client import CWGCClient
+from fetchtools.harvest import Job
+from moatools.client import MOAClient
+
+AWM = 'Australian War Memorial'
+
+Site = namedtuple('Site', ['kind', 'pattern', 'client', 'title', 'url', 'publisher'])
+
+SITES = [
+    Site('roll', 'roll_of_honour', RollClient, 'Roll of Honour',
+         'http://www.awm.gov.au/research/people/roll_of_honour/', AWM),
+    Site('embarkation', 'embarkation', EmbarkationClient, 'First World War Embarkation Roll',
+         'http://www.awm.gov.au/research/people/nominal_rolls/first_world_war_embarkation/', AWM),
+    Site('redcross', 'wounded_and_missing', RedCrossClient, 'First World War Red Cross Wounded and Missing',
+         'http://www.awm.gov.au/research/people/wounded_and_missing/', AWM),
+    Site('honours', 'honours_and_awards', HonoursClient, 'Honours and Awards',
+         'http://www.awm.gov.au/research/people/honours_and_awards/', AWM),
+    Site('cwgc', 'cwgc.org', CWGCClient, 'Find War Dead',
+         'http://www.cwgc.org/find-war-dead.aspx', 'Commonwealth War Graves Commission'),
+    Site('moa', 'mappingouranzacs', MOAClient, 'Mapping Our Anzacs',
+         'http://mappingouranzacs.naa.gov.au', 'National Archives of Australia'),
+]
+
+SITES_BY_KIND = {site.kind: site for site in SITES}
+
+
+class HarvestError(ValueError):
+    pass
+
+
+def make_job(person_id, url):
+    """Work out which site url belongs to. A bare barcode is a Mapping Our Anzacs entry."""
+    url = url.strip()
+    if url.isdigit():
+        return Job(person_id, 'moa', MOAClient.MOA_URL.format(url))
+    for site in SITES:
+        if site.pattern in url:
+            if site.kind == 'moa':
+                barcode = re.search(r'barcode_no=(\d+)', url)
+                if barcode is None:
+                    raise HarvestError('Not a Mapping Our Anzacs entry: {}'.format(url))
+                url = MOAClient.MOA_URL.format(barcode.group(1))
+            return Job(person_id, site.kind, url)
+    raise HarvestError('Not an AWM, CWGC or Mapping Our Anzacs url: {}'.format(url))
+
+
+def read_jobs(content):
+    """Return Jobs from the text of a CSV file with person and url columns."""
+    reader = csv.DictReader(io.StringIO(content))
+    if not reader.fieldnames or not {'person', 'url'} <= set(reader.fieldnames):
+        raise HarvestError('The CSV needs person and url columns')
+    jobs = []
+    # Line 1 is the header
+    for line, row in enumerate(reader, 2):
+        try:
+            jobs.append(make_job(int(row['person']), row['url']))
+        except (TypeError, ValueError) as e:
+            raise HarvestError('Line {}: {}'.format(line, e))
+    return jobs
+
+
+def parse_page(job, body):
+    """Extract the details from a fetched page. Runs in a worker process."""
+    client = SITES_BY_KIND[job.kind].client()
+    if job.kind == 'cwgc':
+        return client.parse_details(body, job.url)
+    elif job.kind == 'moa':
+        return client.parse_details(body, client._parse_id(job.url))
+    return client.get_details(soup=client.make_soup(body))
+
+
+def page_title(job, details):
+    if job.kind == 'cwgc':
+        return 'Find War Dead &ndash; {}'.format(details['name'].title())
+    elif job.kind == 'moa':
+        return 'Mapping Our Anzacs - {} {}'.format(details['other_names'], details['family_name'])
+    return details['title']
+
+
+def write_batch(batch, user):
+    """Save a batch of (job, details) pairs in one transaction."""
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from guardian.shortcuts import assign_perm
+    from app.linkeddata.merged import canonical_id
+    from app.people.models import Person, PersonAssociatedSource, SourceAssociation
+    from app.sources.models import Source, SourceType
+
+    system_user = User.objects.get(username='system')
+    website_type = SourceType.objects.get(label='website')
+    webpage_type = SourceType.objects.get(label='webpage')
+    primary_topic = SourceAssociation.objects.get(label='primary topic of')
+    # People merged since the jobs were listed get the pages instead
+    people = {job.key: canonical_id(Person, job.key) for job, details in batch}
+    collections = {}
+    with transaction.atomic():
+        for job, details in batch:
+            site = SITES_BY_KIND[job.kind]
+            if site.kind not in collections:
+                collections[site.kind], created = Source.objects.get_or_create(
+                    title=site.title,
+                    publisher=site.publisher,
+                    source_type=website_type,
+                    url=site.url,
+                    defaults={'added_by': system_user}
+                )
+            source, created = Source.objects.get_or_create(
+                url=job.url,
+                collection=collections[site.kind],
+                source_type=webpage_type,
+                defaults={'title': page_title(job, details), 'added_by': user}
+            )
+            if created:
+                assign_perm('sources.change_source', user, source)
+                assign_perm('sources.delete_source', user, source)
+            PersonAssociatedSource.objects.get_or_create(
+                person_id=people[job.key],
+                source=source,
+                association=primary_topic,
+                defaults={'added_by': user}
+            )
@@ -0,0 +1,43 @@
+"""
+Loaders fetch an entity together with everything its HTML page shows,
+using one query per relation no matter how many related rows there are.
+"""
+from django.db.models import Prefetch
+
+from app.sources.models import *
+from app.people.models import PersonAssociatedSource, OrganisationAssociatedSource
+
+
+class SourceDetailLoader(object):
+    """
+    Everything sources/source.html needs for one source, including the
+    parts of a collection and the collections it is part of.
+    """
+    # Levels of the collection chain fetched along with the source
+    collection_depth = 4
+
+    def select_related(self):
+        related = ['source_type', 'repository']
+        path = 'collection'
+        for level in range(self.collection_depth):
+            related.extend([path, '{}__source_type'.format(path)])
+            path = '{}__collection'.format(path)
+        return related
+
+    def prefetches(self):
+        return [
+            Prefetch('sourceperson_set', queryset=SourcePerson.objects.select_related('person', 'role')),
+            Prefetch('collection_source', queryset=Source.objects.select_related('source_type')),
+            Prefetch('personassociatedsource_set',
+                     queryset=PersonAssociatedSource.objects.select_related('person', 'association')),
+            Prefetch('organisationassociatedsource_set',
+                     queryset=OrganisationAssociatedSource.objects.select_related('organisation', 'association')),
+            'place_set',
+            'sourceimage_set',
+        ]
+
+    def queryset(self):
+        return Source.objects.select_related(*self.select_related()).prefetch_related(*self.prefetches())
+
+    def load(self, pk):
+        return self.queryset().get(pk=pk)
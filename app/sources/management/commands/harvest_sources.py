@@ -0,0 +1,60 @@
+import os
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from app.people.models import Person
+from app.sources.harvest import HarvestError, read_jobs, parse_page, write_batch
+from fetchtools.harvest import Harvester
+from fetchtools.session import get_session
+
+
+class Command(BaseCommand):
+    help = ('Add the AWM, CWGC and Mapping Our Anzacs pages listed in a CSV file of person and url columns '
+            'as sources for those people.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--user', default='system', help='Username to add the sources as')
+        parser.add_argument('--per-host', type=int, default=2, help='Most requests at once to each site')
+        parser.add_argument('--delay', type=float, default=0.5, help='Seconds between requests to each site')
+        parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Processes parsing pages')
+        parser.add_argument('--batch-size', type=int, default=50, help='Pages saved per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError('There is no user {}'.format(options['user']))
+        with open(options['file'], encoding='utf-8-sig') as jobs_file:
+            try:
+                jobs = read_jobs(jobs_file.read())
+            except HarvestError as e:
+                raise CommandError(e)
+        missing = {job.key for job in jobs} - set(Person.objects.filter(
+            id__in={job.key for job in jobs}).values_list('id', flat=True))
+        if missing:
+            raise CommandError('There are no people with ids {}'.format(', '.join(str(pk) for pk in sorted(missing))))
+
+        def progress(counts, total):
+            self.stdout.write('Saved {} of {} pages'.format(counts['written'], total))
+
+        harvester = Harvester(
+            parse_page,
+            partial(write_batch, user=user),
+            per_host=options['per_host'],
+            delay=options['delay'],
+            processes=options['processes'],
+            batch_size=options['batch_size'],
+            progress=progress
+        )
+        # Forked parse workers must not share the parent's database connections
+        connections.close_all()
+        harvester.run(jobs)
+        for job, error in harvester.errors:
+            self.stderr.write('Person {}, {}: {}'.format(job.key, job.url, error))
+        stats = get_session().stats()
+        self.stdout.write('Saved {} of {} pages, {} failed. {} requests, {} on reused connections.'.format(
+            harvester.counts['written'], len(jobs), len(harvester.errors), stats['requests'], stats['reused']))
@@ -5,10 +5,12 @@ from django.urls import reverse
 from unidecode import unidecode
 
 from app.linkeddata.models import RDFRelationship, RDFType
-from app.generic.models import StandardMetadata, ShortDateMixin
+from app.generic.utils import related_rows, memoize
+from app.generic.models import StandardMetadata, ShortDateMixin, BrowseLetterMixin
 
 
-class Source(StandardMetadata):
+class Source(StandardMetadata, BrowseLetterMixin):
+    browse_field = 'title'
     title = models.TextField(blank=True, null=True)
     source_type = models.ForeignKey('SourceType', on_delete=models.CASCADE, blank=True, null=True)  # include rdf?
     creators = models.ManyToManyField('people.Person', through='SourcePerson', blank=True)
@@ -38,46 +40,56 @@ class Source(StandardMetadata):
     def __str__(self):
         return '{} ({})'.format(unidecode(self.title), self.source_type)
 
+    def creators_with_role(self, role):
+        creators = related_rows(self, 'sourceperson_set', 'person', 'role')
+        return [creator.person for creator in creators if creator.role.label == role]
+
+    @memoize
     def authors(self):
-        creators = self.sourceperson_set.filter(role__label='author')
-        return [creator.person for creator in creators]
+        return self.creators_with_role('author')
 
+    @memoize
     def editors(self):
-        creators = self.sourceperson_set.filter(role__label='editor')
-        return [creator.person for creator in creators]
+        return self.creators_with_role('editor')
+
+    def subjects_with_association(self, accessor, subject, association):
+        relations = related_rows(self, accessor, subject, 'association')
+        return [getattr(relation, subject) for relation in relations if relation.association.label == association]
 
+    @memoize
     def main_people(self):
-        return [relation.person for relation in
-                self.personassociatedsource_set
-                    .filter(association__label='primary topic of')]
+        return self.subjects_with_association('personassociatedsource_set', 'person', 'primary topic of')
 
+    @memoize
     def other_people(self):
-        return [relation.person for relation in
-                self.personassociatedsource_set
-                    .filter(association__label='topic of')]
+        return self.subjects_with_association('personassociatedsource_set', 'person', 'topic of')
 
+    @memoize
     def main_subjects(self):
-        people = [relation.person for relation in
-                  self.personassociatedsource_set
-                      .filter(association__label='primary topic of')]
-        orgs = [
-            relation.organisation for relation in
-            self.organisationassociatedsource_set
-                .filter(association__label='primary topic of')
-        ]
-        places = list(self.place_set.all())
+        people = self.main_people()
+        orgs = self.subjects_with_association('organisationassociatedsource_set', 'organisation', 'primary topic of')
+        places = related_rows(self, 'place_set')
         # stories = list(self.story_set.all())
         return people + orgs + places
 
+    @memoize
     def other_subjects(self):
-        people = [relation.person for relation in
-                  self.personassociatedsource_set
-                      .filter(association__label='topic of')]
-        orgs = [relation.organisation for relation in
-                self.organisationassociatedsource_set
-                    .filter(association__label='topic of')]
+        people = self.other_people()
+        orgs = self.subjects_with_association('organisationassociatedsource_set', 'organisation', 'topic of')
         return people + orgs
 
+    @memoize
+    def ancestors(self):
+        """The collections this source is part of, nearest first."""
+        ancestors = []
+        seen = {self.pk}
+        collection = self.collection
+        while collection is not None and collection.pk not in seen:
+            ancestors.append(collection)
+            seen.add(collection.pk)
+            collection = collection.collection
+        return ancestors
+
     def evidence_for(self):
         entities = []
         # entities.extend(list(self.alternativepersonname_set.all()))
@@ -125,6 +137,7 @@ class Source(StandardMetadata):
 
     class Meta:
         ordering = ['title']
+        indexes = [models.Index(fields=['browse_letter', 'title'])]
 
 
 class Story(StandardMetadata, ShortDateMixin):
@@ -0,0 +1,27 @@
+from app.sources.models import *
+from app.linkeddata.mapping import RDFMapping, Field, Link, Related, Types
+
+SOURCE = RDFMapping(
+    Source, 'source-view',
+    rdf_type=Types('source_type__rdf_class', default='bibo:Document'),
+    select_related=['source_type'],
+    properties=[
+        Field('dc:title', 'title'),
+        Field('dc:isPartOf', 'collection_title'),
+        Link('dc:isPartOf', 'collection', 'source-view'),
+        Related('foaf:topic', 'personassociatedsource_set', url_name='person-view', target='person'),
+        Related('foaf:topic', 'organisationassociatedsource_set', url_name='organisation-view', target='organisation'),
+    ]
+)
+
+STORY = RDFMapping(
+    Story, 'story-view',
+    rdf_type='bibo:Note',
+    properties=[
+        Field('dc:title', 'title'),
+        Field('rdf:value', 'text'),
+        Field('dc:creator', 'added_by__username'),
+        Related('foaf:topic', 'person_set', url_name='person-view'),
+        Related('foaf:topic', 'organisation_set', url_name='organisation-view'),
+    ]
+)
@@ -0,0 +1,35 @@
+from app.sources.models import Source, SourceImage, Story
+from app.search.index import SearchIndex, register
+
+
+class SourceIndex(SearchIndex):
+    model = Source
+    dependencies = {
+        SourceImage: 'source_id',
+    }
+
+    def queryset(self):
+        return Source.objects.prefetch_related('sourceimage_set')
+
+    def title(self, source):
+        return source.title or 'Untitled'
+
+    def names(self, source):
+        return [source.title]
+
+    def text(self, source):
+        return [source.caption] + [image.transcript for image in source.sourceimage_set.all()]
+
+
+class StoryIndex(SearchIndex):
+    model = Story
+
+    def names(self, story):
+        return [story.title]
+
+    def text(self, story):
+        return [story.text]
+
+
+register(SourceIndex())
+register(StoryIndex())
@@ -5,7 +5,18 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.contrib.auth.models import User
+
+from app.sources.models import *
+from app.people.models import (Person, Organisation, SourceAssociation, PersonAssociatedSource,
+                               OrganisationAssociatedSource)
+from app.places.models import Place
+from app.sources.harvest import HarvestError, read_jobs, write_batch
+from fetchtools.harvest import Job
 
 
 class SimpleTest(TestCase):
@@ -14,3 +25,76 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class SourceDetailQueryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='test')
+        self.series = SourceType.objects.create(label='series')
+        self.series_source = Source.objects.create(title='B2455', source_type=self.series, added_by=self.user)
+        self.collection = Source.objects.create(title='Box 1', source_type=self.series, collection=self.series_source,
+                                                added_by=self.user)
+        self.source = Source.objects.create(title='Service record', collection=self.collection, added_by=self.user)
+        self.author = SourceRole.objects.create(label='author')
+        self.primary = SourceAssociation.objects.create(label='primary topic of')
+        self.topic = SourceAssociation.objects.create(label='topic of')
+
+    def add_relations(self):
+        person = Person.objects.create(family_name='Smith', status='confirmed', added_by=self.user)
+        organisation = Organisation.objects.create(name='1st Battalion', added_by=self.user)
+        SourcePerson.objects.create(source=self.source, person=person, role=self.author)
+        for association in [self.primary, self.topic]:
+            PersonAssociatedSource.objects.create(source=self.source, person=person, association=association,
+                                                  added_by=self.user)
+            OrganisationAssociatedSource.objects.create(source=self.source, organisation=organisation,
+                                                        association=association, added_by=self.user)
+        Place.objects.create(place_name='Mosman', added_by=self.user).sources.add(self.source)
+        Source.objects.create(title='Page', source_type=self.series, collection=self.source, added_by=self.user)
+
+    def test_fixed_query_count(self):
+        url = '/sources/{}/'.format(self.source.id)
+        self.add_relations()
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        for i in range(3):
+            self.add_relations()
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        content = response.context['content']
+        self.assertEqual(content.ancestors(), [self.collection, self.series_source])
+        self.assertEqual(len(content.main_subjects()), 12)
+        self.assertEqual(len(content.authors()), 4)
+
+
+class HarvestTest(TestCase):
+    def setUp(self):
+        self.system = User.objects.create(username='system')
+        self.person = Person.objects.create(family_name='Crisford', added_by=self.system)
+        SourceType.objects.create(label='website')
+        SourceType.objects.create(label='webpage')
+        SourceAssociation.objects.create(label='primary topic of')
+
+    def test_read_jobs(self):
+        jobs = read_jobs(
+            'person,url\n'
+            '1,http://www.awm.gov.au/research/people/roll_of_honour/people.asp?p=1\n'
+            '2,http://mappingouranzacs.naa.gov.au/details-permalink.aspx?barcode_no=6928234\n'
+            '3,6928234\n'
+        )
+        self.assertEqual([(job.key, job.kind) for job in jobs], [(1, 'roll'), (2, 'moa'), (3, 'moa')])
+        self.assertEqual(jobs[1].url, jobs[2].url)
+        with self.assertRaises(HarvestError):
+            read_jobs('person,url\n1,http://example.com/\n')
+
+    def test_write_batch(self):
+        url = 'http://www.cwgc.org/find-war-dead/casualty/313405/'
+        job = Job(self.person.id, 'cwgc', url)
+        details = {'name': 'CRISFORD, WILFRED REGINALD EDGAR'}
+        write_batch([(job, details)], self.system)
+        write_batch([(job, details)], self.system)
+        source = Source.objects.get(url=url)
+        self.assertEqual(source.title, 'Find War Dead &ndash; Crisford, Wilfred Reginald Edgar')
+        self.assertEqual(source.collection.title, 'Find War Dead')
+        self.assertEqual(PersonAssociatedSource.objects.get(source=source).person, self.person)
@@ -2,7 +2,6 @@ from urllib.error import URLError, HTTPError
 
 from django.shortcuts import render
 from django.urls import reverse_lazy
-from django.contrib.sites.models import Site
 from django.http import HttpResponseRedirect
 from django.utils.decorators import method_decorator
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
@@ -12,15 +11,13 @@ from guardian.shortcuts import assign_perm
 from guardian.decorators import permission_required
 from guardian.mixins import PermissionRequiredMixin
 
-from rdflib import Graph
-from rdflib import Namespace, Literal, URIRef
-
 from app.places.models import *
 from app.sources.forms import *
-from app.linkeddata.models import RDFSchema
+from app.sources.rdf import SOURCE, STORY
+from app.sources.loaders import SourceDetailLoader
 from app.linkeddata.views import LinkedDataView, LinkedDataListView
 
-from moatools.client import MOAClient
+from moatools.client import MOAClient, ServerError
 from rstools.utilities import parse_date
 
 
@@ -28,71 +25,26 @@ class SourceView(LinkedDataView):
     model = Source
     path = '/sources/%s'
     template_name = 'sources/source'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_entity = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_entity, namespaces['rdfs']['label'], Literal(str(entity))))
-        graph.add((this_entity, namespaces['dc']['title'], Literal(str(entity))))
-        if entity.source_type.id == 3:
-            graph.add((this_entity, namespaces['rdf']['type'], namespaces['bibo']['Article']))
-            graph.add((this_entity, namespaces['dc']['isPartOf'], Literal(entity.collection_title)))
-        for person in entity.person_set.all():
-            graph.add((this_entity, namespaces['foaf']['topic'], URIRef(host_ns[person.get_absolute_url()])))
-        return graph
+    rdf_mapping = SOURCE
+    detail_loader = SourceDetailLoader()
 
 
 class SourceListView(LinkedDataListView):
     model = Source
     path = '/sources/{}results'
     template_name = 'sources/sources'
+    rdf_mapping = SOURCE
     browse_field = 'title'
     queryset = Source.objects.all()
 
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_entity = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_entity, namespaces['rdf']['type'], namespaces['bibo']['Note']))
-            graph.add((this_entity, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
-
 
 class ImageListView(LinkedDataListView):
     model = Source
     path = '/images/results'
     template_name = 'sources/images'
+    rdf_mapping = SOURCE
     queryset = Source.objects.exclude(sourceimage=None).filter(source_type__label='photograph')
 
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_entity = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_entity, namespaces['rdf']['type'], namespaces['bibo']['Note']))
-            graph.add((this_entity, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
-
 
 def show_sources(request):
     results = Source.objects.all().order_by('title')
@@ -111,48 +63,16 @@ class StoryView(LinkedDataView):
     model = Story
     path = '/stories/%s'
     template_name = 'sources/story'
-
-    def make_graph(self, entity):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        this_entity = URIRef(host_ns[entity.get_absolute_url()])
-        graph.add((this_entity, namespaces['rdf']['type'], namespaces['bibo']['Note']))
-        graph.add((this_entity, namespaces['rdfs']['label'], Literal(str(entity))))
-        graph.add((this_entity, namespaces['dc']['title'], Literal(str(entity))))
-        graph.add((this_entity, namespaces['rdf']['value'], Literal(entity.text)))
-        graph.add((this_entity, namespaces['dc']['creator'], Literal(entity.added_by.username)))
-        for person in entity.person_set.all():
-            graph.add((this_entity, namespaces['foaf']['topic'], URIRef(host_ns[person.get_absolute_url()])))
-        return graph
+    rdf_mapping = STORY
 
 
 class StoryListView(LinkedDataListView):
     model = Story
     path = '/stories/results'
     template_name = 'sources/stories'
+    rdf_mapping = STORY
     queryset = Story.objects.all()
 
-    def make_graph(self, entities):
-        namespaces = {}
-        graph = Graph()
-        schemas = RDFSchema.objects.all()
-        for schema in schemas:
-            namespace = Namespace(schema.uri)
-            graph.bind(schema.prefix, namespace)
-            namespaces[schema.prefix] = namespace
-        host_ns = Namespace('http://%s' % (Site.objects.get_current().domain,))
-        for entity in entities:
-            this_entity = URIRef(host_ns[entity.get_absolute_url()])
-            graph.add((this_entity, namespaces['rdf']['type'], namespaces['bibo']['Note']))
-            graph.add((this_entity, namespaces['rdfs']['label'], Literal(str(entity))))
-        return graph
-
 
 # def get_trove_newspaper(url):
 #     details = {}
@@ -198,6 +118,7 @@ class StoryListView(LinkedDataListView):
 #     source.save()
 #
 
+
 class AddSourceView(CreateView):
     template_name = 'sources/add_source.html'
     form_class = AddSourceForm
@@ -400,7 +321,7 @@ class AddSourceView(CreateView):
         system_user = User.objects.get(username='system')
         try:
             details = moa.get_details(barcode)
-        except (URLError, HTTPError):
+        except (URLError, HTTPError, ServerError):
             # Don't want to throw an error if the MoA server is down.
             # Should perhaps log this in some way so it can be followed up.
             pass
@@ -2,14 +2,22 @@ import string
 from django import template
 from django.urls import reverse, reverse_lazy
 
+from app.linkeddata.cursor import CursorPage
+
 register = template.Library()
 
 
-@register.inclusion_tag('_alpha_browse.html')
-def alpha_browse(entity, active):
+@register.inclusion_tag('_alpha_browse.html', takes_context=True)
+def alpha_browse(context, entity, active):
     entity_link = '{}-alpha-list'.format(entity)
     list_alpha = ('a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q','r','s','t','u','v','w','x','y','z')
-    return {'letters': list_alpha,
+    # Counts are only known for lists that have been indexed by browse letter
+    counts = context.get('letter_counts')
+    if counts is None:
+        letters = [(letter, None) for letter in list_alpha]
+    else:
+        letters = [(letter, counts.get(letter, (0, None))[0]) for letter in list_alpha]
+    return {'letters': letters,
             'entity_link': entity_link,
             'active': active}
 
@@ -27,6 +35,20 @@ def paginate(context, entity, number):
         entity_link = '{}-list'.format(entity)
     page = context['content']
     queries = context['queries']
+    if isinstance(page, CursorPage):
+        # Cursor pages only know the way forward
+        next_queries = queries.copy()
+        if page.has_next():
+            next_queries['after'] = page.next_cursor
+        first_queries = queries.copy()
+        first_queries['after'] = ''
+        return {'entity_link': entity_link,
+                'entity_id': entity_id,
+                'page': page,
+                'cursor': True,
+                'letter': letter,
+                'first_queries': first_queries,
+                'next_queries': next_queries}
     pages = page.paginator.page_range
     current = page.number
     number = int(number)
@@ -9,6 +9,8 @@ from app.people.views import *
 from app.sources.views import *
 from app.places.views import *
 from app.memorials.views import *
+from app.search.views import SearchView
+from app.generic.views import BatchMergeView
 
 admin.autodiscover()
 
@@ -24,10 +26,10 @@ admin.autodiscover()
 # app.sources.views
 urlpatterns = [
     re_path(r'^sources/$', SourceListView.as_view(), name="source-list"),
-    url(r'^sources/results\.(?P<format>(html|rdf|json|ttl))/$', SourceListView.as_view()),
+    url(r'^sources/results\.(?P<format>(html|rdf|json|ttl|nt))/$', SourceListView.as_view()),
     url(r'^sources/(?P<letter>[a-zA-Z]{1})/$', SourceListView.as_view(), name="source-alpha-list"),
-    url(r'^sources/(?P<letter>[a-zA-Z]{1})/results\.(?P<format>(html|rdf|json|ttl))/$', SourceListView.as_view()),
-    url(r'^sources/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', SourceView.as_view()),
+    url(r'^sources/(?P<letter>[a-zA-Z]{1})/results\.(?P<format>(html|rdf|json|ttl|nt))/$', SourceListView.as_view()),
+    url(r'^sources/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', SourceView.as_view()),
     url(r'^sources/(?P<id>\d+)/$', SourceView.as_view(), name='source-view'),
     url(r'^sources/add/$', AddSourceView.as_view(), name='source-add'),
     # url(r'^sources/add/(?P<entity_type>person)/(?P<entity_id>\d+)/$', AddSourceView.as_view(), name='source-add-person'),
@@ -41,11 +43,11 @@ urlpatterns = [
     url(r'^sources/(?P<pk>\d+)/delete/$', DeleteSource.as_view(), name='source-delete'),
 
     url(r'^images/$', ImageListView.as_view(), name="image-list"),
-    url(r'^images/results\.(?P<format>(html|rdf|json|ttl))/$', ImageListView.as_view()),
+    url(r'^images/results\.(?P<format>(html|rdf|json|ttl|nt))/$', ImageListView.as_view()),
 
     url(r'^stories/$', StoryListView.as_view(), name="story-list"),
-    url(r'^stories/results\.(?P<format>(html|rdf|json|ttl))/$', StoryListView.as_view()),
-    url(r'^stories/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', StoryView.as_view()),
+    url(r'^stories/results\.(?P<format>(html|rdf|json|ttl|nt))/$', StoryListView.as_view()),
+    url(r'^stories/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', StoryView.as_view()),
     url(r'^stories/(?P<id>\d+)/$', StoryView.as_view(), name='story-view'),
     url(r'^stories/add/$', AddStory.as_view(), name='story-add'),
     url(r'^stories/add/(?P<entity_type>person)/(?P<entity_id>\d+)/$', AddStory.as_view(), name='story-add-entity'),
@@ -59,11 +61,11 @@ urlpatterns += [
         name='source-creator-add'),
     url(r'^people/$', PersonListView.as_view(), name="people-list"),
     url(r'^people/(?P<letter>[a-zA-Z]{1})/$', PersonListView.as_view(), name="people-alpha-list"),
-    url(r'^people/results\.(?P<format>(html|rdf|json|ttl))/$', PersonListView.as_view()),
-    url(r'^people/(?P<letter>[a-zA-Z]{1})/results\.(?P<format>(html|rdf|json|ttl))/$', PersonListView.as_view()),
-    url(r'^people/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', PersonView.as_view()),
+    url(r'^people/results\.(?P<format>(html|rdf|json|ttl|nt))/$', PersonListView.as_view()),
+    url(r'^people/(?P<letter>[a-zA-Z]{1})/results\.(?P<format>(html|rdf|json|ttl|nt))/$', PersonListView.as_view()),
+    url(r'^people/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', PersonView.as_view()),
     url(r'^people/(?P<id>\d+)/$', PersonView.as_view(), name='person-view'),
-    url(r'^people/(?P<id>\d+)/photos\.(?P<format>(html|rdf|json|ttl))/$', PersonPhotosView.as_view()),
+    url(r'^people/(?P<id>\d+)/photos\.(?P<format>(html|rdf|json|ttl|nt))/$', PersonPhotosView.as_view()),
     url(r'^people/(?P<id>\d+)/photos/$', PersonPhotosView.as_view(), name='person-photos-view'),
 
     url(r'^people/add/$', AddPerson.as_view(), name="person-add"),
@@ -77,11 +79,11 @@ urlpatterns += [
     url(r'^people/(?P<id>\d+)/merge/$', PersonMergeView.as_view(), name="person-merge"),
 
     url(r'^organisations/$', OrganisationListView.as_view(), name="organisation-list"),
-    url(r'^organisations/results\.(?P<format>(html|rdf|json|ttl))/$', OrganisationListView.as_view()),
-    url(r'^organisations/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', OrganisationView.as_view()),
+    url(r'^organisations/results\.(?P<format>(html|rdf|json|ttl|nt))/$', OrganisationListView.as_view()),
+    url(r'^organisations/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', OrganisationView.as_view()),
     url(r'^organisations/(?P<id>\d+)/$', OrganisationView.as_view(), name='organisation-view'),
     url(r'^organisations/(?P<letter>[a-zA-Z]{1})/$', OrganisationListView.as_view(), name="organisation-alpha-list"),
-    url(r'^organisations/(?P<letter>[a-zA-Z]{1})/results\.(?P<format>(html|rdf|json|ttl))/$',
+    url(r'^organisations/(?P<letter>[a-zA-Z]{1})/results\.(?P<format>(html|rdf|json|ttl|nt))/$',
         OrganisationListView.as_view()),
 
     url(r'^organisations/add/$', AddOrganisation.as_view(), name="organisation-add"),
@@ -91,37 +93,37 @@ urlpatterns += [
     url(r'^organisations/(?P<pk>\d+)/delete/$', DeleteOrganisation.as_view(), name='organisation-delete'),
     url(r'^organisations/(?P<id>\d+)/merge/$', OrganisationMergeView.as_view(), name="organisation-merge"),
 
-    url(r'^people/names/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', AltNameView.as_view()),
+    url(r'^people/names/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', AltNameView.as_view()),
     url(r'^people/names/(?P<id>\d+)/$', AltNameView.as_view(), name='altname-view'),
     url(r'^people/names/(?P<pk>\d+)/update/$', UpdateAltName.as_view(), name='altname-update'),
     url(r'^people/(?P<person_id>\d+)/names/add/$', AddAltName.as_view(), name='altname-add'),
     url(r'^people/names/(?P<pk>\d+)/delete/$', DeleteAltName.as_view(), name='altname-delete'),
 
-    url(r'^people/ranks/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', RankView.as_view()),
+    url(r'^people/ranks/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', RankView.as_view()),
     url(r'^people/ranks/(?P<id>\d+)/$', RankView.as_view(), name='rank-view'),
     url(r'^people/ranks/(?P<pk>\d+)/update/$', UpdateRank.as_view(), name='rank-update'),
     url(r'^people/(?P<person_id>\d+)/ranks/add/$', AddRank.as_view(), name='rank-add'),
     url(r'^people/ranks/(?P<pk>\d+)/delete/$', DeleteRank.as_view(), name='rank-delete'),
 
-    url(r'^people/servicenumbers/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', ServiceNumberView.as_view()),
+    url(r'^people/servicenumbers/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', ServiceNumberView.as_view()),
     url(r'^people/servicenumbers/(?P<id>\d+)/$', ServiceNumberView.as_view(), name='servicenumber-view'),
     url(r'^people/servicenumbers/(?P<pk>\d+)/update/$', UpdateServiceNumber.as_view(), name='servicenumber-update'),
     url(r'^people/(?P<person_id>\d+)/servicenumbers/add/$', AddServiceNumber.as_view(), name='servicenumber-add'),
     url(r'^people/servicenumbers/(?P<pk>\d+)/delete/$', DeleteServiceNumber.as_view(), name='servicenumber-delete'),
 
-    url(r'^people/births/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', BirthView.as_view()),
+    url(r'^people/births/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', BirthView.as_view()),
     url(r'^people/births/(?P<id>\d+)/$', BirthView.as_view(), name='birth-view'),
     url(r'^people/births/(?P<pk>\d+)/update/$', UpdateBirth.as_view(), name='birth-update'),
     url(r'^people/(?P<person_id>\d+)/births/add/$', AddBirth.as_view(), name='birth-add'),
     url(r'^people/births/(?P<pk>\d+)/delete/$', DeleteBirth.as_view(), name='birth-delete'),
 
-    url(r'^people/deaths/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', DeathView.as_view()),
+    url(r'^people/deaths/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', DeathView.as_view()),
     url(r'^people/deaths/(?P<id>\d+)/$', DeathView.as_view(), name='death-view'),
     url(r'^people/deaths/(?P<pk>\d+)/update/$', UpdateDeath.as_view(), name='death-update'),
     url(r'^people/(?P<person_id>\d+)/deaths/add/$', AddDeath.as_view(), name='death-add'),
     url(r'^people/deaths/(?P<pk>\d+)/delete/$', DeleteDeath.as_view(), name='death-delete'),
 
-    url(r'^people/events/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', LifeEventView.as_view()),
+    url(r'^people/events/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', LifeEventView.as_view()),
     url(r'^people/events/(?P<id>\d+)/$', LifeEventView.as_view(), name='lifeevent-view'),
     url(r'^people/events/(?P<pk>\d+)/update/$', UpdateLifeEvent.as_view(), name='lifeevent-update'),
     url(r'^people/(?P<person_id>\d+)/events/add/$', AddLifeEvent.as_view(), name='lifeevent-add'),
@@ -131,7 +133,7 @@ urlpatterns += [
     url(r'^people/events/(?P<event_id>\d+)/locations/add/$', AddEventLocation.as_view(), name='eventlocation-add'),
     url(r'^people/events/locations/(?P<pk>\d+)/delete/$', DeleteEventLocation.as_view(), name='eventlocation-delete'),
 
-    url(r'^people/relationships/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', PersonRelationshipView.as_view()),
+    url(r'^people/relationships/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', PersonRelationshipView.as_view()),
     url(r'^people/relationships/(?P<id>\d+)/$', PersonRelationshipView.as_view(), name='person-relationship-view'),
     url(r'^people/relationships/(?P<pk>\d+)/update/$', UpdatePersonAssociatedPerson.as_view(),
         name='persontoperson-update'),
@@ -140,7 +142,7 @@ urlpatterns += [
     url(r'^people/relationships/(?P<pk>\d+)/delete/$', DeletePersonAssociatedPerson.as_view(),
         name='persontoperson-delete'),
 
-    url(r'^people/memberships/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', PersonMembershipView.as_view()),
+    url(r'^people/memberships/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', PersonMembershipView.as_view()),
     url(r'^people/memberships/(?P<id>\d+)/$', PersonMembershipView.as_view(), name='person-membership-view'),
     url(r'^people/memberships/(?P<pk>\d+)/update/$', UpdatePersonAssociatedOrganisation.as_view(),
         name='personorganisation-update'),
@@ -149,18 +151,18 @@ urlpatterns += [
     url(r'^people/memberships/(?P<pk>\d+)/delete/$', DeletePersonAssociatedOrganisation.as_view(),
         name='personorganisation-delete'),
 
-    url(r'^people/addresses/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', PersonAddressView.as_view()),
+    url(r'^people/addresses/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', PersonAddressView.as_view()),
     url(r'^people/addresses/(?P<id>\d+)/$', PersonAddressView.as_view(), name='personaddress-view'),
     url(r'^people/addresses/(?P<pk>\d+)/update/$', UpdatePersonAddress.as_view(), name='personaddress-update'),
     url(r'^people/(?P<person_id>\d+)/addresses/add/$', AddPersonAddress.as_view(), name='personaddress-add'),
     url(r'^people/addresses/(?P<pk>\d+)/delete/$', DeletePersonAddress.as_view(), name='personaddress-delete'),
 
     url(r'^places/$', PlaceListView.as_view(), name="place-list"),
-    url(r'^places/results\.(?P<format>(html|rdf|json|ttl))/$', PlaceListView.as_view()),
+    url(r'^places/results\.(?P<format>(html|rdf|json|ttl|nt))/$', PlaceListView.as_view()),
     url(r'^places/(?P<letter>[a-zA-Z]{1})/$', PlaceListView.as_view(), name="place-alpha-list"),
-    url(r'^places/(?P<letter>[a-zA-Z]{1})/results\.(?P<format>(html|rdf|json|ttl))/$', PlaceListView.as_view()),
+    url(r'^places/(?P<letter>[a-zA-Z]{1})/results\.(?P<format>(html|rdf|json|ttl|nt))/$', PlaceListView.as_view()),
     url(r'^places/(?P<id>\d+)/$', PlaceView.as_view(), name='place-view'),
-    url(r'^places/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', PlaceView.as_view()),
+    url(r'^places/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', PlaceView.as_view()),
     url(r'^places/(?P<pk>\d+)/update/$', UpdatePlace.as_view(), name='place-update'),
     url(r'^places/add/(?P<entity_type>(births|deaths|address))/(?P<entity_id>\d+)/$', AddPlace.as_view(),
         name='place-add-entity'),
@@ -168,33 +170,33 @@ urlpatterns += [
     url(r'^places/(?P<id>\d+)/merge/$', PlaceMergeView.as_view(), name="place-merge"),
 
     url(r'^addresses/$', AddressListView.as_view(), name="address-list"),
-    url(r'^addresses/results\.(?P<format>(html|rdf|json|ttl))/$', AddressListView.as_view()),
+    url(r'^addresses/results\.(?P<format>(html|rdf|json|ttl|nt))/$', AddressListView.as_view()),
     url(r'^addresses/(?P<id>\d+)/$', AddressView.as_view(), name='address-view'),
-    url(r'^addresses/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', AddressView.as_view()),
+    url(r'^addresses/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', AddressView.as_view()),
     url(r'^addresses/(?P<pk>\d+)/update/$', UpdateAddress.as_view(), name='address-update'),
     url(r'^addresses/add/$', AddAddress.as_view(), name='address-add'),
     url(r'^addresses/(?P<pk>\d+)/delete/$', DeleteAddress.as_view(), name='address-delete'),
     url(r'^addresses/add/(?P<entity_type>(person|personaddress))/(?P<entity_id>\d+)/$', AddAddress.as_view(),
         name='address-add-entity'),
     url(r'^mosmanstreets/$', MosmanStreetListView.as_view(), name="mosmanstreet-list"),
-    url(r'^mosmanstreets/results\.(?P<format>(html|rdf|json|ttl))/$', MosmanStreetListView.as_view()),
+    url(r'^mosmanstreets/results\.(?P<format>(html|rdf|json|ttl|nt))/$', MosmanStreetListView.as_view()),
     url(r'^mosmanstreets/(?P<id>\d+)/$', MosmanStreetView.as_view(), name='mosmanstreet-view'),
-    url(r'^mosmanstreets/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', MosmanStreetView.as_view()),
+    url(r'^mosmanstreets/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', MosmanStreetView.as_view()),
 ]
 
 # app.memorials.views
 urlpatterns += [
     url(r'^memorials/$', MemorialListView.as_view(), name="memorial-list"),
     url(r'^memorials/results/$', MemorialListView.as_view(), name="memorial-list"),
-    url(r'^memorials/results\.(?P<format>(html|rdf|json|ttl))/$', MemorialListView.as_view()),
+    url(r'^memorials/results\.(?P<format>(html|rdf|json|ttl|nt))/$', MemorialListView.as_view()),
     url(r'^memorials/(?P<id>\d+)/$', MemorialView.as_view(), name='memorial-view'),
-    url(r'^memorials/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl))/$', MemorialView.as_view(), name='memorial-view'),
-    url(r'^memorials/(?P<id>\d+)/photos\.(?P<format>(html|rdf|json|ttl))/$', MemorialPhotosView.as_view()),
+    url(r'^memorials/(?P<id>\d+)\.(?P<format>(html|rdf|json|ttl|nt))/$', MemorialView.as_view(), name='memorial-view'),
+    url(r'^memorials/(?P<id>\d+)/photos\.(?P<format>(html|rdf|json|ttl|nt))/$', MemorialPhotosView.as_view()),
     url(r'^memorials/(?P<id>\d+)/photos/$', MemorialPhotosView.as_view(), name='memorial-photos-view'),
-    url(r'^memorials/(?P<memorial_id>\d+)/names/results\.(?P<format>(html|rdf|json|ttl))/$',
+    url(r'^memorials/(?P<memorial_id>\d+)/names/results\.(?P<format>(html|rdf|json|ttl|nt))/$',
         MemorialNamesView.as_view()),
     url(r'^memorials/(?P<memorial_id>\d+)/names/$', MemorialNamesView.as_view(), name='memorial-names-list'),
-    url(r'^memorials/parts/(?P<part_id>\d+)/results\.(?P<format>(html|rdf|json|ttl))/$',
+    url(r'^memorials/parts/(?P<part_id>\d+)/results\.(?P<format>(html|rdf|json|ttl|nt))/$',
         MemorialPartNamesView.as_view()),
     url(r'^memorials/parts/(?P<part_id>\d+)/$', MemorialPartNamesView.as_view(), name='memorial-part-names-list'),
 ]
@@ -202,6 +204,9 @@ urlpatterns += [
     url(r'^$', HomeView.as_view(), name='home'),
     url(r'^locale/$', view_locale),
     url(r'^contribute/$', ContributeView.as_view(), name='contribute'),
+    url(r'^search/$', SearchView.as_view(), name='search'),
+    url(r'^search/results\.(?P<format>(html|json))/$', SearchView.as_view()),
+    url(r'^merge/$', BatchMergeView.as_view(), name='batch-merge'),
     url(r'^accounts/', include('django_registration.backends.activation.urls')),
     url(r'^accounts/', include('django.contrib.auth.urls')),
     url(r'^ckeditor/', include('ckeditor_uploader.urls')),
@@ -0,0 +1,45 @@
+import os
+
+try:
+    from client import RollClient, EmbarkationClient, CollectionClient, AWMBioSearchClient
+except ImportError:
+    from awmtools.client import RollClient, EmbarkationClient, CollectionClient, AWMBioSearchClient
+
+'''
+Parse benchmarks for saved AWM pages, run by fetchtools.benchmarks.
+
+USAGE:
+
+python -m fetchtools.benchmarks awmtools
+
+> awmtools roll: <time> ms per page
+> ...
+
+The fixtures are AWM people, collection and search results pages trimmed
+down to their layout.
+'''
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def details(client, html):
+    return client.get_details(soup=client.make_soup(html))
+
+
+def search_results(client, html):
+    soup = client.make_soup(html)
+    return {'total_results': client._get_total_results(soup), 'results': client._process_page(soup)}
+
+
+# (page type, fixture, client, extract(client, html))
+BENCHMARKS = [
+    ('roll', 'roll-R1497513.html', RollClient, details),
+    ('embarkation', 'embarkation-R1932371.html', EmbarkationClient, details),
+    ('collection', 'collection-P03149.002.html', CollectionClient, details),
+    ('search', 'search-roll_of_honour-smith.html', AWMBioSearchClient, search_results),
+]
+
+
+if __name__ == '__main__':
+    from fetchtools.benchmarks import main
+    main(['awmtools'])
@@ -1,15 +1,20 @@
 import re
-import urllib
+import socket
 
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 from urllib.error import HTTPError
-from urllib.request import urlopen, Request
+from urllib.parse import urlencode
 
 try:
     from utilities import retry
 except ImportError:
     from awmtools.utilities import retry
 
+from fetchtools.cache import get_cache
+from fetchtools.paging import iter_results
+from fetchtools.parsing import make_soup
+from fetchtools.session import get_session
+
 '''
 A basic scraper/client library for WWI resources held by
 the Australian War Memorial.
@@ -136,16 +141,32 @@ class BaseClient:
 
     AWM_URL = 'http://www.awm.gov.au'
 
+    # The part of the page to parse, or None for all of it
+    PARSE_ONLY = None
+
     def __init__(self):
         self.soup = None
 
+    def _has_content(self, soup):
+        """ Check that a partly parsed page has what's needed, or the whole page is parsed instead. """
+        return True
+
+    def make_soup(self, html):
+        """ Parse a page, or just the part of it given by PARSE_ONLY. """
+        return make_soup(html, self.PARSE_ONLY, self._has_content)
+
+    def _get_url(self, url):
+        """ Retrieve the supplied url, from the response cache if possible."""
+        return get_cache().fetch(url, self._open_url)
+
     # Uncomment the next line to retry in the case of a timeout error.
     # @retry(ServerError, tries=10, delay=1)
-    def _get_url(self, url):
+    def _open_url(self, url, headers, data=None):
         """ Try to retrieve the supplied url."""
-        req = Request(url)
         try:
-            response = urlopen(req)
+            response = get_session().open(url, headers, data)
+        except socket.timeout:
+            raise ServerError("The server didn't respond")
         except HTTPError as e:
             if e.code == 503 or e.code == 504:
                 raise ServerError("The server didn't respond")
@@ -165,7 +186,7 @@ class BaseClient:
                 raise UsageError('Please supply a valid URL.')
         elif not soup:
             response = self._get_url(url)
-            soup = BeautifulSoup(response.read())
+            soup = self.make_soup(response.read())
         self.soup = soup
         return soup
 
@@ -176,6 +197,12 @@ class WWIBiogClient(BaseClient):
     """
     FIELDS = {}
 
+    # The entry's title and fields are all inside the content div
+    PARSE_ONLY = SoupStrainer('div', id='content')
+
+    def _has_content(self, soup):
+        return soup.find('h1', 'pagetitle') is not None
+
     def get_title(self, soup=None, url=None):
         """ Get the title of this entry. """
         if soup is None:
@@ -187,23 +214,36 @@ class WWIBiogClient(BaseClient):
         """ Get the name of the person described by this entry. """
         return title.split(' - ')[1].strip() if title else None
 
-    def _get_field_value(self, soup, field):
-        """ Get the text value of the requested field. """
-        try:
-            value = ''
-            for sibling in soup.find('strong', text=field).next_siblings:
-                value += sibling.string
-        except AttributeError:
-            value = ''
-        return value
-
-    def _get_field_values(self, soup, field):
-        """ Get a list of values from the requested field. """
-        try:
-            value_list = soup.find('strong', text=field).parent.parent.find_all('li')
-            values = [name.string.strip() for name in value_list]
-        except AttributeError:
-            values = []
+    def _get_fields(self):
+        """ Map each field label to its slug, and whether it has a list of values. Built once per class. """
+        cls = type(self)
+        if '_fields' not in cls.__dict__:
+            fields = {}
+            for field in self.FIELDS['single_value']:
+                fields[field] = (self._process_fieldname(field), False)
+            for field in self.FIELDS['multiple_value']:
+                fields[field] = (self._process_fieldname(field), True)
+            cls._fields = fields
+        return cls._fields
+
+    def _get_field_values(self, soup):
+        """ Get the values of all the fields in one pass over the labels. """
+        fields = self._get_fields()
+        values = {}
+        for label in soup.find_all('strong'):
+            field = label.string
+            if field not in fields or fields[field][0] in values:
+                continue
+            fieldname, multiple = fields[field]
+            if multiple:
+                try:
+                    values[fieldname] = [name.string.strip() for name in label.parent.parent.find_all('li')]
+                except AttributeError:
+                    values[fieldname] = []
+            else:
+                values[fieldname] = ''.join([sibling.string or '' for sibling in label.next_siblings])
+        for fieldname, multiple in fields.values():
+            values.setdefault(fieldname, [] if multiple else '')
         return values
 
     def get_pdf_link(self, soup=None, url=None):
@@ -227,12 +267,7 @@ class WWIBiogClient(BaseClient):
         soup = self._get_soup(soup, url)
         title = self.get_title(soup)
         details = {'title': title, 'name': self.get_name(title)}
-        for field in self.FIELDS['single_value']:
-            fieldname = self._process_fieldname(field)
-            details[fieldname] = self._get_field_value(soup, field)
-        for field in self.FIELDS['multiple_value']:
-            fieldname = self._process_fieldname(field)
-            details[fieldname] = self._get_field_values(soup, field)
+        details.update(self._get_field_values(soup))
         details['pdf_link'] = self.get_pdf_link(soup)
         return details
 
@@ -440,12 +475,15 @@ class CollectionClient(BaseClient):
 class AWMBioSearchClient(BaseClient):
     FIELDS = ['name', 'service_number', 'unit', 'conflict', 'award']
 
-    def search(self, db, **kwargs):
-        params = urllib.urlencode(kwargs)
+    def search(self, db, page=None, **kwargs):
+        """ Get a page of results from a search of db (e.g. 'roll_of_honour'). Pages start at 1. """
+        if page and page > 1:
+            # The site counts pages from 0
+            kwargs['page'] = page - 1
+        params = urlencode(kwargs)
         url = '{}/research/people/{}/?{}&op=Search'.format(self.AWM_URL, db, params)
         response = self._get_url(url)
-        soup = BeautifulSoup(response.read())
-        # print soup
+        soup = self.make_soup(response.read())
         total_results = self._get_total_results(soup)
         results = self._process_page(soup)
         return {
@@ -453,6 +491,15 @@ class AWMBioSearchClient(BaseClient):
             'results': results
         }
 
+    def iter_search(self, db, **kwargs):
+        """ Yield the results from every page of a search, fetching each page while the one before is used. """
+        first = self.search(db, **kwargs)
+        yield from iter_results(
+            first['results'],
+            lambda page: self.search(db, page=page, **kwargs)['results'],
+            first['total_results']
+        )
+
     def _process_page(self, soup):
         results = []
         try:
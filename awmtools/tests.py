@@ -0,0 +1,71 @@
+import unittest
+
+try:
+    from client import RollClient, EmbarkationClient, CollectionClient, AWMBioSearchClient
+except ImportError:
+    from awmtools.client import RollClient, EmbarkationClient, CollectionClient, AWMBioSearchClient
+
+from fetchtools.replay import ReplayTestCase
+
+
+class TestRollFunctions(ReplayTestCase):
+
+    url = 'http://www.awm.gov.au/people/rolls/R1497513/'
+
+    def test_get_details(self):
+        details = RollClient().get_details(url=self.url)
+        self.assertEqual(details['name'], 'Walter John Neville Newbold')
+        self.assertEqual(details['rank'].strip(), 'Private')
+        self.assertEqual(details['unit'].strip(), '13th Battalion (Infantry)')
+        self.assertEqual(details['also_known_as'], ['Frederick Neville Smith'])
+        self.assertEqual(details['cemetery_or_memorial_details'], '')
+        self.assertIsNone(details['pdf_link'])
+
+    def test_get_title(self):
+        self.assertEqual(RollClient().get_title(url=self.url), 'Roll of Honour - Walter John Neville Newbold')
+
+
+class TestEmbarkationFunctions(ReplayTestCase):
+
+    def test_get_details(self):
+        details = EmbarkationClient().get_details(url='http://www.awm.gov.au/people/rolls/R1932371/')
+        self.assertEqual(details['ship_embarked_on'].strip(), 'HMAT Hororata')
+        self.assertEqual(
+            details['pdf_link'],
+            'http://www.awm.gov.au/collection/records/awm8/23/39/awm8-23-39-4-0126.pdf'
+        )
+
+
+class TestCollectionFunctions(ReplayTestCase):
+
+    def setUp(self):
+        super(TestCollectionFunctions, self).setUp()
+        self.client = CollectionClient()
+        self.client.get_details(url='http://www.awm.gov.au/collection/P03149.002')
+
+    def test_get_licence(self):
+        self.assertEqual(self.client.get_licence(), 'Copyright expired - public domain')
+
+    def test_get_img_url(self):
+        self.assertEqual(
+            self.client.get_img_url(),
+            'http://www.awm.gov.au/collection/images/screen/P03149.002.jpg'
+        )
+
+
+class TestSearchFunctions(ReplayTestCase):
+
+    def test_search(self):
+        results = AWMBioSearchClient().search('roll_of_honour', surname='smith')
+        self.assertEqual(results['total_results'], 5)
+        self.assertEqual(len(results['results']), 3)
+        self.assertEqual(results['results'][0]['url'], 'http://www.awm.gov.au/people/rolls/R1497513/')
+
+    def test_iter_search(self):
+        results = list(AWMBioSearchClient().iter_search('roll_of_honour', surname='smith'))
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[-1]['name'], 'William Smith')
+
+
+if __name__ == '__main__':
+    unittest.main()
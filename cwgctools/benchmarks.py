@@ -0,0 +1,42 @@
+import os
+
+try:
+    from client import CWGCClient
+except ImportError:
+    from cwgctools.client import CWGCClient
+
+'''
+Parse benchmarks for saved CWGC pages, run by fetchtools.benchmarks.
+
+USAGE:
+
+python -m fetchtools.benchmarks cwgctools
+
+> cwgctools casualty: <time> ms per page
+> cwgctools search: <time> ms per page
+
+The fixtures are a CWGC casualty page and a page of search results
+trimmed down to their layout.
+'''
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def casualty_details(client, html):
+    return client.parse_details(html, 'http://www.cwgc.org/find-war-dead/casualty/313405/')
+
+
+def search_results(client, html):
+    return {'results': client._process_page(html), 'total_results': client._get_total_results(html)}
+
+
+# (page type, fixture, client, extract(client, html))
+BENCHMARKS = [
+    ('casualty', 'casualty-313405.html', CWGCClient, casualty_details),
+    ('search', 'search-mosman.html', CWGCClient, search_results),
+]
+
+
+if __name__ == '__main__':
+    from fetchtools.benchmarks import main
+    main(['cwgctools'])
@@ -1,12 +1,19 @@
-from bs4 import BeautifulSoup
-from urllib.request import urlopen, Request, HTTPError
+from bs4 import SoupStrainer
+from urllib.error import HTTPError
 import urllib
 import mechanize
 import sys
 import re
+import socket
 
 import logging
 
+from fetchtools.cache import get_cache
+from fetchtools.paging import iter_results
+from fetchtools.parsing import make_soup
+from fetchtools.replay import ReplayHandler
+from fetchtools.session import get_session
+
 #logger = logging.getLogger("mechanize")
 #logger.addHandler(logging.StreamHandler(sys.stdout))
 #logger.setLevel(logging.DEBUG)
@@ -25,6 +32,11 @@ class CWGCClient():
 
     'url' is the url of an individual entry for a person in the CWGC database.
 
+    for result in cwgc.iter_search(surname='Crisford'):
+        ...
+
+    yields the results from every page of a search.
+
     SAMPLE RESULTS:
 
     {
@@ -76,19 +88,42 @@ class CWGCClient():
         'cemetery'
     ]
 
+    # Other labelled fields, and the keys they're saved under
+    OTHER_FIELDS = {
+        'Regiment/Service:': 'service',
+        '\xa0': 'unit',
+        '\xc2\xa0': 'unit',
+        'Country:': 'country',
+        'Locality:': 'locality',
+    }
+
+    # Search results pages only need the results table and the total
+    RESULTS_ONLY = SoupStrainer(id='dataTable')
+    TOTAL_ID = 'ContentPlaceHolderDefault_cpMain_ctlCasualtySearch_pnlPaginationTop'
+    TOTAL_ONLY = SoupStrainer(id=TOTAL_ID)
+
     CWGC_URL = 'http://www.cwgc.org'
     SEARCH_URL = 'http://www.cwgc.org/find-war-dead.aspx'
 
     def __init__(self):
         self.br = None
-
-    def _get_field_value(self, soup, field):
-        ''' Get the value of a field. '''
-        try:
-            value = soup.find('dt', text=field).find_next_sibling('dd').string.strip()
-        except AttributeError:
-            value = ''
-        return value
+        self.fields = {field: self._process_fieldname(field) for field in self.FIELDS}
+        self.fields.update(self.OTHER_FIELDS)
+
+    def _get_field_values(self, soup):
+        ''' Get the values of all the labelled fields in one pass over the labels. '''
+        values = {}
+        for label in soup.find_all('dt'):
+            fieldname = self.fields.get(label.string)
+            if fieldname is None or fieldname in values:
+                continue
+            try:
+                values[fieldname] = label.find_next_sibling('dd').string.strip()
+            except AttributeError:
+                values[fieldname] = ''
+        for fieldname in self.fields.values():
+            values.setdefault(fieldname, '')
+        return values
 
     def _get_name(self, soup):
         ''' Get the person's name. '''
@@ -102,23 +137,22 @@ class CWGCClient():
             info = ''
         return info
 
-    def _get_service(self, soup):
-        ''' Get service and unit details. '''
-        service = self._get_field_value(soup, 'Regiment/Service:')
-        unit = self._get_field_value(soup, '\xc2\xa0')
-        return {'service': service, 'unit': unit}
-
     def _process_fieldname(self, field):
         ''' Slugify fieldnames '''
         return field.lower().replace(' ', '_').replace(':', '')
 
+    def _get_url(self, url):
+        ''' Retrieve the supplied url, from the response cache if possible.'''
+        return get_cache().fetch(url, self._open_url)
+
     # Uncomment the next line to retry in the case of a timeout error.
     #@retry(ServerError, tries=10, delay=1)
-    def _get_url(self, url):
+    def _open_url(self, url, headers, data=None):
         ''' Try to retrieve the supplied url.'''
-        req = Request(url)
         try:
-            response = urlopen(req)
+            response = get_session().open(url, headers, data)
+        except socket.timeout:
+            raise ServerError("The server didn't respond")
         except HTTPError as e:
             if e.code == 503 or e.code == 504:
                 raise ServerError("The server didn't respond")
@@ -130,19 +164,25 @@ class CWGCClient():
     def get_details(self, url):
         ''' Return all the extracted details for the supplied url.'''
         response = self._get_url(url)
-        soup = BeautifulSoup(response.read())
+        return self.parse_details(response.read(), url)
+
+    def parse_details(self, html, url):
+        ''' Return all the extracted details from the html of the page at url.'''
+        soup = make_soup(html)
+        values = self._get_field_values(soup)
         details = {}
         details['url'] = url
         details['name'] = self._get_name(soup)
         for field in self.FIELDS:
             fieldname = self._process_fieldname(field)
-            details[fieldname] = self._get_field_value(soup, field)
+            details[fieldname] = values[fieldname]
         details['additional_information'] = self._get_additional_info(soup)
-        details.update(self._get_service(soup))
-        details['cemetery'] = self._get_cemetery(soup)
+        details['service'] = values['service']
+        details['unit'] = values['unit']
+        details['cemetery'] = self._get_cemetery(soup, values)
         return details
 
-    def _get_cemetery(self, soup):
+    def _get_cemetery(self, soup, values):
         ''' Get the basic cemetery details. '''
         cemetery = {}
         try:
@@ -153,14 +193,14 @@ class CWGCClient():
             )
         except AttributeError:
             cemetery['name'] = None
-        cemetery['country'] = self._get_field_value(soup, 'Country:')
-        cemetery['locality'] = self._get_field_value(soup, 'Locality:')
+        cemetery['country'] = values['country']
+        cemetery['locality'] = values['locality']
         return cemetery
 
     def search(self, page=None, sort='name', **kwargs):
         ''' Search the db for matching results. '''
         if page and self.br:
-            html = self._get_page(page)
+            html = self._get_page(page, sort)
         elif kwargs:
             self._prepare_search(**kwargs)
             html = self._do_search(sort)
@@ -172,6 +212,18 @@ class CWGCClient():
         total_results = self._get_total_results(html)
         return {'results': results, 'total_results': total_results}
 
+    def iter_search(self, sort='name', **kwargs):
+        '''
+        Yield the results from every page of a search. Each page is
+        fetched while the results from the one before are being used.
+        '''
+        first = self.search(sort=sort, **kwargs)
+        yield from iter_results(
+            first['results'],
+            lambda page: self.search(page=page, sort=sort)['results'],
+            first['total_results']
+        )
+
     def _create_browser(self):
         self.br = mechanize.Browser()
         self.br.addheaders = [('User-agent',
@@ -182,6 +234,7 @@ class CWGCClient():
         self.br.set_handle_redirect(True)
         self.br.set_handle_referer(True)
         self.br.set_handle_refresh(mechanize._http.HTTPRefreshProcessor(), max_time=1)
+        self.br.add_handler(ReplayHandler())
 
     def _prepare_search(self, **kwargs):
         self._create_browser()
@@ -203,7 +256,7 @@ class CWGCClient():
         return html
 
     def _process_page(self, html):
-        soup = BeautifulSoup(html)
+        soup = make_soup(html, self.RESULTS_ONLY)
         results = []
         try:
             rows = soup.find(id='dataTable').tbody.find_all('tr')
@@ -233,9 +286,9 @@ class CWGCClient():
         return result
 
     def _get_total_results(self, html):
-        soup = BeautifulSoup(html)
+        soup = make_soup(html, self.TOTAL_ONLY)
         try:
-            totals = soup.find(id='ContentPlaceHolderDefault_cpMain_ctlCasualtySearch_pnlPaginationTop').p.string
+            totals = soup.find(id=self.TOTAL_ID).p.string
             total = re.search(r'(\d+) record', totals).group(1)
         except AttributeError:
             total = None
@@ -0,0 +1,54 @@
+import os
+import unittest
+
+try:
+    from client import CWGCClient
+except ImportError:
+    from cwgctools.client import CWGCClient
+
+from fetchtools.replay import ReplayTestCase
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class TestDetailsFunctions(ReplayTestCase):
+
+    url = 'http://www.cwgc.org/find-war-dead/casualty/313405/CRISFORD,%20WILFRED%20REGINALD%20EDGAR'
+
+    def test_get_details(self):
+        details = CWGCClient().get_details(self.url)
+        self.assertEqual(details['name'], 'CRISFORD, WILFRED REGINALD EDGAR')
+        self.assertEqual(details['rank'], 'Gunner')
+        self.assertEqual(details['service_no'], '9389')
+        self.assertEqual(details['service'], 'Australian Field Artillery')
+        self.assertEqual(details['unit'], '5th Bde.')
+        self.assertEqual(details['cemetery']['name'], 'QUEANT ROAD CEMETERY, BUISSY')
+        self.assertEqual(details['cemetery']['country'], 'France')
+
+
+class TestIterSearch(ReplayTestCase):
+
+    def test_iter_search(self):
+        results = list(CWGCClient().iter_search(surname='Crisford'))
+        self.assertEqual([result['name'] for result in results],
+                         ['Crisford, Wilfred Reginald Edgar', 'Smith, Albert', 'Jones, Harry', 'Brown, Thomas'])
+
+
+class TestSearchFunctions(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(FIXTURES, 'search-mosman.html'), 'rb') as fixture:
+            self.html = fixture.read()
+
+    def test_process_page(self):
+        results = CWGCClient()._process_page(self.html)
+        self.assertEqual([result['name'] for result in results],
+                         ['Crisford, Wilfred Reginald Edgar', 'Smith, Albert', 'Jones, Harry'])
+        self.assertIsNone(results[1]['age'])
+
+    def test_get_total_results(self):
+        self.assertEqual(CWGCClient()._get_total_results(self.html), '3')
+
+
+if __name__ == '__main__':
+    unittest.main()
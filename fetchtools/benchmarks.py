@@ -0,0 +1,82 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import timeit
+
+'''
+Time how long the scraper clients take to parse saved pages and extract
+their details, without any network access.
+
+Each package has a benchmarks module listing its page types, the fixture
+for each and the function that extracts its details. Timings can be saved
+and compared with a later run, to catch changes that slow parsing down.
+
+USAGE:
+
+python -m fetchtools.benchmarks [rstools awmtools cwgctools moatools]
+
+> rstools item: <time> ms per page
+> ...
+
+python -m fetchtools.benchmarks --save timings.json
+python -m fetchtools.benchmarks --compare timings.json
+
+Comparing exits with status 1 if any page type is more than --tolerance
+(default 25%) slower than the saved timing.
+
+Timings depend on the parser, so set HTML_PARSER to compare like with like.
+'''
+
+PACKAGES = ['rstools', 'awmtools', 'cwgctools', 'moatools']
+
+
+def run(packages=PACKAGES, number=200):
+    ''' Return a dict of 'package page' to seconds per page. '''
+    results = {}
+    for package in packages:
+        module = importlib.import_module('{}.benchmarks'.format(package))
+        for page, filename, client_class, extract in module.BENCHMARKS:
+            with open(os.path.join(module.FIXTURES, filename), 'rb') as fixture:
+                html = fixture.read()
+            client = client_class()
+            seconds = timeit.timeit(lambda: extract(client, html), number=number)
+            results['{} {}'.format(package, page)] = seconds / number
+    return results
+
+
+def compare(results, baseline, tolerance=0.25):
+    ''' Return (name, seconds, baseline seconds) for everything slower than the baseline allows. '''
+    return [
+        (name, seconds, baseline[name])
+        for name, seconds in sorted(results.items())
+        if name in baseline and seconds > baseline[name] * (1 + tolerance)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time parsing saved pages with the scraper clients.')
+    parser.add_argument('packages', nargs='*', default=PACKAGES)
+    parser.add_argument('--number', type=int, default=200, help='Times to parse each page')
+    parser.add_argument('--save', help='Save the timings to this JSON file')
+    parser.add_argument('--compare', help='Compare the timings with those saved in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Slowdown allowed when comparing')
+    args = parser.parse_args(argv)
+    results = run(args.packages, args.number)
+    for name, seconds in sorted(results.items()):
+        print('{}: {:.2f} ms per page'.format(name, seconds * 1000))
+    if args.save:
+        with open(args.save, 'w') as timings:
+            json.dump(results, timings, indent=4, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as timings:
+            slower = compare(results, json.load(timings), args.tolerance)
+        for name, seconds, before in slower:
+            print('{} is slower: {:.2f} ms per page, was {:.2f} ms'.format(name, seconds * 1000, before * 1000))
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
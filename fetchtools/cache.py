@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.error import HTTPError
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+'''
+A persistent cache of pages fetched by the scraper clients.
+
+The rstools, awmtools, cwgctools and moatools clients fetch the same NAA,
+AWM, CWGC and MoA pages every time a source is added or a record is
+re-imported. Pages are kept here in an SQLite database, so re-running an
+enrichment over existing records mostly reads from local disk.
+
+Entries are keyed by the normalised url (lower-case scheme and host, sorted
+query parameters, no fragment) and any form data. Each host has its own time
+to live. Stale entries that came with an ETag or Last-Modified header are
+revalidated with a conditional request, and if the server says 304 the stored
+page is used again.
+
+USAGE:
+
+from fetchtools.cache import get_cache
+
+response = get_cache().fetch(url, open_url)
+
+'open_url' is called as open_url(url, headers, data) when the page isn't in
+the cache. 'headers' are any validators to send, and it should return a
+response with read() or raise urllib's HTTPError.
+
+Some sites send error pages with a 200 status. Passing accept, a function
+that takes the page's body, keeps those out of the cache:
+
+response = get_cache().fetch(url, open_url, accept=lambda body: b'detailsTable' in body)
+
+SETTINGS (environment variables):
+
+HTTP_CACHE - set to 'off' to bypass the cache
+HTTP_CACHE_PATH - the database file (default: ~/.cache/mosman1418/http.sqlite)
+HTTP_REPLAY - answer requests from recorded fixtures instead (see fetchtools.replay)
+
+The cache can also be bypassed for a block of code:
+
+with get_cache().bypass():
+    ...
+'''
+
+DAY = 24 * 60 * 60
+
+# Seconds before a page from each host (or its subdomains) has to be checked again
+DEFAULT_TTLS = {
+    'recordsearch.naa.gov.au': 7 * DAY,
+    'www.naa.gov.au': 7 * DAY,
+    'mappingouranzacs.naa.gov.au': 30 * DAY,
+    'awm.gov.au': 30 * DAY,
+    'cwgc.org': 30 * DAY,
+}
+
+DEFAULT_TTL = DAY
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'mosman1418', 'http.sqlite')
+
+
+def normalise_url(url):
+    ''' Lower-case the scheme and host, sort the query and drop the fragment. '''
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+
+
+def normalise_data(data):
+    ''' Sort form data, given as a dict, a list of pairs or an encoded string. '''
+    if not data:
+        return ''
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    if isinstance(data, str):
+        data = parse_qsl(data, keep_blank_values=True)
+    elif isinstance(data, dict):
+        data = data.items()
+    return urlencode(sorted((str(key), str(value)) for key, value in data))
+
+
+class CachedResponse:
+    ''' A stored page, with the parts of a urllib response the clients use. '''
+
+    def __init__(self, url, body, headers=None, from_cache=True):
+        self.url = url
+        self.body = body
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    def read(self):
+        return self.body
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+
+class ResponseCache:
+
+    def __init__(self, path=DEFAULT_PATH, ttls=None, default_ttl=DEFAULT_TTL, enabled=True):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._local = threading.local()
+
+    @property
+    def db(self):
+        # sqlite connections can't be shared between threads
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, url TEXT, body BLOB, headers TEXT, '
+                'etag TEXT, last_modified TEXT, fetched REAL)'
+            )
+            self._local.db = db
+        return db
+
+    def key(self, url, data=None):
+        return hashlib.sha1('{} {}'.format(normalise_url(url), normalise_data(data)).encode('utf-8')).hexdigest()
+
+    def ttl(self, url):
+        ''' Find the time to live for the url's host, or the closest parent domain listed. '''
+        host = urlsplit(url).hostname or ''
+        while host:
+            if host in self.ttls:
+                return self.ttls[host]
+            host = host.partition('.')[2]
+        return self.default_ttl
+
+    def _lookup(self, key):
+        return self.db.execute(
+            'SELECT url, body, headers, etag, last_modified, fetched FROM responses WHERE key = ?', (key,)
+        ).fetchone()
+
+    def get(self, url, data=None):
+        ''' Return the stored page if it's still fresh, otherwise None. '''
+        if not self.enabled:
+            return None
+        row = self._lookup(self.key(url, data))
+        if row and time.time() - row[5] < self.ttl(url):
+            return CachedResponse(row[0], row[1], json.loads(row[2]))
+        return None
+
+    def set(self, url, body, headers=None, data=None):
+        headers = dict(headers or {})
+        validators = {name.lower(): value for name, value in headers.items()}
+        with self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (self.key(url, data), url, body, json.dumps(headers),
+                 validators.get('etag'), validators.get('last-modified'), time.time())
+            )
+
+    def delete(self, url, data=None):
+        with self.db:
+            self.db.execute('DELETE FROM responses WHERE key = ?', (self.key(url, data),))
+
+    def clear(self):
+        with self.db:
+            self.db.execute('DELETE FROM responses')
+
+    def fetch(self, url, open_url, data=None, accept=None):
+        '''
+        Return the page for url (and form data) from the cache, or
+        by calling open_url(url, headers, data) and storing the result.
+        The result isn't stored if accept(body) is false.
+        '''
+        if not self.enabled:
+            return open_url(url, {}, data)
+        key = self.key(url, data)
+        row = self._lookup(key)
+        if row and time.time() - row[5] < self.ttl(url):
+            self.hits += 1
+            return CachedResponse(row[0], row[1], json.loads(row[2]))
+        headers = {}
+        if row and row[3]:
+            headers['If-None-Match'] = row[3]
+        if row and row[4]:
+            headers['If-Modified-Since'] = row[4]
+        try:
+            response = open_url(url, headers, data)
+        except HTTPError as e:
+            if e.code == 304 and row:
+                self.revalidated += 1
+                with self.db:
+                    self.db.execute('UPDATE responses SET fetched = ? WHERE key = ?', (time.time(), key))
+                return CachedResponse(row[0], row[1], json.loads(row[2]))
+            raise
+        self.misses += 1
+        body = response.read()
+        try:
+            response_headers = dict(response.info().items())
+        except AttributeError:
+            response_headers = {}
+        if accept is None or accept(body):
+            self.set(url, body, response_headers, data)
+        return CachedResponse(url, body, response_headers, from_cache=False)
+
+    @contextmanager
+    def bypass(self):
+        ''' Fetch everything from the web inside this block. '''
+        enabled = self.enabled
+        self.enabled = False
+        try:
+            yield self
+        finally:
+            self.enabled = enabled
+
+
+_cache = None
+
+
+def get_cache():
+    ''' Return the process-wide cache, configured from the environment. '''
+    global _cache
+    if _cache is None and os.environ.get('HTTP_REPLAY'):
+        from fetchtools.replay import Replay
+        _cache = Replay(
+            os.environ['HTTP_REPLAY'],
+            record=os.environ.get('HTTP_RECORD', 'off').lower() in ('on', '1', 'true', 'yes')
+        )
+    elif _cache is None:
+        _cache = ResponseCache(
+            path=os.environ.get('HTTP_CACHE_PATH', DEFAULT_PATH),
+            enabled=os.environ.get('HTTP_CACHE', 'on').lower() not in ('off', '0', 'false', 'no')
+        )
+    return _cache
+
+
+def set_cache(cache):
+    ''' Replace the process-wide cache, e.g. with one using a different file. '''
+    global _cache
+    _cache = cache
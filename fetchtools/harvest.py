@@ -0,0 +1,159 @@
+import asyncio
+import os
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from fetchtools.cache import get_cache
+from fetchtools.session import get_session
+
+'''
+A staged pipeline for harvesting many pages at once.
+
+1. Fetch: pages are fetched concurrently with asyncio, at most 'per_host'
+   at a time from each host and starting no more often than every 'delay'
+   seconds, so the source sites aren't overloaded. Pages already in the
+   response cache skip the limits.
+2. Parse: parse(job, body) runs in a process pool, because parsing with
+   BeautifulSoup is CPU-bound.
+3. Write: write(batch) is called with lists of (job, result) pairs from a
+   single thread, so it can wrap each batch in one database transaction.
+
+The stages are joined by bounded queues, so fetching waits when parsing or
+writing falls behind. parse and write have to be module-level functions
+so they can be sent to the worker processes.
+
+USAGE:
+
+from fetchtools.harvest import Harvester, Job
+
+harvester = Harvester(parse, write)
+harvester.run([Job(key, kind, url), ...])
+
+harvester.errors
+
+> [(Job(key=3, kind='roll', url='...'), ServerError("The server didn't respond"))]
+'''
+
+
+# A page to harvest. 'key' and 'kind' are passed through for parse and write to use.
+Job = namedtuple('Job', ['key', 'kind', 'url'])
+
+
+def fetch_page(url):
+    ''' Fetch a page through the response cache and pooled session. '''
+    return get_cache().fetch(url, get_session().open).read()
+
+
+class Harvester:
+
+    def __init__(self, parse, write, fetch=fetch_page, per_host=2, delay=0.5, fetchers=8, processes=None,
+                 batch_size=50, queue_size=100, progress=None):
+        self.parse = parse
+        self.write = write
+        self.fetch = fetch
+        self.per_host = per_host
+        self.delay = delay
+        self.fetchers = fetchers
+        # With processes=0 pages are parsed in a thread instead
+        self.processes = os.cpu_count() if processes is None else processes
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.progress = progress
+        self.errors = []
+        self.counts = {'fetched': 0, 'parsed': 0, 'written': 0}
+
+    def run(self, jobs):
+        ''' Harvest every job, then return the counts. Failed jobs are listed in self.errors. '''
+        if self.processes:
+            parse_pool = ProcessPoolExecutor(self.processes)
+        else:
+            parse_pool = ThreadPoolExecutor(1)
+        # Database connections belong to a thread, so all the writes happen in one
+        with ThreadPoolExecutor(self.fetchers) as fetch_pool, parse_pool, ThreadPoolExecutor(1) as write_pool:
+            asyncio.run(self._run(list(jobs), fetch_pool, parse_pool, write_pool))
+        return self.counts
+
+    async def _run(self, jobs, fetch_pool, parse_pool, write_pool):
+        loop = asyncio.get_running_loop()
+        pending = asyncio.Queue()
+        for job in jobs:
+            pending.put_nowait(job)
+        fetched = asyncio.Queue(self.queue_size)
+        parsed = asyncio.Queue(self.queue_size)
+        slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        next_start = defaultdict(float)
+        parsers = max(self.processes, 1)
+
+        async def fetch_worker():
+            while True:
+                try:
+                    job = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                cached = get_cache().get(job.url) if self.fetch is fetch_page else None
+                try:
+                    if cached is not None:
+                        body = cached.read()
+                    else:
+                        host = urlsplit(job.url).netloc
+                        async with slots[host]:
+                            # Claim the next start time for this host, then wait for it
+                            start = max(time.monotonic(), next_start[host])
+                            next_start[host] = start + self.delay
+                            await asyncio.sleep(start - time.monotonic())
+                            body = await loop.run_in_executor(fetch_pool, self.fetch, job.url)
+                except Exception as e:
+                    self.errors.append((job, e))
+                    continue
+                self.counts['fetched'] += 1
+                await fetched.put((job, body))
+
+        async def parse_worker():
+            while True:
+                item = await fetched.get()
+                if item is None:
+                    return
+                job, body = item
+                try:
+                    result = await loop.run_in_executor(parse_pool, self.parse, job, body)
+                except Exception as e:
+                    self.errors.append((job, e))
+                    continue
+                self.counts['parsed'] += 1
+                await parsed.put((job, result))
+
+        async def write_batch(batch):
+            try:
+                await loop.run_in_executor(write_pool, self.write, batch)
+            except Exception as e:
+                self.errors.extend((job, e) for job, result in batch)
+            else:
+                self.counts['written'] += len(batch)
+            if self.progress is not None:
+                self.progress(self.counts, len(jobs))
+
+        async def write_worker():
+            batch = []
+            while True:
+                item = await parsed.get()
+                if item is None:
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    await write_batch(batch)
+                    batch = []
+            if batch:
+                await write_batch(batch)
+
+        async def fetch_stage():
+            await asyncio.gather(*[fetch_worker() for i in range(self.fetchers)])
+            for i in range(parsers):
+                await fetched.put(None)
+
+        async def parse_stage():
+            await asyncio.gather(*[parse_worker() for i in range(parsers)])
+            await parsed.put(None)
+
+        await asyncio.gather(fetch_stage(), parse_stage(), write_worker())
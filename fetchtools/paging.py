@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+'''
+Iterating over every page of search results.
+
+The search clients return one page of results at a time. iter_results()
+turns that into a single stream of results, fetching the next page in a
+background thread while the results from the current one are being used.
+It stops once 'total' results have been yielded, when a page comes back
+empty, or when a page repeats the one before it (e.g. the site has
+ignored the page number). An empty page before 'total' results have been
+yielded raises IncompleteResults, rather than cutting the results short
+without saying so.
+
+USAGE:
+
+from fetchtools.paging import iter_results
+
+first = client.search(db, surname='Smith')
+for result in iter_results(first['results'], lambda page: client.search(db, page=page,
+                           surname='Smith')['results'], total=first['total_results']):
+    ...
+'''
+
+
+class IncompleteResults(Exception):
+    pass
+
+
+def iter_results(results, get_page, total=None):
+    '''
+    Yield the first page of results, then those from get_page(2),
+    get_page(3) and so on.
+    '''
+    count = 0
+    page = 1
+    previous = None
+    with ThreadPoolExecutor(1) as pool:
+        while results and results != previous:
+            count += len(results)
+            page += 1
+            if total is None or count < int(total):
+                next_page = pool.submit(get_page, page)
+            else:
+                next_page = None
+            yield from results
+            previous = results
+            results = next_page.result() if next_page else []
+            if next_page and not results and total is not None:
+                raise IncompleteResults('Page {} was empty after {} of {} results'.format(page, count, total))
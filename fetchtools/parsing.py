@@ -0,0 +1,50 @@
+import os
+
+from bs4 import BeautifulSoup
+
+'''
+Making soup for the scraper clients.
+
+The parser is chosen once: lxml if it's installed, as it's several times
+faster, otherwise Python's html.parser. Set the HTML_PARSER environment
+variable (e.g. to 'html.parser' or 'html5lib') to choose another.
+
+make_soup() can parse just one part of a page with a SoupStrainer. If the
+part doesn't have what's expected (e.g. the site's layout has changed) the
+whole page is parsed instead, so nothing is lost.
+
+USAGE:
+
+from fetchtools.parsing import make_soup
+
+soup = make_soup(html, parse_only=SoupStrainer('div', id='content'),
+                 required=lambda soup: soup.find('h1') is not None)
+'''
+
+
+def default_parser():
+    parser = os.environ.get('HTML_PARSER')
+    if parser:
+        return parser
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        return 'html.parser'
+    return 'lxml'
+
+
+PARSER = default_parser()
+
+
+def make_soup(html, parse_only=None, required=None, parser=None):
+    '''
+    Parse html, or only the parts matching the parse_only SoupStrainer.
+    'required' is called with the partial soup, and if it returns False
+    the whole page is parsed.
+    '''
+    parser = parser or PARSER
+    if parse_only is not None:
+        soup = BeautifulSoup(html, parser, parse_only=parse_only)
+        if soup.find() is not None and (required is None or required(soup)):
+            return soup
+    return BeautifulSoup(html, parser)
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import unittest
+from contextlib import contextmanager
+
+import mechanize
+
+from fetchtools.cache import CachedResponse, get_cache, set_cache, normalise_url, normalise_data
+
+'''
+Recording pages to fixture files, and replaying them without a network.
+
+A Replay stands in for the response cache, so every client request that
+goes through get_cache().fetch() is answered from a directory of fixtures.
+The directory has an index.json mapping each url (and a digest of any form
+data) to the file holding its page. Asking for a page that isn't there
+raises ReplayError rather than going to the web.
+
+In record mode pages that aren't there yet are fetched as usual and
+saved, so a test can be recorded once against the live sites and then
+run offline.
+
+USAGE:
+
+from fetchtools.replay import replaying
+
+with replaying('rstools/fixtures'):
+    client.get_title('3445411')
+
+with replaying('rstools/fixtures', record=True):
+    client.get_title('1234')
+
+SETTINGS (environment variables):
+
+HTTP_REPLAY - a fixtures directory to replay every request from
+HTTP_RECORD - set to 'on' to record pages missing from HTTP_REPLAY
+
+Requests made with a client's mechanize browser (the RecordSearch and CWGC
+search forms, and the RecordSearch guest logons) are answered from the
+same fixtures by a ReplayHandler added to the browser. It records every
+request the browser makes, including redirects and form submissions, so
+a whole search can be replayed:
+
+br = mechanize.Browser()
+br.add_handler(ReplayHandler())
+
+The handler does nothing unless a Replay is in use.
+
+Tests that replay a package's fixtures can subclass ReplayTestCase, which
+uses the 'fixtures' directory next to the test module unless the class
+sets fixtures to another path:
+
+class TestItemFunctions(ReplayTestCase):
+    def test_get_title(self):
+        ...
+'''
+
+INDEX = 'index.json'
+
+
+class ReplayError(LookupError):
+    pass
+
+
+class Replay:
+
+    def __init__(self, path, record=False):
+        self.path = path
+        self.record = record
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        try:
+            with open(os.path.join(path, INDEX)) as index:
+                self.index = json.load(index)
+        except FileNotFoundError:
+            self.index = {}
+
+    def key(self, url, data=None):
+        data = normalise_data(data)
+        if data:
+            # Forms with ASP.NET view state are too long to use as they are
+            data = 'data={}'.format(hashlib.sha1(data.encode('utf-8')).hexdigest()[:12])
+        return '{} {}'.format(normalise_url(url), data).strip()
+
+    def _read(self, url, data=None):
+        filename = self.index.get(self.key(url, data))
+        if filename is None or isinstance(filename, dict):
+            return None
+        with open(os.path.join(self.path, filename), 'rb') as fixture:
+            return CachedResponse(url, fixture.read())
+
+    def get(self, url, data=None):
+        ''' Return the recorded page, or None. '''
+        return self._read(url, data)
+
+    def get_redirect(self, url, data=None):
+        ''' Return the (status, location) of a recorded redirect, or None. '''
+        entry = self.index.get(self.key(url, data))
+        if isinstance(entry, dict):
+            return entry['status'], entry['location']
+        return None
+
+    def has(self, url, data=None):
+        return self.key(url, data) in self.index
+
+    def _save_index(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, INDEX), 'w') as index:
+            json.dump(self.index, index, indent=4, sort_keys=True)
+
+    def set(self, url, body, headers=None, data=None):
+        ''' Save a page as a fixture and add it to the index. '''
+        key = self.key(url, data)
+        with self._lock:
+            filename = self.index.get(key)
+            if not isinstance(filename, str):
+                filename = '{}.html'.format(hashlib.sha1(key.encode('utf-8')).hexdigest()[:12])
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, filename), 'wb') as fixture:
+                fixture.write(body)
+            self.index[key] = filename
+            self._save_index()
+
+    def set_redirect(self, url, status, location, data=None):
+        ''' Save a redirect to location in the index. '''
+        with self._lock:
+            self.index[self.key(url, data)] = {'status': status, 'location': location}
+            self._save_index()
+
+    def fetch(self, url, open_url, data=None, accept=None):
+        '''
+        Return the recorded page for url (and form data). In record mode a
+        missing page is fetched with open_url(url, headers, data) and saved,
+        unless accept(body) is false.
+        '''
+        response = self._read(url, data)
+        if response is not None:
+            self.hits += 1
+            return response
+        if not self.record:
+            raise ReplayError('No recorded page for {}'.format(self.key(url, data)))
+        self.misses += 1
+        body = open_url(url, {}, data).read()
+        if accept is None or accept(body):
+            self.set(url, body, data=data)
+        return CachedResponse(url, body, from_cache=False)
+
+    @contextmanager
+    def bypass(self):
+        ''' Replaying never goes to the web, so there's nothing to bypass. '''
+        yield self
+
+
+class ReplayHandler(mechanize.BaseHandler):
+    '''
+    Answers a mechanize browser's requests from the Replay in use, if there
+    is one. In record mode, requests that haven't been recorded go to the
+    web, and their pages (or redirects) are saved.
+    '''
+
+    # Open requests before mechanize's HTTPHandler, and see responses after
+    # they've been unzipped but before redirects are followed.
+    handler_order = 250
+
+    def _replay(self):
+        replay = get_cache()
+        return replay if isinstance(replay, Replay) else None
+
+    def http_open(self, request):
+        replay = self._replay()
+        if replay is None:
+            return None
+        url, data = request.get_full_url(), request.data
+        redirect = replay.get_redirect(url, data)
+        if redirect is not None:
+            status, location = redirect
+            replay.hits += 1
+            return mechanize.make_response(b'', [('Location', location)], url, status, 'Found')
+        response = replay.get(url, data)
+        if response is not None:
+            replay.hits += 1
+            return mechanize.make_response(response.read(), [('Content-Type', 'text/html')], url, 200, 'OK')
+        if not replay.record:
+            raise ReplayError('No recorded page for {}'.format(replay.key(url, data)))
+        # Let the HTTPHandler fetch it
+        return None
+
+    https_open = http_open
+
+    def http_response(self, request, response):
+        replay = self._replay()
+        url, data = request.get_full_url(), request.data
+        if replay is None or not replay.record or replay.has(url, data):
+            return response
+        location = response.info().get('Location')
+        if response.code in (301, 302, 303, 307) and location:
+            replay.misses += 1
+            replay.set_redirect(url, response.code, location, data)
+        elif response.code == 200:
+            replay.misses += 1
+            body = response.read()
+            replay.set(url, body, data=data)
+            response = mechanize.make_response(body, list(response.info().items()), response.geturl(),
+                                               response.code, response.msg)
+        return response
+
+    https_response = http_response
+
+
+@contextmanager
+def replaying(path, record=False):
+    ''' Answer requests from the fixtures in path inside this block. '''
+    previous = get_cache()
+    replay = Replay(path, record)
+    set_cache(replay)
+    try:
+        yield replay
+    finally:
+        set_cache(previous)
+
+
+class ReplayTestCase(unittest.TestCase):
+    ''' Answer requests from the recorded pages in fixtures. '''
+
+    # Defaults to the fixtures directory next to the test module
+    fixtures = None
+
+    def setUp(self):
+        fixtures = self.fixtures
+        if fixtures is None:
+            module = sys.modules[type(self).__module__]
+            fixtures = os.path.join(os.path.dirname(os.path.abspath(module.__file__)), 'fixtures')
+        replay = replaying(fixtures)
+        replay.__enter__()
+        self.addCleanup(replay.__exit__, None, None, None)
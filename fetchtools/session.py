@@ -0,0 +1,201 @@
+import gzip
+import http.client
+import socket
+import threading
+from collections import defaultdict
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit, urljoin, urlencode
+
+'''
+Pooled keep-alive HTTP connections for the scraper clients.
+
+urlopen() opens a new connection for every page, doesn't ask for gzip and
+waits forever for a server that has stopped responding. A Session keeps
+idle connections open for each host and reuses them, asks for compressed
+pages, and gives up after the connect and read timeouts.
+
+USAGE:
+
+from fetchtools.session import get_session
+
+session = get_session()
+response = session.open(url)
+html = response.read()
+
+session.stats()
+
+> {'requests': 12, 'reused': 11, 'connections': 1}
+
+Errors are raised as urllib's HTTPError, failures to connect as URLError,
+and timeouts as socket.timeout, so the clients can handle them as they did
+with urlopen().
+'''
+
+USER_AGENT = 'Mozilla/5.0 (compatible; Mosman1418 harvester)'
+
+# Seconds to wait for a connection, and then for each read from it
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+
+# Most idle connections kept for each host
+MAX_IDLE = 4
+
+MAX_REDIRECTS = 5
+
+# A reused connection the server has already closed fails with one of these
+STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, BrokenPipeError, ConnectionResetError)
+
+
+class Response:
+    ''' A complete response, with the parts of a urllib response the clients use. '''
+
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.status = self.code = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def read(self):
+        return self.body
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+
+class Session:
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, max_idle=MAX_IDLE,
+                 headers=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_idle = max_idle
+        self.headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip'}
+        self.headers.update(headers or {})
+        self.requests = 0
+        self.reused = 0
+        self.connections = 0
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme, host):
+        ''' Take an idle connection to host, or open a new one. Returns (connection, reused). '''
+        with self._lock:
+            if self._idle[(scheme, host)]:
+                return self._idle[(scheme, host)].pop(), True
+            self.connections += 1
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        connection = connection_class(host, timeout=self.connect_timeout)
+        connection.connect()
+        connection.sock.settimeout(self.read_timeout)
+        return connection, False
+
+    def _release(self, scheme, host, connection):
+        with self._lock:
+            idle = self._idle[(scheme, host)]
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def _request(self, method, url, headers, body):
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path = '{}?{}'.format(path, parts.query)
+        connection, reused = self._connect(parts.scheme, parts.netloc)
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+        except STALE_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+            # The server closed the idle connection, so try again with a new one
+            connection, reused = self._connect(parts.scheme, parts.netloc)
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+            except Exception:
+                connection.close()
+                raise
+        except Exception:
+            connection.close()
+            raise
+        try:
+            content = response.read()
+        except Exception:
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(parts.scheme, parts.netloc, connection)
+        with self._lock:
+            self.requests += 1
+            if reused:
+                self.reused += 1
+        return response, content
+
+    def open(self, url, headers=None, data=None):
+        '''
+        Retrieve url, following redirects. With data (a dict or
+        encoded string) the form is POSTed.
+        '''
+        request_headers = dict(self.headers)
+        request_headers.update(headers or {})
+        method = 'GET'
+        if data is not None:
+            method = 'POST'
+            if isinstance(data, dict):
+                data = urlencode(data)
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            request_headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+        for redirect in range(MAX_REDIRECTS + 1):
+            try:
+                response, content = self._request(method, url, request_headers, data)
+            except socket.timeout:
+                raise
+            except OSError as e:
+                # Refused connections, unknown hosts etc., as urlopen() raised them
+                raise URLError(e)
+            location = response.getheader('Location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                if response.status not in (307, 308):
+                    method, data = 'GET', None
+                    request_headers.pop('Content-Type', None)
+                continue
+            break
+        if (response.getheader('Content-Encoding') or '').lower() == 'gzip':
+            content = gzip.decompress(content)
+        if response.status >= 300:
+            raise HTTPError(url, response.status, response.reason, response.msg, None)
+        return Response(url, response.status, response.reason, response.msg, content)
+
+    def stats(self):
+        return {'requests': self.requests, 'reused': self.reused, 'connections': self.connections}
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    ''' Return the process-wide session shared by all the clients. '''
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = Session()
+        return _session
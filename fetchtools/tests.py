@@ -0,0 +1,341 @@
+import gzip
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.error import HTTPError, URLError
+
+import mechanize
+from bs4 import SoupStrainer
+
+from fetchtools.benchmarks import compare
+from fetchtools.cache import ResponseCache, CachedResponse, normalise_url, get_cache
+from fetchtools.session import Session
+from fetchtools.harvest import Harvester, Job
+from fetchtools.paging import IncompleteResults, iter_results
+from fetchtools.parsing import make_soup
+from fetchtools.replay import Replay, ReplayError, ReplayHandler, replaying
+
+
+class FakeServer:
+
+    def __init__(self, body=b'<html></html>', headers=None):
+        self.body = body
+        self.headers = headers or {}
+        self.requests = []
+
+    def open_url(self, url, headers, data=None):
+        self.requests.append((url, headers, data))
+        if 'ETag' in self.headers and headers.get('If-None-Match') == self.headers['ETag']:
+            raise HTTPError(url, 304, 'Not Modified', {}, None)
+        return CachedResponse(url, self.body, self.headers, from_cache=False)
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.directory.name, 'http.sqlite'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_normalise_url(self):
+        self.assertEqual(
+            normalise_url('HTTP://www.AWM.gov.au/people?b=2&a=1#top'),
+            'http://www.awm.gov.au/people?a=1&b=2'
+        )
+
+    def test_fetch_once(self):
+        server = FakeServer()
+        url = 'http://www.awm.gov.au/people/?b=2&a=1'
+        self.assertEqual(self.cache.fetch(url, server.open_url).read(), b'<html></html>')
+        response = self.cache.fetch('http://www.awm.gov.au/people/?a=1&b=2', server.open_url)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(len(server.requests), 1)
+        # Form data is part of the key
+        self.cache.fetch(url, server.open_url, data={'surname': 'Smith'})
+        self.assertEqual(len(server.requests), 2)
+
+    def test_persistent(self):
+        server = FakeServer()
+        self.cache.fetch('http://www.cwgc.org/casualty/1', server.open_url)
+        cache = ResponseCache(self.cache.path)
+        self.assertTrue(cache.fetch('http://www.cwgc.org/casualty/1', server.open_url).from_cache)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_host_ttls(self):
+        self.assertEqual(self.cache.ttl('http://www.awm.gov.au/people/'), self.cache.ttls['awm.gov.au'])
+        self.assertEqual(self.cache.ttl('http://example.com/'), self.cache.default_ttl)
+
+    def test_revalidate(self):
+        server = FakeServer(headers={'ETag': '"abc"'})
+        cache = ResponseCache(self.cache.path, ttls={}, default_ttl=0)
+        cache.fetch('http://example.com/', server.open_url)
+        time.sleep(0.01)
+        response = cache.fetch('http://example.com/', server.open_url)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(server.requests[1][1], {'If-None-Match': '"abc"'})
+        self.assertEqual(cache.revalidated, 1)
+
+    def test_accept(self):
+        server = FakeServer(b'<html>Error</html>')
+        accept = lambda body: b'Error' not in body
+        self.cache.fetch('http://example.com/', server.open_url, accept=accept)
+        self.assertIsNone(self.cache.get('http://example.com/'))
+        self.assertFalse(self.cache.fetch('http://example.com/', server.open_url, accept=accept).from_cache)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_bypass(self):
+        server = FakeServer()
+        self.cache.fetch('http://example.com/', server.open_url)
+        with self.cache.bypass():
+            self.cache.fetch('http://example.com/', server.open_url)
+        self.assertEqual(len(server.requests), 2)
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record_and_replay(self):
+        server = FakeServer(b'<html>Smith</html>')
+        with replaying(self.directory.name, record=True) as replay:
+            self.assertIs(get_cache(), replay)
+            response = get_cache().fetch('http://www.awm.gov.au/people/?b=2&a=1', server.open_url)
+            self.assertFalse(response.from_cache)
+        self.assertIsNot(get_cache(), replay)
+        replay = Replay(self.directory.name)
+        response = replay.fetch('http://www.awm.gov.au/people/?a=1&b=2', server.open_url)
+        self.assertEqual(response.read(), b'<html>Smith</html>')
+        self.assertEqual(len(server.requests), 1)
+
+    def test_missing_page(self):
+        server = FakeServer()
+        replay = Replay(self.directory.name)
+        self.assertRaises(ReplayError, replay.fetch, 'http://example.com/', server.open_url)
+        self.assertIsNone(replay.get('http://example.com/'))
+        self.assertEqual(server.requests, [])
+
+
+class TestPaging(unittest.TestCase):
+
+    def setUp(self):
+        self.pages = {2: [3, 4], 3: [5], 4: []}
+        self.requested = []
+
+    def get_page(self, page):
+        self.requested.append(page)
+        return self.pages[page]
+
+    def test_stop_at_total(self):
+        self.assertEqual(list(iter_results([1, 2], self.get_page, '5')), [1, 2, 3, 4, 5])
+        self.assertEqual(self.requested, [2, 3])
+
+    def test_stop_at_empty_page(self):
+        self.assertEqual(list(iter_results([1, 2], self.get_page)), [1, 2, 3, 4, 5])
+        self.assertEqual(self.requested, [2, 3, 4])
+
+    def test_stop_at_repeated_page(self):
+        results = list(iter_results([1, 2], lambda page: [1, 2], 10))
+        self.assertEqual(results, [1, 2])
+
+    def test_empty_page_before_total(self):
+        results = iter_results([1, 2], self.get_page, 6)
+        with self.assertRaises(IncompleteResults):
+            list(results)
+        self.assertEqual(self.requested, [2, 3, 4])
+
+    def test_prefetch(self):
+        # The next page is requested before the results from the current one are used
+        requested = threading.Event()
+
+        def get_page(page):
+            requested.set()
+            return self.get_page(page)
+
+        results = iter_results([1, 2], get_page, 5)
+        self.assertEqual(next(results), 1)
+        self.assertTrue(requested.wait(5))
+        self.assertEqual(self.requested, [2])
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_compare(self):
+        baseline = {'rstools item': 0.010, 'awmtools roll': 0.002}
+        results = {'rstools item': 0.012, 'awmtools roll': 0.003, 'moatools entry': 0.005}
+        self.assertEqual(compare(results, baseline), [('awmtools roll', 0.003, 0.002)])
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/missing':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path == '/old':
+            self.send_response(301)
+            self.send_header('Location', '/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<html>Mosman</html>'
+        self.send_response(200)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        self.session = Session()
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_connection(self):
+        for i in range(3):
+            self.assertEqual(self.session.open(self.url + '/').read(), b'<html>Mosman</html>')
+        self.assertEqual(self.session.stats(), {'requests': 3, 'reused': 2, 'connections': 1})
+
+    def test_redirect(self):
+        response = self.session.open(self.url + '/old')
+        self.assertEqual(response.geturl(), self.url + '/')
+        self.assertEqual(response.read(), b'<html>Mosman</html>')
+
+    def test_errors(self):
+        with self.assertRaises(HTTPError) as error:
+            self.session.open(self.url + '/missing')
+        self.assertEqual(error.exception.code, 404)
+
+    def test_unreachable_host(self):
+        self.assertRaises(URLError, Session().open, 'http://127.0.0.1:1/')
+
+
+def parse_length(job, body):
+    if body == b'broken':
+        raise ValueError('Could not parse')
+    return len(body)
+
+
+class TestReplayHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.server = HTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_port)
+
+    def browser(self):
+        br = mechanize.Browser()
+        br.set_handle_robots(False)
+        br.set_handle_gzip(True)
+        br.add_handler(ReplayHandler())
+        return br
+
+    def test_record_and_replay(self):
+        with replaying(self.directory.name, record=True):
+            response = self.browser().open(self.url + '/old')
+            self.assertEqual(response.read(), b'<html>Mosman</html>')
+        self.server.shutdown()
+        self.server.server_close()
+        with replaying(self.directory.name) as replay:
+            response = self.browser().open(self.url + '/old')
+            self.assertEqual(response.geturl(), self.url + '/')
+            self.assertEqual(response.read(), b'<html>Mosman</html>')
+            self.assertRaises(ReplayError, self.browser().open, self.url + '/new')
+        self.assertEqual(replay.hits, 2)
+
+
+class TestHarvester(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = []
+        self.fetched = []
+
+    def fetch(self, url):
+        self.fetched.append(url)
+        if url.endswith('/missing'):
+            raise HTTPError(url, 404, 'Not Found', {}, None)
+        return b'broken' if url.endswith('/broken') else url.encode('utf-8')
+
+    def harvester(self, **kwargs):
+        kwargs.setdefault('processes', 0)
+        return Harvester(parse_length, self.batches.append, fetch=self.fetch, delay=0, **kwargs)
+
+    def test_run(self):
+        jobs = [Job(i, 'test', 'http://example.com/{}'.format(i)) for i in range(10)]
+        harvester = self.harvester(batch_size=4)
+        self.assertEqual(harvester.run(jobs), {'fetched': 10, 'parsed': 10, 'written': 10})
+        self.assertEqual([len(batch) for batch in self.batches], [4, 4, 2])
+        results = dict(item for batch in self.batches for item in batch)
+        self.assertEqual(results[jobs[0]], len('http://example.com/0'))
+
+    def test_process_pool(self):
+        jobs = [Job(i, 'test', 'http://example.com/{}'.format(i)) for i in range(5)]
+        self.harvester(processes=2).run(jobs)
+        self.assertEqual(sum(len(batch) for batch in self.batches), 5)
+
+    def test_errors(self):
+        jobs = [Job(1, 'test', 'http://example.com/missing'), Job(2, 'test', 'http://example.com/broken'),
+                Job(3, 'test', 'http://example.com/3')]
+        harvester = self.harvester()
+        harvester.run(jobs)
+        self.assertEqual([job.key for job, error in harvester.errors], [1, 2])
+        self.assertEqual([job.key for batch in self.batches for job, result in batch], [3])
+
+    def test_rate_limit(self):
+        jobs = [Job(i, 'test', 'http://example.com/{}'.format(i)) for i in range(3)]
+        started = time.monotonic()
+        Harvester(parse_length, self.batches.append, fetch=self.fetch, delay=0.05, processes=0).run(jobs)
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+
+PAGE = b'''<html><head><title>Page</title></head><body>
+<div id="nav"><strong>Menu</strong></div>
+<div id="content"><h1 class="pagetitle">Roll of Honour - John Smith</h1>
+<p><strong>Unit:</strong> 1st Battalion</p></div>
+</body></html>'''
+
+
+class TestMakeSoup(unittest.TestCase):
+
+    def test_parse_only(self):
+        soup = make_soup(PAGE, SoupStrainer('div', id='content'), parser='html.parser')
+        self.assertIsNone(soup.title)
+        self.assertEqual([strong.string for strong in soup.find_all('strong')], ['Unit:'])
+
+    def test_missing_part_parses_whole_page(self):
+        soup = make_soup(PAGE, SoupStrainer('div', id='main'), parser='html.parser')
+        self.assertEqual(soup.title.string, 'Page')
+
+    def test_required(self):
+        soup = make_soup(PAGE, SoupStrainer('div', id='content'), lambda soup: soup.find('h2') is not None,
+                         parser='html.parser')
+        self.assertEqual(soup.title.string, 'Page')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import os
+
+try:
+    from client import MOAClient
+except ImportError:
+    from moatools.client import MOAClient
+
+'''
+Parse benchmarks for saved Mapping Our Anzacs pages, run by
+fetchtools.benchmarks.
+
+USAGE:
+
+python -m fetchtools.benchmarks moatools
+
+> moatools entry: <time> ms per page
+
+The fixture is a Mapping Our Anzacs entry trimmed down to its layout.
+'''
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def entry_details(client, html):
+    return client.parse_details(html, '6928234')
+
+
+# (page type, fixture, client, extract(client, html))
+BENCHMARKS = [
+    ('entry', 'entry-6928234.html', MOAClient, entry_details),
+]
+
+
+if __name__ == '__main__':
+    from fetchtools.benchmarks import main
+    main(['moatools'])
@@ -1,12 +1,16 @@
 from bs4 import BeautifulSoup
-from urllib.request import Request, urlopen, HTTPError
+from urllib.error import HTTPError
 import re
+import socket
 
 try:
     from utilities import retry
 except ImportError:
     from moatools.utilities import retry
 
+from fetchtools.cache import get_cache
+from fetchtools.session import get_session
+
 
 class MOAClient():
     '''
@@ -72,12 +76,17 @@ class MOAClient():
     SEE_ALSO_LINK = 'ContentPlaceHolder1_Repeater\d_seelink_0'
     SEE_ALSO_NAME = 'ContentPlaceHolder1_Repeater\d_Label11_0'
 
+    def _get_url(self, url):
+        ''' Retrieve the supplied url, from the response cache if possible.'''
+        return get_cache().fetch(url, self._open_url)
+
     # Uncomment the next line to retry in the case of a timeout error.
     #@retry(ServerError, tries=10, delay=1)
-    def _get_url(self, url):
-        req = Request(url)
+    def _open_url(self, url, headers, data=None):
         try:
-            response = urlopen(req)
+            response = get_session().open(url, headers, data)
+        except socket.timeout:
+            raise ServerError("The server didn't respond")
         except HTTPError as e:
             if e.code == 503 or e.code == 504:
                 raise ServerError("The server didn't respond")
@@ -121,10 +130,14 @@ class MOAClient():
         Get all the extracted details from an entry with the supplied id.
         'id' is either an NAA Recordsearch barcode or a MoA permalink.
         '''
-        details = {}
         barcode = self._parse_id(id)
         response = self._get_url(self.MOA_URL.format(barcode))
-        soup = BeautifulSoup(response.read())
+        return self.parse_details(response.read(), barcode)
+
+    def parse_details(self, html, barcode):
+        ''' Get all the extracted details from the html of the entry for barcode. '''
+        details = {}
+        soup = BeautifulSoup(html)
         for field, id in self.FIELDS.items():
             details[field] = self._get_field_value(soup, id)
         for field, id in self.FORM_FIELDS.items():
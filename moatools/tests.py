@@ -0,0 +1,37 @@
+import unittest
+
+try:
+    from client import MOAClient, UsageError
+except ImportError:
+    from moatools.client import MOAClient, UsageError
+
+from fetchtools.replay import ReplayTestCase
+
+
+class TestDetailsFunctions(ReplayTestCase):
+
+    def test_get_details(self):
+        details = MOAClient().get_details('6928234')
+        self.assertEqual(details['family_name'], 'Hutchings')
+        self.assertEqual(details['other_names'], 'Frank Albert')
+        self.assertEqual(details['place_of_birth'], 'Goulburn, NSW, Australia')
+        self.assertEqual(details['ww1_file'],
+                         {'barcode': '6928234', 'series': 'B2455', 'control_symbol': 'HUTCHINGS F A LIEUTENANT'})
+        self.assertEqual(details['ww2_file'], {'barcode': '5652072', 'series': 'B883', 'control_symbol': 'NX111970'})
+        self.assertEqual(details['tumblr_ids'], ['41234567890'])
+
+    def test_get_details_from_permalink(self):
+        details = MOAClient().get_details(
+            'http://mappingouranzacs.naa.gov.au/details-permalink.aspx?barcode_no=6928234')
+        self.assertEqual(details['family_name'], 'Hutchings')
+
+
+class TestParseId(unittest.TestCase):
+
+    def test_parse_id(self):
+        self.assertEqual(MOAClient()._parse_id('6928234'), '6928234')
+        self.assertRaises(UsageError, MOAClient()._parse_id, 'http://example.com')
+
+
+if __name__ == '__main__':
+    unittest.main()
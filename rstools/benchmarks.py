@@ -0,0 +1,65 @@
+import os
+
+try:
+    from client import RSItemClient, RSSeriesClient
+except ImportError:
+    from rstools.client import RSItemClient, RSSeriesClient
+
+'''
+Parse benchmarks for saved RecordSearch pages, run by fetchtools.benchmarks.
+
+USAGE:
+
+python -m fetchtools.benchmarks rstools
+
+> rstools item: <time> ms per page
+> rstools series: <time> ms per page
+
+The fixtures are RecordSearch item and series pages trimmed down to their
+layout. Digitised page counts need another request, so they're left out.
+'''
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def item_details(client, html):
+    client.tables.clear()
+    client._set_table('3445411', client._parse_page('3445411', html))
+    return {
+        'title': client.get_title(),
+        'identifier': client.get_identifier(),
+        'series': client.get_series(),
+        'control_symbol': client.get_control_symbol(),
+        'contents_dates': client.get_contents_dates(),
+        'digitised_status': client.get_digitised_status(),
+        'access_status': client.get_access_status(),
+        'location': client.get_location(),
+    }
+
+
+def series_details(client, html):
+    client.tables.clear()
+    client._set_table('A1', client._parse_page('A1', html))
+    return {
+        'identifier': client.get_identifier(),
+        'title': client.get_title(),
+        'accumulation_dates': client.get_accumulation_dates(),
+        'contents_dates': client.get_contents_dates(),
+        'items_described': client.get_number_described(),
+        'recording_agencies': client.get_recording_agencies(),
+        'controlling_agencies': client.get_controlling_agencies(),
+        'locations': client.get_quantity_location(),
+        'subsequent_series': client.get_subsequent_series(),
+    }
+
+
+# (page type, fixture, client, extract(client, html))
+BENCHMARKS = [
+    ('item', 'item-3445411.html', RSItemClient, item_details),
+    ('series', 'series-A1.html', RSSeriesClient, series_details),
+]
+
+
+if __name__ == '__main__':
+    from fetchtools.benchmarks import main
+    main(['rstools'])
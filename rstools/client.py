@@ -1,4 +1,7 @@
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote_plus
 from bs4 import BeautifulSoup
 import mechanize
@@ -9,9 +12,14 @@ try:
     import utilities
     from utilities import retry
 except ImportError:
-    import rstools.utilities
+    from rstools import utilities
     from rstools.utilities import retry
 
+from fetchtools.cache import get_cache
+from fetchtools.paging import iter_results
+from fetchtools.replay import ReplayHandler
+from fetchtools.session import get_session
+
 # logger = logging.getLogger("mechanize")
 # logger.addHandler(logging.StreamHandler(sys.stdout))
 # logger.setLevel(logging.DEBUG)
@@ -25,6 +33,11 @@ RS_URLS = {
     'ns_results': 'http://recordsearch.naa.gov.au/NameSearch/Interface/ItemsListing.aspx'
 }
 
+LOGON_URL = 'http://recordsearch.naa.gov.au/scripts/Logon.asp?N=guest'
+
+# RecordSearch sends a form that submits the session id on page load when a session has to be set up.
+SESSION_ID = re.compile(rb'value={(.*?)}')
+
 ITEM_FORM = {
     'kw': {
         'id': 'ctl00$ContentPlaceHolderSNRMain$txbKeywords',
@@ -142,6 +155,12 @@ LOCATIONS = [
     'Sydney'
 ]
 
+# Most page counts fetched at once for a page of search results
+PAGE_COUNT_WORKERS = 4
+
+# Parsed detailsTables kept by each client
+CACHED_TABLES = 20
+
 ACCESS = [
     'OPEN',
     'OWE',
@@ -158,85 +177,219 @@ class ServerError(Exception):
     pass
 
 
+def has_details(html):
+    return b'detailsTable' in html
+
+
+class RSSession:
+    '''
+    The RecordSearch session shared by all the clients. Each client has its
+    own browser, but they all keep their cookies here, so a session set up
+    by one is used by the rest. A new session is only set up when
+    RecordSearch asks for one, i.e. the first time and when it has expired.
+    '''
+
+    def __init__(self):
+        self.cookiejar = mechanize.CookieJar()
+        self.logged_on = False
+        self.negotiated = 0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        ''' Forget the session, so the next request starts a new one. '''
+        self.cookiejar.clear()
+        self.logged_on = False
+
+
+SESSION = RSSession()
+
+
+class DetailsTable:
+    '''
+    The label and value cells of a RecordSearch detailsTable, read in a
+    single pass so each field lookup is a dictionary access rather than a
+    search of the page.
+    '''
+
+    def __init__(self, details):
+        self.details = details
+        self.cells = OrderedDict()
+        self.digitised = None
+        for row in details.find_all('tr'):
+            cells = row.find_all('td', recursive=False)
+            if len(cells) > 1:
+                label = cells[0].get_text(' ', strip=True)
+                if label:
+                    self.cells.setdefault(label, cells[1])
+
+    def cell(self, label):
+        '''
+        Return the value cell for label. Labels that aren't an exact match
+        are treated as a pattern, so 'recording' finds 'Agencies recording'.
+        '''
+        try:
+            return self.cells[label]
+        except KeyError:
+            pattern = re.compile(label)
+            for text, cell in self.cells.items():
+                if pattern.search(text):
+                    return cell
+        return None
+
+    def value(self, label):
+        cell = self.cell(label)
+        if cell is None:
+            return None
+        return ' '.join([string for string in cell.stripped_strings])
+
+
 class RSClient:
 
     def _create_browser(self):
-        self.br = mechanize.Browser()
-        self.br.addheaders = [(
-            'User-agent'
+        self.br = self._new_browser()
+
+    def _new_browser(self):
+        br = mechanize.Browser()
+        br.addheaders = [(
+            'User-agent',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_8_2) AppleWebKit/537.17 (KHTML, like Gecko) Chrome/24.0.1312.52 Safari/537.17'
         )]
-        self.br.set_handle_robots(False)
-        self.br.set_handle_equiv(True)
-        self.br.set_handle_gzip(True)
-        self.br.set_handle_redirect(True)
-        self.br.set_handle_referer(True)
-        self.br.set_handle_refresh(mechanize._http.HTTPRefreshProcessor(), max_time=1)
+        br.set_handle_robots(False)
+        br.set_handle_equiv(True)
+        br.set_handle_gzip(True)
+        br.set_handle_redirect(True)
+        br.set_handle_referer(True)
+        br.set_handle_refresh(mechanize._http.HTTPRefreshProcessor(), max_time=1)
+        br.set_cookiejar(SESSION.cookiejar)
+        # Lets searches and logons be recorded and replayed like other pages
+        br.add_handler(ReplayHandler())
+        return br
 
-    @retry(ServerError, tries=3, delay=1)
     def _get_url(self, url):
+        '''
+        Retrieve the supplied url, from the response cache if possible.
+        Only pages with details are cached, not a session form that couldn't
+        be submitted or a 'no details' page.
+        '''
+        return get_cache().fetch(url, self._open_url, accept=has_details)
+
+    @retry(ServerError, tries=3, delay=1)
+    def _open_url(self, url, headers=None, data=None):
+        # RecordSearch pages don't send validators, so there are no headers to add.
         try:
-            response1 = self.br.open(url)
-            # Recordsearch returns a page with a form that submits on page load.
-            # Have to make sure the session id is submitted with the form.
-            # Extract the session id.
-            session_id = re.search(r"value={(.*)}", response1.read()).group(1)
-            self.br.select_form(name="t")
-            self.br.form.set_all_readonly(False)
-            # Add session id to the form.
-            self.br.form['NAASessionID'] = '{%s}' % session_id
-            response2 = self.br.submit()
-            return response2
+            response = self.br.open(url)
+            session_id = self._get_session_id(response)
+            if session_id:
+                response = self._start_session(session_id)
+            return response
         except mechanize.HTTPError as e:
             if e.code == 503 or e.code == 504:
                 raise ServerError("Server didn't respond")
             else:
                 raise
 
-    def _get_details(self, entity_id):
+    def _get_session_id(self, response):
         '''
-        Given an id retrieve the element containing the item details.
+        If RecordSearch has sent the form that sets up a session, return the
+        session id in it. Otherwise the response is the page itself.
         '''
-        if (not entity_id and self.entity_id) or (entity_id == self.entity_id):
-            details = self.details
-        else:
+        html = response.read()
+        response.seek(0)
+        if b'NAASessionID' in html:
+            session_id = SESSION_ID.search(html)
+            if session_id:
+                return session_id.group(1).decode('ascii')
+        return None
+
+    def _start_session(self, session_id, br=None):
+        '''
+        Submit the session id with the form RecordSearch sent, as the page
+        would on load, and return the page that was asked for. br is the
+        browser that got the form, if it isn't the client's own.
+        '''
+        br = br or self.br
+        br.select_form(name="t")
+        br.form.set_all_readonly(False)
+        br.form['NAASessionID'] = '{%s}' % session_id
+        response = br.submit()
+        with SESSION.lock:
+            SESSION.negotiated += 1
+            # A new session hasn't logged on yet
+            SESSION.logged_on = False
+        return response
+
+    def _log_on(self):
+        '''
+        Log on as a guest, unless this session already has.
+        Logging on sets the session cookies, so it can't come from the cache.
+        '''
+        if not SESSION.logged_on:
+            self._open_url(LOGON_URL)
+            SESSION.logged_on = True
+
+    def _open_as_guest(self, url):
+        '''
+        Open a page that needs a guest logon. If the session has expired
+        a new one is started and logged on before trying again.
+        '''
+        self._log_on()
+        response = self.br.open(url)
+        if self._get_session_id(response):
+            SESSION.logged_on = False
+            self._log_on()
+            response = self.br.open(url)
+        return response
+
+    def _get_table(self, entity_id):
+        '''
+        Given an id retrieve the DetailsTable for the entity. Without an id,
+        use the current entity.
+        '''
+        if not entity_id or entity_id == self.entity_id:
+            if self.table is None:
+                raise UsageError('No entity id was supplied')
+            return self.table
+        table = self.tables.get(entity_id)
+        if table is None:
             url = '{}{}'.format(RS_URLS[self.entity_type], quote_plus(entity_id))
             response = self._get_url(url)
-            soup = BeautifulSoup(response.read())
-            details = soup.find('div', 'detailsTable')
-            if details:
-                self.entity_id = entity_id
-                self.details = details
-            else:
-                raise UsageError('No details found for {}'.format(id))
-        return details
+            table = self._parse_page(entity_id, response.read())
+        self._set_table(entity_id, table)
+        return table
+
+    def _parse_page(self, entity_id, html):
+        '''
+        Parse the page for entity_id and keep its DetailsTable.
+        '''
+        soup = BeautifulSoup(html)
+        details = soup.find('div', 'detailsTable')
+        if not details:
+            raise UsageError('No details found for {}'.format(entity_id))
+        table = self._make_table(details, soup)
+        self.tables[entity_id] = table
+        if len(self.tables) > CACHED_TABLES:
+            self.tables.popitem(last=False)
+        return table
+
+    def _make_table(self, details, soup):
+        return DetailsTable(details)
+
+    def _set_table(self, entity_id, table):
+        self.entity_id = entity_id
+        self.table = table
+        self.details = table.details
+
+    def _get_details(self, entity_id):
+        '''
+        Given an id retrieve the element containing the entity details.
+        '''
+        return self._get_table(entity_id).details
 
     def _get_cell(self, label, entity_id):
-        details = self._get_details(entity_id)
-        try:
-            cell = (
-                details.find(text=re.compile(label))
-                    .parent.parent.findNextSiblings('td')[0]
-            )
-        except (IndexError, AttributeError):
-            # Sometimes the cell labels are inside an enclosing div,
-            # but sometimes not. Try again assuming no div.
-            try:
-                cell = (
-                    details.find(text=re.compile(label))
-                        .parent.findNextSiblings('td')[0]
-                )
-            except (IndexError, AttributeError):
-                cell = None
-        return cell
+        return self._get_table(entity_id).cell(label)
 
     def _get_value(self, label, entity_id):
-        cell = self._get_cell(label, entity_id)
-        try:
-            value = ' '.join([string for string in cell.stripped_strings])
-        except AttributeError:
-            value = None
-        return value
+        return self._get_table(entity_id).value(label)
 
     def _get_formatted_dates(self, label, entity_id, date_format):
         try:
@@ -298,9 +451,7 @@ class RSClient:
         Opens up the items advanced search form.
         Form fields can then be filled using self.br.form.
         '''
-        url = 'http://recordsearch.naa.gov.au/scripts/Logon.asp?N=guest'
-        self._get_url(url)
-        self.br.open('http://recordsearch.naa.gov.au/SearchNRetrieve/Interface/SearchScreens/AdvSearchItems.aspx')
+        self._open_as_guest('http://recordsearch.naa.gov.au/SearchNRetrieve/Interface/SearchScreens/AdvSearchItems.aspx')
         self.br.select_form(name="aspnetForm")
 
 
@@ -311,6 +462,8 @@ class RSItemClient(RSClient):
         self.entity_type = 'item'
         self.entity_id = None
         self.details = None
+        self.table = None
+        self.tables = OrderedDict()
         self.digitised = None
 
     def get_summary(self, entity_id=None, date_format='obj'):
@@ -356,9 +509,7 @@ class RSItemClient(RSClient):
         return self._get_value('Access status', entity_id)
 
     def get_digitised_status(self, entity_id=None):
-        if self.digitised == None:
-            self._get_details(entity_id)
-        return self.digitised
+        return self._get_table(entity_id).digitised
 
     def get_contents_dates(self, entity_id=None, date_format='obj'):
         return self._get_formatted_dates('Contents date range', entity_id, date_format)
@@ -367,10 +518,11 @@ class RSItemClient(RSClient):
         '''
         Returns the number of pages (images) in a digitised file.
         Note that you don't need a session id to access these pages,
-        so there's no need to go through get_url().
+        so there's no need to go through get_url(). This uses the shared
+        session rather than the browser, so it's safe to call from threads.
         '''
         url = 'http://recordsearch.naa.gov.au/scripts/Imagine.asp?B=%s&I=1&SE=1' % entity_id
-        response = self.br.open(url)
+        response = get_cache().fetch(url, get_session().open)
         soup = BeautifulSoup(response.read())
         try:
             pages = soup.find('input', attrs={'id': "Hidden3"})['value']
@@ -378,25 +530,17 @@ class RSItemClient(RSClient):
             pages = '0'
         return pages
 
-    def _get_details(self, entity_id):
+    def _make_table(self, details, soup):
         '''
-        Given an id retrieve the element containing the item details.
-        Overwriting RSClient method to check if file is digitised.
+        Overriding RSClient method to check if file is digitised.
         '''
-        if (not entity_id and self.entity_id) or (entity_id == self.entity_id):
-            details = self.details
-        else:
-            url = '{}{}'.format(RS_URLS[self.entity_type], entity_id)
-            response = self._get_url(url)
-            soup = BeautifulSoup(response.read())
-            details = soup.find('div', 'detailsTable')
-            if details:
-                self.entity_id = entity_id
-                self.details = details
-                self.digitised = self._is_digitised(soup)
-            else:
-                raise UsageError('No details found for {}'.format(id))
-        return details
+        table = DetailsTable(details)
+        table.digitised = self._is_digitised(soup)
+        return table
+
+    def _set_table(self, entity_id, table):
+        super(RSItemClient, self)._set_table(entity_id, table)
+        self.digitised = table.digitised
 
     def _is_digitised(self, soup):
         if soup.find(text=re.compile("View digital copy")):
@@ -413,6 +557,8 @@ class RSSeriesClient(RSClient):
         self.entity_type = 'series'
         self.entity_id = None
         self.details = None
+        self.table = None
+        self.tables = OrderedDict()
 
     def get_summary(self, entity_id=None, date_format='obj'):
         title = self.get_title(entity_id)
@@ -516,6 +662,8 @@ class RSAgencyClient(RSClient):
         self.entity_type = 'agency'
         self.entity_id = None
         self.details = None
+        self.table = None
+        self.tables = OrderedDict()
 
     def get_summary(self, entity_id=None, date_format='obj'):
         title = self.get_title(entity_id)
@@ -556,13 +704,22 @@ class RSAgencyClient(RSClient):
 
 class RSSearchClient(RSItemClient):
 
-    def __init__(self):
+    def __init__(self, fetch_pages=True):
+        '''
+        With fetch_pages=False the number of pages in digitised files isn't
+        looked up, and 'digitised_pages' is None. Use get_digitised_pages()
+        for the ones you need.
+        '''
         self._create_browser()
+        self.fetch_pages = fetch_pages
         self.total_results = None
         self.results = None
         self.page = 1
         self.results_per_page = 20
         self.entity_id = None
+        self.details = None
+        self.table = None
+        self.tables = OrderedDict()
         self.digitised = None
 
     def search_names(self, page=None, results_per_page=None, sort=None, **kwargs):
@@ -605,14 +762,16 @@ class RSSearchClient(RSItemClient):
         if kwargs:
             self._prepare_search(**kwargs)
             response = self.br.submit()
-            html = self._get_html(response, page, sort, results_per_page)
+            html = self._get_html(response, 'search_results', page, sort, results_per_page)
             items = self._process_page(html)
         elif self.results is not None:
             if not page and not results_per_page and not sort:
                 items = self.results
             else:
-                html = self._get_html(response, 'search_results', page, sort, results_per_page)
+                html = self._get_html(self.br.response(), 'search_results', page, sort, results_per_page)
                 items = self._process_page(html)
+        else:
+            raise UsageError('No search parameters were provided.')
         self.results = items
 
         return {
@@ -622,10 +781,38 @@ class RSSearchClient(RSItemClient):
             'results': items
         }
 
+    def iter_items(self, sort=None, results_per_page=None, **kwargs):
+        '''
+        Yield the items from every page of an items search. Each page is
+        fetched while the items from the one before are being used.
+        '''
+        first = self.search_items(sort=sort, results_per_page=results_per_page, **kwargs)
+        yield from self._iter_pages('search_results', first)
+
+    def iter_names(self, sort=None, results_per_page=None, **kwargs):
+        '''
+        Yield the items from every page of a name search.
+        '''
+        first = self.search_names(sort=sort, results_per_page=results_per_page, **kwargs)
+        yield from self._iter_pages('ns_results', first)
+
+    def _iter_pages(self, search_type, first):
+        # The later pages are opened with a browser of their own, sharing the session,
+        # so the client can still be used to look up items while they're fetched.
+        br = self._new_browser()
+
+        def get_page(page):
+            response = br.open('{}?page={}'.format(RS_URLS[search_type], page - 1))
+            # The session can expire during a long harvest
+            session_id = self._get_session_id(response)
+            if session_id:
+                response = self._start_session(session_id, br)
+            return self._process_page(response.read())
+
+        return iter_results(first['results'], get_page, first['total_results'])
+
     def _get_name_search_form(self):
-        url = 'http://recordsearch.naa.gov.au/scripts/Logon.asp?N=guest'
-        self._get_url(url)
-        self.br.open(
+        self._open_as_guest(
             'http://recordsearch.naa.gov.au/Scripts/SessionManagement/SessionManager.asp?Module=NameSearch&Location=home')
         self.br.select_form(nr=0)
         self.br.submit()
@@ -654,6 +841,7 @@ class RSSearchClient(RSItemClient):
 
     def _process_page(self, html):
         soup = BeautifulSoup(html)
+        items = []
         # This will fail if there's only one result
         # Also if there's more than 20000 results
         if soup.find(id='ctl00_ContentPlaceHolderSNRMain_lblToManyRecordsError') is not None:
@@ -663,7 +851,8 @@ class RSSearchClient(RSItemClient):
             items = self._process_list(soup)
             self.total_results = self.get_total_results(html)
         elif soup.find(id=re.compile('ucItemDetails_phDetailsView$')) is not None:
-            self.details = soup.find('div', 'detailsTable')
+            details = soup.find('div', 'detailsTable')
+            self._set_table(None, self._make_table(details, soup))
             items = [self.get_summary()]
             self.total_results = 1
 
@@ -678,8 +867,22 @@ class RSSearchClient(RSItemClient):
         for row in results:
             item = self._process_row(row)
             items.append(item)
+        if self.fetch_pages:
+            self._add_digitised_pages(items)
         return items
 
+    def _add_digitised_pages(self, items):
+        '''
+        Look up the number of pages in each digitised file, a few at a time.
+        '''
+        digitised = [item for item in items if item['digitised_status']]
+        if not digitised:
+            return
+        with ThreadPoolExecutor(PAGE_COUNT_WORKERS) as pool:
+            barcodes = [item['identifier'] for item in digitised]
+            for item, pages in zip(digitised, pool.map(self.get_digitised_pages, barcodes)):
+                item['digitised_pages'] = pages
+
     def _process_row(self, row):
         item = {}
         cells = row.findAll('td')
@@ -699,8 +902,8 @@ class RSSearchClient(RSItemClient):
         barcode = cells[6].string.strip()
         if cells[5].find('a') is not None:
             item['digitised_status'] = True
-            rs_item = RSItemClient()
-            item['digitised_pages'] = rs_item.get_digitised_pages(barcode)
+            # Filled in for the whole page by _add_digitised_pages()
+            item['digitised_pages'] = None
         else:
             item['digitised_status'] = False
             item['digitised_pages'] = 0
@@ -1,13 +1,33 @@
+import os
+import tempfile
+import threading
 import unittest
-import retrieve
-import utilities
 import datetime
+from unittest import mock
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
 
+try:
+    import utilities
+    import client
+    from client import RSItemClient, RSSeriesClient, RSSearchClient
+except ImportError:
+    from rstools import client, utilities
+    from rstools.client import RSItemClient, RSSeriesClient, RSSearchClient
 
-class TestSeriesFunctions(unittest.TestCase):
+from fetchtools.cache import ResponseCache, get_cache, set_cache
+from fetchtools.paging import IncompleteResults
+from fetchtools.replay import replaying, ReplayError, ReplayTestCase
+from fetchtools.session import get_session
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class TestSeriesFunctions(ReplayTestCase):
 
     def setUp(self):
-        self.rs = retrieve.RSSeriesClient()
+        super(TestSeriesFunctions, self).setUp()
+        self.rs = RSSeriesClient()
 
     def test_get_identifier(self):
         identifier = self.rs.get_identifier('A1')
@@ -64,10 +84,11 @@ class TestSeriesFunctions(unittest.TestCase):
         self.assertEqual(items_described, results)
 
 
-class TestItemFunctions(unittest.TestCase):
+class TestItemFunctions(ReplayTestCase):
 
     def setUp(self):
-        self.rs = retrieve.RSItemClient()
+        super(TestItemFunctions, self).setUp()
+        self.rs = RSItemClient()
 
     def test_get_title(self):
         test_title = (
@@ -82,6 +103,178 @@ class TestItemFunctions(unittest.TestCase):
         pages = self.rs.get_digitised_pages('3445411')
         self.assertEqual(pages, '47')
 
+    def test_get_digitised_status(self):
+        self.assertTrue(self.rs.get_digitised_status('3445411'))
+
+
+class TestSearchFunctions(ReplayTestCase):
+
+    def setUp(self):
+        super(TestSearchFunctions, self).setUp()
+        client.SESSION.clear()
+        self.addCleanup(client.SESSION.clear)
+
+    def test_iter_items(self):
+        items = list(RSSearchClient(fetch_pages=False).iter_items(kw='Mosman'))
+        self.assertEqual([item['identifier'] for item in items], ['3445411', '1801234', '3050567'])
+        self.assertEqual(items[0]['control_symbol'], 'CRISFORD W R E')
+
+    def test_iter_names(self):
+        items = list(RSSearchClient(fetch_pages=False).iter_names(surname='Crisford'))
+        self.assertEqual([item['identifier'] for item in items], ['3445411', '1801234', '3050567'])
+
+    def test_digitised_pages(self):
+        replay = get_cache()
+        with mock.patch.object(replay, 'fetch', wraps=replay.fetch) as fetch:
+            items = list(RSSearchClient().iter_items(kw='Mosman'))
+        self.assertEqual([item['digitised_pages'] for item in items], ['47', 0, '12'])
+        # Looked up through the shared session, not the search's browser
+        self.assertEqual(sorted(call[0][0] for call in fetch.call_args_list), [
+            'http://recordsearch.naa.gov.au/scripts/Imagine.asp?B=3050567&I=1&SE=1',
+            'http://recordsearch.naa.gov.au/scripts/Imagine.asp?B=3445411&I=1&SE=1',
+        ])
+        for call in fetch.call_args_list:
+            self.assertEqual(call[0][1], get_session().open)
+
+    def test_digitised_pages_not_fetched(self):
+        items = list(RSSearchClient(fetch_pages=False).iter_items(kw='Mosman'))
+        self.assertEqual([item['digitised_status'] for item in items], [True, False, True])
+        self.assertEqual([item['digitised_pages'] for item in items], [None, 0, None])
+
+
+class SessionHandler(BaseHTTPRequestHandler):
+    ''' Acts like RecordSearch, sending the session form to requests without a current session. '''
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, cookie=None):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        if cookie:
+            self.send_header('Set-Cookie', 'ASPSESSION={}; path=/'.format(cookie))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        cookie = self.headers.get('Cookie', '').partition('ASPSESSION=')[2]
+        if cookie in self.server.sessions:
+            self._send(self._page())
+        else:
+            self._send((
+                '<html><body onload="document.t.submit()"><form name="t" method="post" action="{}">'
+                '<input type=hidden name=NAASessionID value={{ABC-123}}></form></body></html>'
+            ).format(self.path).encode('utf-8'))
+
+    def do_POST(self):
+        self.server.requests.append(self.path)
+        form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        assert form['NAASessionID'] == ['{ABC-123}']
+        cookie = str(len(self.server.requests))
+        self.server.sessions.add(cookie)
+        self._send(self._page(), cookie)
+
+    def _page(self):
+        if self.path.startswith('/listing'):
+            with open(os.path.join(FIXTURES, 'search-mosman-2.html'), 'rb') as fixture:
+                return fixture.read()
+        return '<html><body>{}</body></html>'.format(self.path).encode('utf-8')
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), SessionHandler)
+        self.server.requests = []
+        self.server.sessions = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        client.SESSION.clear()
+        self.addCleanup(client.SESSION.clear)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuse_session(self):
+        negotiated = client.SESSION.negotiated
+        response = RSItemClient()._open_url(self.url + '/item/1')
+        self.assertEqual(response.read(), b'<html><body>/item/1</body></html>')
+        # Another client uses the same session
+        response = RSSeriesClient()._open_url(self.url + '/series/A1')
+        self.assertEqual(response.read(), b'<html><body>/series/A1</body></html>')
+        self.assertEqual(self.server.requests, ['/item/1', '/item/1', '/series/A1'])
+        self.assertEqual(client.SESSION.negotiated, negotiated + 1)
+
+    def test_expired_session(self):
+        rs = RSItemClient()
+        negotiated = client.SESSION.negotiated
+        rs._open_url(self.url + '/item/1')
+        self.server.sessions.clear()
+        response = rs._open_url(self.url + '/item/2')
+        self.assertEqual(response.read(), b'<html><body>/item/2</body></html>')
+        self.assertEqual(client.SESSION.negotiated, negotiated + 2)
+
+    def search_pages(self, path):
+        urls = dict(client.RS_URLS)
+        client.RS_URLS['search_results'] = self.url + path
+        self.addCleanup(client.RS_URLS.update, urls)
+        rs = RSSearchClient(fetch_pages=False)
+        return rs._iter_pages('search_results', {'results': ['first', 'second'], 'total_results': '3'})
+
+    def test_iter_pages_after_session_expires(self):
+        negotiated = client.SESSION.negotiated
+        items = list(self.search_pages('/listing'))
+        self.assertEqual(items[2]['identifier'], '3050567')
+        self.assertEqual(self.server.requests, ['/listing?page=1', '/listing?page=1'])
+        self.assertEqual(client.SESSION.negotiated, negotiated + 1)
+
+    def test_iter_pages_incomplete(self):
+        with self.assertRaises(IncompleteResults):
+            list(self.search_pages('/expired'))
+
+    def test_only_cache_details(self):
+        previous = get_cache()
+        set_cache(ResponseCache(':memory:'))
+        self.addCleanup(set_cache, previous)
+        rs = RSItemClient()
+        # The server's pages only have details if the path asks for them
+        for path in ['/item/1', '/item/detailsTable']:
+            rs._get_url(self.url + path)
+        self.assertIsNone(get_cache().get(self.url + '/item/1'))
+        self.assertIsNotNone(get_cache().get(self.url + '/item/detailsTable'))
+
+    def test_log_on_once(self):
+        logon_url = client.LOGON_URL
+        client.LOGON_URL = self.url + '/logon'
+        self.addCleanup(setattr, client, 'LOGON_URL', logon_url)
+        rs = RSItemClient()
+        rs._open_as_guest(self.url + '/search')
+        rs._open_as_guest(self.url + '/search')
+        self.assertEqual(self.server.requests, ['/logon', '/logon', '/search', '/search'])
+        # An expired session is replaced and logged on again
+        self.server.sessions.clear()
+        response = rs._open_as_guest(self.url + '/search')
+        self.assertEqual(response.read(), b'<html><body>/search</body></html>')
+        self.assertEqual(self.server.requests[4:], ['/search', '/logon', '/logon', '/search'])
+
+    def test_replay_log_on(self):
+        logon_url = client.LOGON_URL
+        client.LOGON_URL = self.url + '/logon'
+        self.addCleanup(setattr, client, 'LOGON_URL', logon_url)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with replaying(directory.name, record=True):
+            RSItemClient()._open_as_guest(self.url + '/search')
+        self.server.shutdown()
+        client.SESSION.clear()
+        with replaying(directory.name):
+            response = RSItemClient()._open_as_guest(self.url + '/search')
+            self.assertEqual(response.read(), b'<html><body>/search</body></html>')
+            self.assertRaises(ReplayError, RSItemClient()._open_as_guest, self.url + '/other')
+
 
 class TestUtilityFunctions(unittest.TestCase):
 
@@ -100,7 +293,9 @@ class TestUtilityFunctions(unittest.TestCase):
                     ),
                 ]
         for case in cases:
-            self.assertEqual(utilities.process_date_string(case[0]), case[1])
+            dates = utilities.process_date_string(case[0])
+            self.assertEqual(dates['date_str'], case[0])
+            self.assertEqual([date for date in (dates['start_date'], dates['end_date']) if date], case[1])
 
     def test_convert_date_to_iso(self):
         cases = [